@@ -0,0 +1,215 @@
+import asyncio
+import json
+import math
+import os
+import time
+
+ENABLED = os.environ.get("GOLEM_API_ADMISSION", "1") == "1"
+
+# Per class limits. concurrency/queue of 0 mean unlimited, rate is requests per
+# second refilling a bucket of `burst` tokens (0 = no rate limit).
+# Every value can be overridden with GOLEM_API_ADMISSION_<CLASS>_<KEY>, e.g.
+# GOLEM_API_ADMISSION_HEAVY_CONCURRENCY=2
+DEFAULT_LIMITS = {
+    "heavy": {"concurrency": 1, "queue": 4, "max_wait": 30.0, "rate": 0.2, "burst": 3},
+    # Lifecycle requests only wait on the serialized operation queue, so they aren't slot limited
+    "lifecycle": {"concurrency": 0, "queue": 0, "max_wait": 0.0, "rate": 1.0, "burst": 10},
+    "script": {"concurrency": 2, "queue": 8, "max_wait": 10.0, "rate": 1.0, "burst": 5},
+    # Job submissions return 202 at once and the script job queue bounds the work, so they are only rate limited
+    "submit": {"concurrency": 0, "queue": 0, "max_wait": 0.0, "rate": 1.0, "burst": 5},
+    # Long-lived responses (SSE subscriptions, bundle and history downloads) hold a slot
+    # until the body is finished, so they get their own slots instead of using up "read"
+    "stream": {"concurrency": 32, "queue": 8, "max_wait": 5.0, "rate": 0, "burst": 0},
+    "read": {"concurrency": 16, "queue": 64, "max_wait": 5.0, "rate": 0, "burst": 0},
+    "health": {"concurrency": 0, "queue": 0, "max_wait": 0.0, "rate": 0, "burst": 0},
+}
+
+# (method, path, class) - a path ending in "/" matches everything below it.
+# Anything not listed is a cheap "read".
+ENDPOINT_CLASSES = [
+    ("POST", "/bootstrap", "heavy"),
+    ("POST", "/start-golem", "lifecycle"),
+    ("POST", "/stop-golem", "lifecycle"),
+    ("POST", "/edit-golem", "lifecycle"),
+    ("POST", "/run-script", "script"),
+    ("GET", "/hello-world", "script"),
+    ("POST", "/script-jobs", "submit"),
+    ("POST", "/mirror/", "heavy"),
+    ("POST", "/upgrade", "lifecycle"),
+    ("POST", "/upgrade/", "heavy"),
+    ("POST", "/disk-budget/evict", "heavy"),
+    ("POST", "/benchmark", "heavy"),
+    ("GET", "/golem-status/stream", "stream"),
+    ("GET", "/diagnostics", "stream"),
+    ("GET", "/history/export", "stream"),
+    ("GET", "/mirror/bundle", "stream"),
+    ("GET", "/mirror/artifacts/", "stream"),
+    ("GET", "/admission", "health"),
+    ("GET", "/healthz", "health"),
+    ("GET", "/readyz", "health"),
+    ("GET", "/debug/", "health"),     # Profiling must work while the API is overloaded
+    ("POST", "/debug/", "health"),
+    ("GET", "/tracing/slow", "health"),
+]
+
+MAX_RETRY_AFTER = 300
+DURATION_SMOOTHING = 0.2  # Weight of the newest request in the average duration
+
+
+def _limit_from_env(class_name: str, key: str, default):
+    value = os.environ.get(f"GOLEM_API_ADMISSION_{class_name.upper()}_{key.upper()}")
+    return type(default)(value) if value is not None else default
+
+
+class AdmissionClass:
+    """Concurrency slots, a bounded wait queue and a token bucket for one endpoint class"""
+
+    def __init__(self, name: str, concurrency: int, queue: int, max_wait: float, rate: float, burst: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.max_wait = max_wait
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.tokens_updated = time.monotonic()
+        self.in_flight = 0
+        self.waiting = 0
+        self.avg_duration = 0.0
+        self.counters = {"admitted": 0, "queued": 0, "rate_limited": 0, "queue_full": 0, "wait_timeout": 0}
+        self._slots = None
+
+    def _take_token(self) -> float:
+        """Take a rate limit token; returns 0 on success, else seconds until one is available"""
+        if not self.rate:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.tokens_updated) * self.rate)
+        self.tokens_updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def _queue_retry_after(self) -> float:
+        """Rough time until a slot frees up for a newly arriving request"""
+        return self.avg_duration * (self.waiting + 1) / max(self.concurrency, 1)
+
+    async def acquire(self):
+        """Wait for a slot; returns None once admitted, or (status code, message, retry after)"""
+        wait_for_token = self._take_token()
+        if wait_for_token:
+            self.counters["rate_limited"] += 1
+            return 429, f"Rate limit for {self.name} requests exceeded", wait_for_token
+
+        if not self.concurrency:
+            self._admit()
+            return None
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+
+        if self._slots.locked():
+            if self.queue and self.waiting >= self.queue:
+                self.counters["queue_full"] += 1
+                return 503, f"Too many {self.name} requests queued", self._queue_retry_after()
+            self.counters["queued"] += 1
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.max_wait or None)
+            except asyncio.TimeoutError:
+                self.counters["wait_timeout"] += 1
+                return 503, f"Timed out waiting for a {self.name} request slot", self._queue_retry_after()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        self._admit()
+        return None
+
+    def _admit(self):
+        self.in_flight += 1
+        self.counters["admitted"] += 1
+
+    def release(self, duration: float):
+        self.in_flight -= 1
+        self.avg_duration += (duration - self.avg_duration) * DURATION_SMOOTHING
+        if self._slots is not None:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "limits": {
+                "concurrency": self.concurrency,
+                "queue": self.queue,
+                "max_wait": self.max_wait,
+                "rate": self.rate,
+                "burst": self.burst,
+            },
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "tokens": round(self.tokens, 2) if self.rate else None,
+            "avg_duration": round(self.avg_duration, 4),
+            **self.counters,
+        }
+
+
+classes = {
+    name: AdmissionClass(name, **{key: _limit_from_env(name, key, default) for key, default in limits.items()})
+    for name, limits in DEFAULT_LIMITS.items()
+}
+
+
+def classify(method: str, path: str) -> str:
+    for rule_method, rule_path, class_name in ENDPOINT_CLASSES:
+        if method != rule_method:
+            continue
+        if path == rule_path or (rule_path.endswith("/") and path.startswith(rule_path)):
+            return class_name
+    return "read"
+
+
+def stats() -> dict:
+    return {
+        "enabled": ENABLED,
+        "classes": {name: admission_class.stats() for name, admission_class in classes.items()},
+    }
+
+
+async def _send_rejection(send, status_code: int, message: str, retry_after: float):
+    retry_after = max(1, min(math.ceil(retry_after), MAX_RETRY_AFTER))
+    body = json.dumps({"status": "error", "message": message, "retry_after": retry_after}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that admits each request through its endpoint class' limits"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        admission_class = classes[classify(scope["method"], scope["path"])]
+        rejection = await admission_class.acquire()
+        if rejection:
+            await _send_rejection(send, *rejection)
+            return
+
+        # The slot is held until the response (including streamed bodies) is finished
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_class.release(time.monotonic() - started)
@@ -0,0 +1,357 @@
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import requests
+
+MIRROR_DIR = os.environ.get("GOLEM_API_MIRROR_DIR", "~/.local/share/golem-api/mirror")
+# Local artifacts and bundles are only read from here, so the API can't be used to copy arbitrary host files
+IMPORT_DIR = os.environ.get("GOLEM_API_MIRROR_IMPORT_DIR", "~/.local/share/golem-api/import")
+MANIFEST_NAME = "manifest.json"
+BLOBS_DIR = "blobs"            # Artifacts are stored by sha256
+BUNDLE_NAME = "golem-mirror-bundle.tar"
+
+CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_TIMEOUT = 60          # Seconds without data before a download is abandoned
+
+# Where each kind of artifact is unpacked; the tarballs' top-level directory is stripped
+INSTALL_DIRS = {
+    "provider": "~/.local/bin",                # golemsp, yagna, ya-provider, exe-unit
+    "runtime": "~/.local/lib/yagna/plugins",   # ya-runtime-vm, ya-runtime-wasi
+}
+
+# Release tarballs the as-provider installer downloads; the VM runtime is versioned separately from yagna
+RUNTIME_VERSION = os.environ.get("GOLEM_API_RUNTIME_VM_VERSION", "0.4.2")
+RELEASE_URLS = {
+    "provider": "https://github.com/golemfactory/yagna/releases/download/v{version}/golem-provider-linux-v{version}.tar.gz",
+    "runtime": "https://github.com/golemfactory/ya-runtime-vm/releases/download/v{runtime_version}/ya-runtime-vm-linux-v{runtime_version}.tar.gz",
+}
+
+_lock = threading.Lock()
+
+
+class MirrorError(Exception):
+    """Raised for unknown artifacts, checksum mismatches and unusable bundles"""
+
+
+def mirror_dir() -> str:
+    return os.path.expanduser(MIRROR_DIR)
+
+
+def import_dir() -> str:
+    return os.path.realpath(os.path.expanduser(IMPORT_DIR))
+
+
+def import_path(path: str) -> str:
+    """Resolve a local artifact or bundle path (relative ones against IMPORT_DIR), refusing anything outside IMPORT_DIR"""
+    allowed = import_dir()
+    resolved = os.path.realpath(os.path.join(allowed, os.path.expanduser(path)))
+    if os.path.commonpath([allowed, resolved]) != allowed:
+        raise MirrorError(f"Only files in {allowed} can be imported: {path}")
+    return resolved
+
+
+def _blob_path(sha256: str) -> str:
+    return os.path.join(mirror_dir(), BLOBS_DIR, sha256)
+
+
+def load_manifest() -> dict:
+    """name -> {sha256, size, kind, source, added_at}"""
+    try:
+        with open(os.path.join(mirror_dir(), MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest: dict):
+    path = os.path.join(mirror_dir(), MANIFEST_NAME)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def _check_name(name: str):
+    if not name or "/" in name or name.startswith("."):
+        raise MirrorError(f"Invalid artifact name: {name}")
+
+
+def _store(chunks, name: str, kind: str, source: str, expected_sha256: str = None) -> dict:
+    """Write chunks to the blob store, verifying the checksum before the artifact becomes visible"""
+    _check_name(name)
+    if kind not in INSTALL_DIRS:
+        raise MirrorError(f"Unknown artifact kind: {kind} (expected one of {', '.join(INSTALL_DIRS)})")
+    os.makedirs(os.path.join(mirror_dir(), BLOBS_DIR), exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=mirror_dir(), prefix=".incoming-", delete=False) as temp_file:
+        try:
+            for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                temp_file.write(chunk)
+        except BaseException:
+            os.unlink(temp_file.name)
+            raise
+
+    sha256 = digest.hexdigest()
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        os.unlink(temp_file.name)
+        raise MirrorError(f"Checksum mismatch for {name}: expected {expected_sha256}, got {sha256}")
+
+    os.replace(temp_file.name, _blob_path(sha256))
+    entry = {"sha256": sha256, "size": size, "kind": kind, "source": source, "added_at": time.time()}
+    with _lock:
+        manifest = load_manifest()
+        manifest[name] = entry
+        _save_manifest(manifest)
+    print(f"[MIRROR] Stored {name} ({size} bytes, sha256 {sha256[:12]}...) from {source}")
+    return {"name": name, **entry}
+
+
+def _iter_file(path: str):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _iter_download(url: str):
+    with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            yield chunk
+
+
+def add_from_url(url: str, kind: str, name: str = None, sha256: str = None) -> dict:
+    """Download an artifact into the mirror (once; an artifact with the same name and checksum is kept)"""
+    name = name or url.rstrip("/").rsplit("/", 1)[-1]
+    existing = load_manifest().get(name)
+    if existing and (sha256 is None or existing["sha256"] == sha256.lower()) and os.path.exists(_blob_path(existing["sha256"])):
+        return {"name": name, **existing, "cached": True}
+    return _store(_iter_download(url), name, kind, url, sha256)
+
+
+def add_from_file(path: str, kind: str, name: str = None, sha256: str = None) -> dict:
+    """Copy a local artifact (e.g. a test fixture) from IMPORT_DIR into the mirror"""
+    path = import_path(path)
+    return _store(_iter_file(path), name or os.path.basename(path), kind, f"file://{path}", sha256)
+
+
+def release_url(kind: str, version: str, runtime_version: str = None) -> str:
+    runtime_version = (runtime_version or RUNTIME_VERSION).lstrip("v")
+    return RELEASE_URLS[kind].format(version=version.lstrip("v"), runtime_version=runtime_version)
+
+
+def add_release(version: str, runtime_version: str = None) -> list:
+    """Mirror the provider release tarball for a golem version and the VM runtime tarball (RUNTIME_VERSION by default)"""
+    return [add_from_url(release_url(kind, version, runtime_version), kind) for kind in RELEASE_URLS]
+
+
+def artifact_path(name: str) -> str:
+    entry = load_manifest().get(name)
+    if entry is None or not os.path.exists(_blob_path(entry["sha256"])):
+        raise MirrorError(f"Artifact not in mirror: {name}")
+    return _blob_path(entry["sha256"])
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    for chunk in _iter_file(path):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify(names: list = None) -> dict:
+    """Re-hash stored artifacts; returns name -> ok / missing / corrupt"""
+    manifest = load_manifest()
+    results = {}
+    for name in names or manifest:
+        entry = manifest.get(name)
+        if entry is None or not os.path.exists(_blob_path(entry["sha256"])):
+            results[name] = "missing"
+        else:
+            results[name] = "ok" if hash_file(_blob_path(entry["sha256"])) == entry["sha256"] else "corrupt"
+    return results
+
+
+def export_bundle() -> str:
+    """Write the manifest and all artifacts into one tar file and return its path"""
+    manifest = load_manifest()
+    bundle_path = os.path.join(mirror_dir(), BUNDLE_NAME)
+    temp_path = f"{bundle_path}.tmp"
+    with tarfile.open(temp_path, "w") as bundle:
+        bundle.add(os.path.join(mirror_dir(), MANIFEST_NAME), arcname=MANIFEST_NAME)
+        for entry in manifest.values():
+            bundle.add(_blob_path(entry["sha256"]), arcname=f"{BLOBS_DIR}/{entry['sha256']}")
+    os.replace(temp_path, bundle_path)
+    return bundle_path
+
+
+def import_bundle(path: str) -> list:
+    """Add every artifact from a bundle made by export_bundle() in IMPORT_DIR, verifying each checksum"""
+    imported = []
+    with tarfile.open(import_path(path), "r") as bundle:
+        try:
+            manifest = json.load(bundle.extractfile(MANIFEST_NAME))
+        except (KeyError, ValueError) as e:
+            raise MirrorError(f"Not a mirror bundle: {str(e)}")
+        local_manifest = load_manifest()
+        for name, entry in manifest.items():
+            local = local_manifest.get(name)
+            if local and local["sha256"] == entry["sha256"] and os.path.exists(_blob_path(local["sha256"])):
+                continue
+            try:
+                blob = bundle.extractfile(f"{BLOBS_DIR}/{entry['sha256']}")
+            except KeyError:
+                raise MirrorError(f"Bundle is missing {name}")
+            chunks = iter(lambda: blob.read(CHUNK_SIZE), b"")
+            imported.append(_store(chunks, name, entry["kind"], f"bundle://{name}", entry["sha256"]))
+    return imported
+
+
+def sync_from_peer(peer_url: str, names: list = None) -> list:
+    """Fetch artifacts this mirror doesn't have yet from another node's /mirror API"""
+    peer_url = peer_url.rstrip("/")
+    response = requests.get(f"{peer_url}/mirror", timeout=DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    peer_manifest = response.json()["artifacts"]
+    local_manifest = load_manifest()
+
+    synced = []
+    for name in names or peer_manifest:
+        entry = peer_manifest.get(name)
+        if entry is None:
+            raise MirrorError(f"Peer {peer_url} has no artifact {name}")
+        local = local_manifest.get(name)
+        if local and local["sha256"] == entry["sha256"] and os.path.exists(_blob_path(local["sha256"])):
+            continue
+        chunks = _iter_download(f"{peer_url}/mirror/artifacts/{name}")
+        synced.append(_store(chunks, name, entry["kind"], f"{peer_url}/mirror/artifacts/{name}", entry["sha256"]))
+    return synced
+
+
+def _safe_members(archive: tarfile.TarFile):
+    """Members with their top-level directory stripped, refusing paths that escape the target"""
+    for member in archive.getmembers():
+        parts = member.name.split("/", 1)
+        if len(parts) < 2 or not parts[1]:
+            continue
+        member.name = parts[1]
+        if os.path.isabs(member.name) or ".." in member.name.split("/"):
+            raise MirrorError(f"Unsafe path in archive: {member.name}")
+        if member.islnk():
+            # Hard link targets are archive paths, so they lose the top-level directory too
+            link_parts = member.linkname.split("/", 1)
+            if len(link_parts) < 2 or not link_parts[1]:
+                raise MirrorError(f"Unsafe link in archive: {member.name}")
+            member.linkname = link_parts[1]
+        if member.issym() or member.islnk():
+            if os.path.isabs(member.linkname) or ".." in member.linkname.split("/"):
+                raise MirrorError(f"Unsafe link in archive: {member.name}")
+        yield member
+
+
+def _split_members(members: list, target: str, subdirs: dict) -> dict:
+    """target -> members, where members under a subdirs prefix go to its directory with the prefix stripped"""
+    groups = {target: []}
+    for member in members:
+        destination = target
+        for prefix, directory in subdirs.items():
+            if member.name == prefix:
+                destination = None     # The subtree's own directory entry
+                break
+            if member.name.startswith(f"{prefix}/"):
+                destination = directory
+                member.name = member.name[len(prefix) + 1:]
+                if member.islnk():
+                    if not member.linkname.startswith(f"{prefix}/"):
+                        raise MirrorError(f"Hard link across install directories in archive: {member.name}")
+                    member.linkname = member.linkname[len(prefix) + 1:]
+                break
+        else:
+            if member.islnk() and any(member.linkname.startswith(f"{prefix}/") for prefix in subdirs):
+                raise MirrorError(f"Hard link across install directories in archive: {member.name}")
+        if destination is not None:
+            groups.setdefault(destination, []).append(member)
+    return groups
+
+
+def extract(name: str, target: str, subdirs: dict = None) -> list:
+    """
+    Verify an artifact's checksum and unpack it into target; returns the
+    extracted paths, relative to where they went. subdirs maps a top-level directory of the archive
+    (e.g. "plugins") to a directory of its own to unpack it into instead.
+    """
+    entry = load_manifest().get(name)
+    if entry is None:
+        raise MirrorError(f"Artifact not in mirror: {name}")
+    path = artifact_path(name)
+    if hash_file(path) != entry["sha256"]:
+        raise MirrorError(f"Artifact {name} is corrupt, re-add it to the mirror")
+
+    extracted = []
+    with tarfile.open(path, "r:*") as archive:
+        members = list(_safe_members(archive))
+        # Paths are already checked; the "tar" filter (where available) also keeps executable bits
+        extract_options = {"filter": "tar"} if hasattr(tarfile, "tar_filter") else {}
+        for destination, group in _split_members(members, target, subdirs or {}).items():
+            os.makedirs(destination, exist_ok=True)
+            archive.extractall(destination, members=group, **extract_options)
+            extracted.extend(member.name for member in group)
+    return extracted
+
+
+def install(names: list = None) -> list:
+    """
+    Unpack mirrored artifacts into their install directories. A provider
+    tarball's plugins/ goes to the runtime directory, where yagna looks for runtimes.
+    """
+    manifest = load_manifest()
+    installed = []
+    for name in names or manifest:
+        if name not in manifest:
+            raise MirrorError(f"Artifact not in mirror: {name}")
+        kind = manifest[name]["kind"]
+        target = os.path.expanduser(INSTALL_DIRS[kind])
+        subdirs = {"plugins": os.path.expanduser(INSTALL_DIRS["runtime"])} if kind == "provider" else None
+        files = extract(name, target, subdirs)
+        installed.append({"name": name, "kind": kind, "target": target, "files": len(files)})
+        print(f"[MIRROR] Installed {name} into {target}")
+    return installed
+
+
+def remove(name: str) -> bool:
+    """Drop an artifact from the manifest, deleting its blob if nothing else uses it"""
+    with _lock:
+        manifest = load_manifest()
+        entry = manifest.pop(name, None)
+        if entry is None:
+            return False
+        _save_manifest(manifest)
+    if not any(other["sha256"] == entry["sha256"] for other in manifest.values()):
+        try:
+            os.unlink(_blob_path(entry["sha256"]))
+        except FileNotFoundError:
+            pass
+    return True
+
+
+def stats() -> dict:
+    manifest = load_manifest()
+    usage = shutil.disk_usage(mirror_dir()) if os.path.isdir(mirror_dir()) else None
+    return {
+        "mirror_dir": mirror_dir(),
+        "artifact_count": len(manifest),
+        "total_bytes": sum(entry["size"] for entry in manifest.values()),
+        "disk_free": usage.free if usage else None,
+        "artifacts": manifest,
+    }
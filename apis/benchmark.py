@@ -0,0 +1,221 @@
+import hashlib
+import multiprocessing
+import os
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from . import host_probe
+
+BENCHMARKS = ("cpu", "memory", "disk")
+DEFAULT_DURATION = 2.0       # Seconds per measurement
+MAX_DURATION = 30.0
+MAX_WORKERS = os.cpu_count() or 1   # Each worker is a spawned interpreter, and memory workers allocate ~128 MiB each
+START_DELAY = 1.0            # Seconds for spawned workers to start before a parallel run begins
+HASH_BLOCK = 1024 * 1024     # CPU: SHA-256 over this buffer, repeatedly
+MEMORY_BUFFER = 64 * 1024 * 1024  # Memory: copies between two buffers of this size
+DISK_FILE_SIZE = 256 * 1024 * 1024
+DISK_BLOCK = 1024 * 1024
+RANDOM_BLOCK = 4096
+BENCHMARK_DIR = "~/.local/share/golem-api"  # Disk test file goes on the same disk as the provider data
+MIB = 1024 * 1024
+GIB = 1024 ** 3
+
+_lock = threading.Lock()
+
+
+class BenchmarkError(Exception):
+    """Raised when a benchmark is already running or the arguments are invalid"""
+
+
+# Workers run in spawned processes, so they must stay importable top-level functions
+
+def _wait_until(start_at: float):
+    delay = start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _cpu_worker(duration: float, start_at: float) -> dict:
+    data = os.urandom(HASH_BLOCK)
+    _wait_until(start_at)
+    blocks = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    while time.perf_counter() < deadline:
+        hashlib.sha256(data).digest()
+        blocks += 1
+    elapsed = time.perf_counter() - started
+    return {"mib_per_second": blocks * HASH_BLOCK / MIB / elapsed}
+
+
+def _memory_worker(duration: float, start_at: float) -> dict:
+    source = bytearray(os.urandom(1024)) * (MEMORY_BUFFER // 1024)
+    target = bytearray(MEMORY_BUFFER)
+    _wait_until(start_at)
+    copies = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    while time.perf_counter() < deadline:
+        target[:] = source
+        copies += 1
+    elapsed = time.perf_counter() - started
+    return {"gib_per_second": copies * MEMORY_BUFFER / GIB / elapsed}
+
+
+def _disk_worker(path: str, size: int, duration: float) -> dict:
+    block = os.urandom(DISK_BLOCK)
+    result = {"file_size": size}
+    try:
+        # Sequential write, including the time to get it onto the disk
+        started = time.perf_counter()
+        with open(path, "wb", buffering=0) as f:
+            for _ in range(size // DISK_BLOCK):
+                f.write(block)
+            os.fsync(f.fileno())
+        result["write_mib_per_second"] = size / MIB / (time.perf_counter() - started)
+
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            # Drop the file from the page cache so reads hit the disk (best effort)
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            started = time.perf_counter()
+            while os.read(fd, DISK_BLOCK):
+                pass
+            result["read_mib_per_second"] = size / MIB / (time.perf_counter() - started)
+
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            blocks = size // RANDOM_BLOCK
+            reads = 0
+            started = time.perf_counter()
+            deadline = started + duration
+            while time.perf_counter() < deadline:
+                os.pread(fd, RANDOM_BLOCK, random.randrange(blocks) * RANDOM_BLOCK)
+                reads += 1
+            result["random_read_iops"] = reads / (time.perf_counter() - started)
+        finally:
+            os.close(fd)
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+    return result
+
+
+def _run_parallel(pool: ProcessPoolExecutor, worker, workers: int, duration: float) -> list:
+    """Run worker in `workers` processes over the same time window"""
+    start_at = time.time() + START_DELAY
+    futures = [pool.submit(worker, duration, start_at) for _ in range(workers)]
+    return [future.result() for future in futures]
+
+
+def _scaling(single: float, multi: float, workers: int) -> float:
+    return round(multi / (single * workers), 3) if single else None
+
+
+def run(benchmarks: list = None, duration: float = DEFAULT_DURATION, workers: int = None) -> dict:
+    """
+    Run the CPU, memory bandwidth and disk microbenchmarks and store the result
+    with the host probe. CPU and memory run once in one process and once in
+    `workers` processes (default: one per logical CPU) at the same time.
+    """
+    benchmarks = list(benchmarks or BENCHMARKS)
+    unknown = [name for name in benchmarks if name not in BENCHMARKS]
+    if unknown:
+        raise BenchmarkError(f"Unknown benchmarks: {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+    if not 0 < duration <= MAX_DURATION:
+        raise BenchmarkError(f"duration must be between 0 and {MAX_DURATION:g} seconds")
+    workers = workers or MAX_WORKERS
+    if not 1 <= workers <= MAX_WORKERS:
+        raise BenchmarkError(f"workers must be between 1 and {MAX_WORKERS} (logical CPUs)")
+    if not _lock.acquire(blocking=False):
+        raise BenchmarkError("A benchmark is already running")
+
+    started = time.time()
+    result = {"started_at": started, "duration": duration, "workers": workers}
+    try:
+        # spawn: forking a process with the API's threads running is not safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            if "cpu" in benchmarks:
+                single = _run_parallel(pool, _cpu_worker, 1, duration)[0]["mib_per_second"]
+                multi = sum(r["mib_per_second"] for r in _run_parallel(pool, _cpu_worker, workers, duration))
+                result["cpu"] = {
+                    "single_core_mib_per_second": single,
+                    "multi_core_mib_per_second": multi,
+                    "per_core_mib_per_second": multi / workers,
+                    "scaling": _scaling(single, multi, workers),
+                }
+            if "memory" in benchmarks:
+                single = _run_parallel(pool, _memory_worker, 1, duration)[0]["gib_per_second"]
+                multi = sum(r["gib_per_second"] for r in _run_parallel(pool, _memory_worker, workers, duration))
+                result["memory"] = {
+                    "single_gib_per_second": single,
+                    "multi_gib_per_second": multi,
+                    "scaling": _scaling(single, multi, workers),
+                }
+            if "disk" in benchmarks:
+                directory = os.path.expanduser(BENCHMARK_DIR)
+                os.makedirs(directory, exist_ok=True)
+                # Never take more than a tenth of the free space
+                size = min(DISK_FILE_SIZE, shutil.disk_usage(directory).free // 10) // DISK_BLOCK * DISK_BLOCK
+                if size < DISK_BLOCK:
+                    result["disk"] = {"error": "Not enough free disk space"}
+                else:
+                    path = os.path.join(directory, f".benchmark-{os.getpid()}")
+                    result["disk"] = {"path": directory, **pool.submit(_disk_worker, path, size, duration).result()}
+    finally:
+        _lock.release()
+
+    probe = host_probe.get_host_probe()
+    result["host"] = {
+        "logical_cpus": (probe.get("cpu") or {}).get("logical_cpus"),
+        "model_name": (probe.get("cpu") or {}).get("model_name"),
+        "memory_total": (probe.get("memory") or {}).get("total"),
+    }
+    result["elapsed"] = time.time() - started
+    host_probe.store_benchmark(result)
+    print(f"[BENCHMARK] Finished {', '.join(benchmarks)} in {result['elapsed']:.1f}s")
+    return result
+
+
+def pricing(result: dict, settings: dict, preset: str = "vm", target_per_glm: float = None) -> dict:
+    """
+    What the current prices buy: SHA-256 MiB per GLM for a requestor renting all
+    offered cores for an hour, from the per-core CPU result. With target_per_glm,
+    also the cpu_per_hour that would deliver that much.
+    """
+    if not result or "cpu" not in result:
+        return {"error": "No CPU benchmark result, run POST /benchmark first"}
+    prices = settings.get("presets", {}).get(preset)
+    if prices is None:
+        return {"error": f"No pricing for preset {preset}"}
+    try:
+        cores = int(settings.get("cpu_cores"))
+    except (TypeError, ValueError):
+        cores = result["workers"]
+
+    per_core = result["cpu"]["per_core_mib_per_second"]
+    cpu_per_hour = prices.get("per_cpu_hour", 0.0)
+    env_per_hour = prices.get("per_hour", 0.0)
+    hourly_cost = cpu_per_hour * cores + env_per_hour
+    hourly_throughput = per_core * cores * 3600
+    efficiency = {
+        "preset": preset,
+        "cores": cores,
+        "cpu_per_hour": cpu_per_hour,
+        "env_per_hour": env_per_hour,
+        "start_fee": prices.get("for_start", 0.0),
+        "hourly_cost_glm": hourly_cost,
+        "hourly_throughput_mib": hourly_throughput,
+        "throughput_per_glm": hourly_throughput / hourly_cost if hourly_cost else None,
+    }
+    if target_per_glm:
+        suggested = (hourly_throughput / target_per_glm - env_per_hour) / cores
+        efficiency["target_per_glm"] = target_per_glm
+        efficiency["suggested_cpu_per_hour"] = max(suggested, 0.0)
+    return efficiency
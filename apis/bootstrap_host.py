@@ -5,6 +5,8 @@ import os
 import re
 import requests
 import tempfile
+from . import executor
+from . import host_probe
 
 # GitHub script URLs - change these to point to different repositories or branches
 GITHUB_SCRIPT_BASE_URL = "https://raw.githubusercontent.com/skillDeCoder/idle-finance-v2/main/automation/golem/scripts"
@@ -23,7 +25,7 @@ def clean_ansi(text: str) -> str:
 def check_golem_installed() -> bool:
     """Check if golemsp is installed and available"""
     try:
-        subprocess.run(["golemsp", "--version"], capture_output=True, check=True)
+        executor.run_command(["golemsp", "--version"])
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
         return False
@@ -31,38 +33,15 @@ def check_golem_installed() -> bool:
 def check_golem_running() -> bool:
     """Check if golemsp is currently running"""
     try:
-        subprocess.run(["pgrep", "golemsp"], capture_output=True, check=True)
+        executor.run_command(["pgrep", "golemsp"])
         return True
     except subprocess.CalledProcessError:
         return False
 
 def check_requirement() -> dict:
     """Check if host machine meets requirements for Golem provider"""
-    requirements = {
-        "platform": platform.system(),
-        "virtualization_support": False,
-        "virtualization_count": 0,
-        "meets_requirements": False
-    }
-    
-    # Check if platform is Linux
-    if platform.system() != "Linux":
-        requirements["meets_requirements"] = False
-        return requirements
-    
-    # Check virtualization support
-    try:
-        result = subprocess.run(["egrep", "-c", "(vmx|svm)", "/proc/cpuinfo"], 
-                              capture_output=True, text=True, check=True)
-        virtualization_count = int(result.stdout.strip())
-        requirements["virtualization_count"] = virtualization_count
-        requirements["virtualization_support"] = virtualization_count > 0
-        requirements["meets_requirements"] = virtualization_count > 0
-    except (subprocess.CalledProcessError, ValueError):
-        requirements["virtualization_support"] = False
-        requirements["meets_requirements"] = False
-    
-    return requirements
+    # Re-probe the host so the cached probe also reflects the latest check
+    return host_probe.get_host_probe(refresh=True)["requirements"]
 
 def bootstrap_host():
     """
@@ -116,7 +95,7 @@ def bootstrap_host():
         
         # Check if expect is already installed
         try:
-            subprocess.run(["expect", "-c", "exit"], capture_output=True, check=True)
+            executor.run_command(["expect", "-c", "exit"])
             bootstrap_steps.append({
                 "step": current_step,
                 "action": "install_expect",
@@ -127,8 +106,8 @@ def bootstrap_host():
         except (subprocess.CalledProcessError, FileNotFoundError):
             try:
                 # Install expect using apt
-                result = subprocess.run(["sudo", "apt", "update"], capture_output=True, text=True, check=True)
-                result = subprocess.run(["sudo", "apt", "install", "-y", "expect"], capture_output=True, text=True, check=True)
+                result = executor.run_command(["sudo", "apt", "update"], timeout=executor.SCRIPT_TIMEOUT)
+                result = executor.run_command(["sudo", "apt", "install", "-y", "expect"], timeout=executor.SCRIPT_TIMEOUT)
                 
                 bootstrap_steps.append({
                     "step": current_step,
@@ -188,7 +167,7 @@ def bootstrap_host():
                 os.chmod(temp_script_path, 0o755)
                 
                 # Execute the script
-                result = subprocess.run(["bash", temp_script_path], capture_output=True, text=True, check=True)
+                result = executor.run_command(["bash", temp_script_path], timeout=executor.SCRIPT_TIMEOUT)
                 
                 # Clean up
                 os.unlink(temp_script_path)
@@ -258,7 +237,7 @@ def bootstrap_host():
             os.chmod(temp_script_path, 0o755)
             
             # Execute the script
-            result = subprocess.run(["bash", temp_script_path], capture_output=True, text=True, check=True)
+            result = executor.run_command(["bash", temp_script_path], timeout=executor.SCRIPT_TIMEOUT)
             
             # Clean up
             os.unlink(temp_script_path)
@@ -313,7 +292,7 @@ def bootstrap_host():
         
         # Check if KVM is already available
         try:
-            subprocess.run(["kvm-ok"], capture_output=True, check=True)
+            executor.run_command(["kvm-ok"])
             bootstrap_steps.append({
                 "step": current_step,
                 "action": "install_kvm",
@@ -338,10 +317,14 @@ def bootstrap_host():
                 # Make script executable
                 os.chmod(temp_script_path, 0o755)
                 
-                # Execute the script as a background process
-                kvm_process = subprocess.Popen(["bash", temp_script_path], 
-                                             stdout=subprocess.PIPE, 
-                                             stderr=subprocess.PIPE, 
+                # Execute the script as a background process; output goes to a log file
+                # so a full pipe can't stall it, and the reaper collects it when it exits
+                kvm_log = tempfile.NamedTemporaryFile(mode='w+', prefix='install-kvm-', suffix='.log', delete=False)
+                kvm_process = executor.spawn(["bash", temp_script_path],
+                                             timeout=executor.SCRIPT_TIMEOUT,
+                                             on_exit=lambda process: kvm_log.close(),
+                                             stdout=kvm_log,
+                                             stderr=subprocess.STDOUT,
                                              text=True)
                 
                 # Wait 5 seconds for initial progress
@@ -356,24 +339,26 @@ def bootstrap_host():
                         "status": "success",
                         "message": "KVM installation started (running in background)",
                         "note": "KVM installation is a long-running process. Use /check-requirements to verify completion.",
+                        "log_file": kvm_log.name,
                         "script_url": script_url
                     })
                     print(f"Step {current_step} completed: KVM installation started (background)")
                 else:
                     # Process completed quickly
-                    stdout, stderr = kvm_process.communicate()
+                    with open(kvm_log.name) as f:
+                        output = f.read()
                     if kvm_process.returncode == 0:
                         bootstrap_steps.append({
                             "step": current_step,
                             "action": "install_kvm",
                             "status": "success",
                             "message": "KVM installed successfully",
-                            "output": stdout,
+                            "output": output,
                             "script_url": script_url
                         })
                         print(f"Step {current_step} completed: KVM installed")
                     else:
-                        raise subprocess.CalledProcessError(kvm_process.returncode, kvm_process.args, stdout, stderr)
+                        raise subprocess.CalledProcessError(kvm_process.returncode, kvm_process.args, output, None)
                 
                 # Clean up temp file
                 os.unlink(temp_script_path)
@@ -434,7 +419,7 @@ def bootstrap_host():
             os.chmod(temp_script_path, 0o755)
             
             # Execute the script
-            result = subprocess.run(["bash", temp_script_path], capture_output=True, text=True, check=True)
+            result = executor.run_command(["bash", temp_script_path], timeout=executor.SCRIPT_TIMEOUT)
             
             # Clean up
             os.unlink(temp_script_path)
@@ -0,0 +1,173 @@
+"""
+Thin command line client for the local API over its Unix domain socket.
+
+    python -m apis.cli status
+    python -m apis.cli logs --provider --lines 50
+    python -m apis.cli settings --set cores=4 --set memory=8GiB
+
+Only the standard library is used, so it starts quickly and works on hosts
+without the API's dependencies.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+import time
+import urllib.parse
+
+SOCKET_NAME = "golem-api.sock"
+REQUEST_TIMEOUT = 300  # Start/stop can take up to the API's control timeout
+
+
+def default_socket_path() -> str:
+    """GOLEM_API_SOCKET, else golem-api.sock in $XDG_RUNTIME_DIR or ~/.local/share/golem-api"""
+    if os.environ.get("GOLEM_API_SOCKET"):
+        return os.path.expanduser(os.environ["GOLEM_API_SOCKET"])
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    return os.path.expanduser(f"~/.local/share/golem-api/{SOCKET_NAME}")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket"""
+
+    def __init__(self, socket_path: str, timeout: float = REQUEST_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class Client:
+    """
+    Keeps one keep-alive connection open across requests, over the Unix socket
+    or, given a url, over TCP.
+    """
+
+    def __init__(self, socket_path: str = None, url: str = None, timeout: float = REQUEST_TIMEOUT):
+        if url:
+            parsed = urllib.parse.urlsplit(url)
+            self.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+        else:
+            self.connection = UnixHTTPConnection(socket_path or default_socket_path(), timeout)
+        self._used = False
+
+    def request(self, method: str, path: str, params: dict = None, body: dict = None) -> dict:
+        if params:
+            path = f"{path}?{urllib.parse.urlencode(params)}"
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        try:
+            response = self._send(method, path, payload, headers)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            if not self._used:
+                raise
+            # The server closed the idle keep-alive connection; retry once on a new one
+            self.connection.close()
+            response = self._send(method, path, payload, headers)
+        self._used = True
+        data = response.read()
+        try:
+            return json.loads(data)
+        except ValueError:
+            return {"status": "error", "message": f"HTTP {response.status}", "details": data.decode(errors="replace")}
+
+    def _send(self, method: str, path: str, payload: bytes, headers: dict) -> http.client.HTTPResponse:
+        self.connection.request(method, path, body=payload, headers=headers)
+        return self.connection.getresponse()
+
+    def close(self):
+        self.connection.close()
+
+    def status(self) -> dict:
+        return self.request("GET", "/golem-status")
+
+    def logs(self, lines: int = 20, provider: bool = False) -> dict:
+        return self.request("GET", "/ya-provider-log" if provider else "/golem-log", {"lines": lines})
+
+    def start(self) -> dict:
+        return self.request("POST", "/start-golem")
+
+    def stop(self) -> dict:
+        return self.request("POST", "/stop-golem")
+
+    def settings(self) -> dict:
+        return self.request("GET", "/golem-settings")
+
+    def edit_settings(self, **settings) -> dict:
+        return self.request("POST", "/edit-golem", body=settings)
+
+
+def _print(result: dict):
+    print(json.dumps(result, indent=2))
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog="golem-api", description="Local Golem provider API client")
+    parser.add_argument("--socket", help="API Unix socket (default: %(default)s)", default=default_socket_path())
+    parser.add_argument("--url", help="Use TCP instead of the socket, e.g. http://localhost:8000")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    status_parser = subcommands.add_parser("status", help="Provider status")
+    status_parser.add_argument("--watch", type=float, metavar="SECONDS", help="Repeat every SECONDS over one connection")
+    logs_parser = subcommands.add_parser("logs", help="Tail the yagna log (or the ya-provider log)")
+    logs_parser.add_argument("--lines", type=int, default=20)
+    logs_parser.add_argument("--provider", action="store_true", help="Show the ya-provider log")
+    subcommands.add_parser("start", help="Start the provider")
+    subcommands.add_parser("stop", help="Stop the provider")
+    settings_parser = subcommands.add_parser("settings", help="Show or change provider settings")
+    settings_parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                                 help="e.g. cores=4, memory=8GiB, cpu_per_hour=0.1 (repeatable)")
+
+    args = parser.parse_args(argv)
+    client = Client(args.socket, args.url)
+    try:
+        if args.command == "status":
+            while True:
+                result = client.status()
+                _print(result)
+                if not args.watch:
+                    break
+                time.sleep(args.watch)
+        elif args.command == "logs":
+            result = client.logs(args.lines, args.provider)
+            if result.get("status") == "success":
+                sys.stdout.write(result["log"])
+            else:
+                _print(result)
+        elif args.command == "settings" and args.set:
+            changes = {}
+            for item in args.set:
+                key, separator, value = item.partition("=")
+                if not separator:
+                    parser.error(f"--set expects KEY=VALUE, got {item}")
+                changes[key] = int(value) if key == "cores" else value
+            result = client.edit_settings(**changes)
+            _print(result)
+        else:
+            result = getattr(client, args.command)()
+            _print(result)
+    except (OSError, http.client.HTTPException) as e:
+        target = args.url or args.socket
+        print(f"Could not reach the API at {target}: {str(e)}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        client.close()
+    return 0 if result.get("status") != "error" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
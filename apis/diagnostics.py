@@ -0,0 +1,206 @@
+import gzip
+import io
+import json
+import os
+import queue
+import socket
+import tarfile
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LOG_DIRS = ("~/.local/share/yagna", "~/.local/share/ya-provider")
+LOG_SUFFIXES = (".log", ".gz")   # Current and rotated logs, e.g. ya-provider_rCURRENT.log, yagna.2024-01-15.log.gz
+CHUNK_SIZE = 64 * 1024
+QUEUE_CHUNKS = 16                # Bounded buffer between the tar producer and the response
+PUT_TIMEOUT = 1                  # Seconds between checks for a gone client while the buffer is full
+FORMATS = {                      # compression -> (media type, file extension)
+    "gz": ("application/gzip", "tar.gz"),
+    "zst": ("application/zstd", "tar.zst"),   # Needs the zstandard package
+}
+
+
+class ExportCancelled(Exception):
+    """The client went away; the producer stops writing"""
+
+
+class _QueueWriter:
+    """Write-only file object that hands the data to the response through a bounded queue"""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.buffer = bytearray()
+
+    def write(self, data) -> int:
+        self.buffer += data
+        while len(self.buffer) >= CHUNK_SIZE:
+            self._put(bytes(self.buffer[:CHUNK_SIZE]))
+            del self.buffer[:CHUNK_SIZE]
+        return len(data)
+
+    def flush_buffer(self):
+        if self.buffer:
+            self._put(bytes(self.buffer))
+            self.buffer.clear()
+
+    def _put(self, chunk: bytes):
+        while True:
+            if self.cancelled.is_set():
+                raise ExportCancelled()
+            try:
+                self.chunks.put(chunk, timeout=PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+
+class _SizedReader:
+    """
+    Reads exactly size bytes from a log that may be appended to, rotated or
+    truncated while it is archived: growth is cut off and missing bytes are
+    zero-padded, since the tar header already carries the size.
+    """
+
+    def __init__(self, f, size: int):
+        self.f = f
+        self.remaining = size
+
+    def read(self, n: int = -1) -> bytes:
+        n = self.remaining if n is None or n < 0 else min(n, self.remaining)
+        data = self.f.read(n)
+        if len(data) < n:
+            data += b"\0" * (n - len(data))
+        self.remaining -= len(data)
+        return data
+
+
+def available_formats() -> list:
+    return [name for name in FORMATS if name != "zst" or zstandard is not None]
+
+
+def list_logs(rotated: bool = True, since: float = None) -> list:
+    """(path, name in the bundle) for the provider and yagna logs"""
+    logs = []
+    for log_dir in LOG_DIRS:
+        log_dir = os.path.expanduser(log_dir)
+        try:
+            entries = sorted(os.scandir(log_dir), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.name.endswith(LOG_SUFFIXES) or not entry.is_file(follow_symlinks=False):
+                continue
+            if not rotated and "_rCURRENT" not in entry.name:
+                continue
+            if since is not None and entry.stat().st_mtime < since:
+                continue
+            logs.append((entry.path, f"logs/{os.path.basename(log_dir)}/{entry.name}"))
+    return logs
+
+
+def _add_bytes(archive: tarfile.TarFile, name: str, data: bytes, mtime: float):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    info.mode = 0o644
+    archive.addfile(info, io.BytesIO(data))
+
+
+def _add_log(archive: tarfile.TarFile, path: str, name: str) -> int:
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        info = tarfile.TarInfo(name)
+        info.size = st.st_size
+        info.mtime = st.st_mtime
+        info.mode = 0o644
+        archive.addfile(info, _SizedReader(f, st.st_size))
+    return st.st_size
+
+
+def _write_bundle(fileobj, snapshots: dict, logs: list, prefix: str, manifest: dict):
+    now = time.time()
+    with tarfile.open(fileobj=fileobj, mode="w|", format=tarfile.PAX_FORMAT) as archive:
+        # Snapshots first, so a bundle cut short still has the small files
+        for name, collect in snapshots.items():
+            started = time.time()
+            try:
+                data = collect()
+                manifest["snapshots"][name] = {"ok": True, "elapsed": time.time() - started}
+            except Exception as e:
+                data = {"error": str(e)}
+                manifest["snapshots"][name] = {"ok": False, "error": str(e)}
+            _add_bytes(archive, f"{prefix}/{name}.json", json.dumps(data, indent=2, default=str).encode(), now)
+
+        for path, name in logs:
+            try:
+                size = _add_log(archive, path, f"{prefix}/{name}")
+                manifest["logs"].append({"name": name, "size": size})
+            except OSError as e:
+                # Removed by rotation between listing and opening
+                manifest["errors"].append({"name": name, "error": str(e)})
+
+        manifest["finished_at"] = time.time()
+        _add_bytes(archive, f"{prefix}/manifest.json", json.dumps(manifest, indent=2).encode(), now)
+
+
+def bundle_name() -> str:
+    return f"golem-diagnostics-{socket.gethostname()}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+
+def stream_bundle(name: str, snapshots: dict, logs: list, compression: str = "gz"):
+    """
+    Generator of compressed tar chunks. A producer thread writes the archive
+    into a bounded queue, so memory use doesn't depend on the size of the logs
+    and nothing is written to disk. snapshots maps name -> callable returning
+    JSON-serializable data; each is collected in the producer thread.
+    """
+    if compression not in available_formats():
+        raise ValueError(f"Unsupported format: {compression} (available: {', '.join(available_formats())})")
+    chunks = queue.Queue(maxsize=QUEUE_CHUNKS)
+    cancelled = threading.Event()
+    manifest = {"host": socket.gethostname(), "created_at": time.time(), "snapshots": {}, "logs": [], "errors": []}
+    done = object()
+
+    def produce():
+        writer = _QueueWriter(chunks, cancelled)
+        try:
+            if compression == "zst":
+                compressor = zstandard.ZstdCompressor(level=3).stream_writer(writer, closefd=False)
+            else:
+                compressor = gzip.GzipFile(filename=f"{name}.tar", mode="wb", compresslevel=6, fileobj=writer)
+            _write_bundle(compressor, snapshots, logs, name, manifest)
+            compressor.close()
+            writer.flush_buffer()
+        except ExportCancelled:
+            return
+        except Exception as e:
+            print(f"[DIAGNOSTICS] Bundle export failed: {str(e)}")
+        try:
+            writer._put(done)
+        except ExportCancelled:
+            pass
+
+    producer = threading.Thread(target=produce, name="diagnostics-export", daemon=True)
+    producer.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        # Client disconnected or the stream finished - let the producer exit
+        cancelled.set()
+
+
+def media_type(compression: str) -> str:
+    return FORMATS[compression][0]
+
+
+def file_extension(compression: str) -> str:
+    return FORMATS[compression][1]
@@ -0,0 +1,300 @@
+import collections
+import os
+import re
+import shutil
+import threading
+import time
+
+GIB = 1024 ** 3
+DATA_DIR = "~/.local/share"
+PROC_PATH = "/proc"
+
+# Usage categories as (category, path under DATA_DIR); the first matching prefix wins
+CATEGORY_PATHS = [
+    ("image_cache", "ya-provider/exe-unit/cache"),    # Downloaded task images (.gvmi)
+    ("activity_work", "ya-provider/exe-unit/work"),   # Per agreement/activity work dirs
+    ("provider_logs", "ya-provider"),                 # Only *.log files, see classify()
+    ("provider_data", "ya-provider"),
+    ("yagna_logs", "yagna"),                          # Only *.log files, see classify()
+    ("yagna_data", "yagna"),                          # Databases, keys
+    ("api_data", "golem-api"),                        # Artifact mirror, staging, caches
+]
+CATEGORIES = list(dict.fromkeys(category for category, _ in CATEGORY_PATHS))
+LOG_PATTERN = re.compile(r"\.log(\.\d+)?(\.gz)?$")
+CURRENT_LOG_PATTERN = re.compile(r"_rCURRENT\.log$")
+
+# Evictor configuration - every key can be changed at runtime via configure()
+DEFAULT_CONFIG = {
+    "enabled": os.environ.get("GOLEM_API_DISK_EVICTOR", "0") == "1",
+    "dry_run": False,
+    "interval": 600,            # Seconds between evictor runs
+    "budget_gib": float(os.environ.get("GOLEM_API_DISK_BUDGET_GIB", "20")),  # Image cache + rotated logs
+    "min_free_gib": 5.0,        # Also evict while the data disk has less free space than this
+    "min_age": 3600,            # Never evict files used more recently than this (seconds)
+}
+
+MAX_EVICTIONS = 100
+
+_config = dict(DEFAULT_CONFIG)
+_state = {
+    "last_run": None,
+    "last_result": None,
+    "last_error": None,
+    "evicted_bytes": 0,
+    "evicted_files": 0,
+}
+_evictions = collections.deque(maxlen=MAX_EVICTIONS)
+_lock = threading.Lock()
+_wake_event = threading.Event()
+_thread = None
+
+
+def data_dir() -> str:
+    return os.path.expanduser(DATA_DIR)
+
+
+def classify(relative_path: str) -> str:
+    """Category of a file given its path relative to DATA_DIR, or None if it isn't golem data"""
+    is_log = LOG_PATTERN.search(relative_path) is not None
+    for category, prefix in CATEGORY_PATHS:
+        if relative_path != prefix and not relative_path.startswith(prefix + "/"):
+            continue
+        if category.endswith("_logs") and not is_log:
+            continue
+        return category
+    return None
+
+
+def is_evictable(category: str, relative_path: str) -> bool:
+    """Cached images and rotated logs can be re-downloaded or are history; the current log is not"""
+    if category == "image_cache":
+        return True
+    return category in ("provider_logs", "yagna_logs") and not CURRENT_LOG_PATTERN.search(relative_path)
+
+
+def walk_files():
+    """Yield (relative path, category, stat) for every golem data file"""
+    root = data_dir()
+    stack = [os.path.join(root, prefix) for prefix in dict.fromkeys(prefix.split("/")[0] for _, prefix in CATEGORY_PATHS)]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    relative_path = os.path.relpath(entry.path, root)
+                    category = classify(relative_path)
+                    if category:
+                        yield relative_path, category, entry.stat(follow_symlinks=False)
+            except OSError:
+                continue  # Removed while walking
+
+
+def _disk_usage_bytes(st: os.stat_result) -> int:
+    """Space actually allocated (sparse VM images are much smaller than their size)"""
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+def usage() -> dict:
+    """Disk usage of golem data broken down by category"""
+    categories = {category: {"bytes": 0, "apparent_bytes": 0, "files": 0, "evictable_bytes": 0} for category in CATEGORIES}
+    for relative_path, category, st in walk_files():
+        used = _disk_usage_bytes(st)
+        totals = categories[category]
+        totals["bytes"] += used
+        totals["apparent_bytes"] += st.st_size
+        totals["files"] += 1
+        if is_evictable(category, relative_path):
+            totals["evictable_bytes"] += used
+
+    disk = shutil.disk_usage(data_dir()) if os.path.isdir(data_dir()) else None
+    return {
+        "data_dir": data_dir(),
+        "categories": categories,
+        "total_bytes": sum(totals["bytes"] for totals in categories.values()),
+        "evictable_bytes": sum(totals["evictable_bytes"] for totals in categories.values()),
+        "budget_bytes": int(_config["budget_gib"] * GIB),
+        "disk": {"total": disk.total, "free": disk.free} if disk else None,
+        "timestamp": time.time(),
+    }
+
+
+def in_use_paths() -> set:
+    """
+    Paths under DATA_DIR that running processes have open or were started with
+    (e.g. the image a vmrt is running). Only processes this user can inspect are seen,
+    which covers the provider's own exe-units.
+    """
+    root = data_dir()
+    real_root = os.path.realpath(root)
+    paths = set()
+    try:
+        pids = [name for name in os.listdir(PROC_PATH) if name.isdigit()]
+    except OSError:
+        return paths
+    for pid in pids:
+        fd_dir = os.path.join(PROC_PATH, pid, "fd")
+        try:
+            for fd in os.listdir(fd_dir):
+                target = os.readlink(os.path.join(fd_dir, fd))
+                if target.startswith(real_root):
+                    paths.add(target)
+        except OSError:
+            pass
+        try:
+            with open(os.path.join(PROC_PATH, pid, "cmdline"), "rb") as f:
+                for arg in f.read().split(b"\0"):
+                    arg = arg.decode("utf-8", errors="replace")
+                    if root in arg:
+                        paths.add(os.path.realpath(arg[arg.index(root):]))
+        except OSError:
+            pass
+    return paths
+
+
+def plan(now: float = None) -> dict:
+    """Choose least recently used evictable files until the budget and free space targets are met"""
+    now = now or time.time()
+    root = data_dir()
+    budget = int(_config["budget_gib"] * GIB)
+    min_free = int(_config["min_free_gib"] * GIB)
+    min_age = _config["min_age"]
+
+    candidates = []
+    evictable_total = 0
+    for relative_path, category, st in walk_files():
+        if is_evictable(category, relative_path):
+            used = _disk_usage_bytes(st)
+            evictable_total += used
+            # Last use is the later of access and modification (atime may be relatime or noatime)
+            candidates.append((max(st.st_atime, st.st_mtime), relative_path, category, used))
+    candidates.sort()
+
+    free = shutil.disk_usage(root).free if os.path.isdir(root) else None
+    need = max(evictable_total - budget, 0)
+    if free is not None:
+        need = max(need, min_free - free)
+
+    in_use = in_use_paths() if need else set()
+    selected = []
+    skipped = {"in_use": 0, "too_recent": 0}
+    freed = 0
+    for last_used, relative_path, category, used in candidates:
+        if freed >= need:
+            break
+        if now - last_used < min_age:
+            skipped["too_recent"] += 1
+            continue
+        if os.path.realpath(os.path.join(root, relative_path)) in in_use:
+            skipped["in_use"] += 1
+            continue
+        selected.append({"path": relative_path, "category": category, "bytes": used, "last_used": last_used})
+        freed += used
+
+    return {
+        "evictable_bytes": evictable_total,
+        "budget_bytes": budget,
+        "free_bytes": free,
+        "min_free_bytes": min_free,
+        "needed_bytes": need,
+        "selected": selected,
+        "selected_bytes": freed,
+        "skipped": skipped,
+    }
+
+
+def evict(dry_run: bool = None) -> dict:
+    """Run one eviction pass; with dry_run only the plan is returned"""
+    dry_run = _config["dry_run"] if dry_run is None else dry_run
+    with _lock:
+        result = plan()
+        result["dry_run"] = dry_run
+        result["evicted"] = []
+        if not dry_run:
+            root = data_dir()
+            for candidate in result["selected"]:
+                try:
+                    os.unlink(os.path.join(root, candidate["path"]))
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    print(f"[DISK-BUDGET] Could not delete {candidate['path']}: {str(e)}")
+                    continue
+                result["evicted"].append(candidate["path"])
+                _state["evicted_bytes"] += candidate["bytes"]
+                _state["evicted_files"] += 1
+                _evictions.append({**candidate, "evicted_at": time.time()})
+            if result["evicted"]:
+                print(f"[DISK-BUDGET] Evicted {len(result['evicted'])} files ({result['selected_bytes']} bytes)")
+        _state["last_run"] = time.time()
+        _state["last_result"] = {key: value for key, value in result.items() if key != "selected"}
+        return result
+
+
+def _evictor_loop():
+    while _config["enabled"]:
+        try:
+            evict()
+            _state["last_error"] = None
+        except OSError as e:
+            _state["last_error"] = str(e)
+            print(f"[DISK-BUDGET] Eviction failed: {str(e)}")
+        _wake_event.wait(_config["interval"])
+        _wake_event.clear()
+
+
+def start():
+    """Start the background evictor if enabled"""
+    global _thread
+    if not _config["enabled"] or (_thread is not None and _thread.is_alive()):
+        return
+    _thread = threading.Thread(target=_evictor_loop, name="disk-evictor", daemon=True)
+    _thread.start()
+    print(f"[DISK-BUDGET] Evictor started (budget {_config['budget_gib']} GiB, dry_run={_config['dry_run']})")
+
+
+def stop():
+    _config["enabled"] = False
+    _wake_event.set()
+
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+
+def is_enabled() -> bool:
+    return _config["enabled"]
+
+
+def configure(**changes) -> dict:
+    """Update evictor settings and start or stop it accordingly"""
+    unknown = [key for key in changes if key not in DEFAULT_CONFIG]
+    if unknown:
+        raise KeyError(f"Unknown disk budget settings: {', '.join(unknown)}")
+    with _lock:
+        _config.update(changes)
+    if _config["enabled"]:
+        start()
+        _wake_event.set()
+    else:
+        stop()
+    return dict(_config)
+
+
+def status() -> dict:
+    return {
+        "running": is_running(),
+        "config": dict(_config),
+        "last_run": _state["last_run"],
+        "last_result": _state["last_result"],
+        "last_error": _state["last_error"],
+        "evicted_bytes": _state["evicted_bytes"],
+        "evicted_files": _state["evicted_files"],
+        "recent_evictions": list(_evictions),
+    }
@@ -0,0 +1,175 @@
+import asyncio
+import contextvars
+import functools
+import os
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import tracing
+
+# Seconds a command may run before its whole process group is killed
+COMMAND_TIMEOUT = float(os.environ.get("GOLEM_API_COMMAND_TIMEOUT", "30"))    # Status reads, settings, logs
+CONTROL_TIMEOUT = float(os.environ.get("GOLEM_API_CONTROL_TIMEOUT", "120"))   # golemsp stop, settings set
+SCRIPT_TIMEOUT = float(os.environ.get("GOLEM_API_SCRIPT_TIMEOUT", "1800"))    # Installers and downloaded scripts
+KILL_GRACE = 5      # Seconds to collect output after a timed out process group is killed
+REAP_INTERVAL = 5   # Seconds between reaper passes over background processes
+
+# Long operations (bootstrap, scripts, start/stop) run in their own pool so
+# they can't use up the threads that serve quick status reads
+SLOW_WORKERS = int(os.environ.get("GOLEM_API_SLOW_WORKERS", "4"))
+FAST_WORKERS = int(os.environ.get("GOLEM_API_FAST_WORKERS", "16"))
+slow_pool = ThreadPoolExecutor(max_workers=SLOW_WORKERS, thread_name_prefix="slow")
+fast_pool = ThreadPoolExecutor(max_workers=FAST_WORKERS, thread_name_prefix="fast")
+
+_background = {}  # pid -> (Popen, deadline or None, on_exit or None)
+_background_lock = threading.Lock()
+_reaper_thread = None
+_reaper_stop = threading.Event()
+_counters = {"commands": 0, "timeouts": 0, "spawned": 0, "reaped": 0, "killed": 0}
+_counters_lock = threading.Lock()
+
+
+class CommandTimeout(subprocess.CalledProcessError):
+    """A command ran past its timeout and its process group was killed"""
+
+    def __init__(self, cmd, timeout: float, output=None, stderr=None):
+        super().__init__(-signal.SIGKILL, cmd, output, stderr)
+        self.timeout = timeout
+
+    def __str__(self):
+        return f"Command '{self.cmd}' timed out after {self.timeout:g} seconds and was killed"
+
+
+def _count(name: str):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def kill_process_group(process: subprocess.Popen):
+    """Kill a process started in its own session along with everything it spawned"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_command(cmd: list, timeout: float = COMMAND_TIMEOUT, check: bool = True,
+                input: str = None) -> subprocess.CompletedProcess:
+    """
+    subprocess.run replacement: text output is captured, the command runs in its
+    own process group and the whole group is killed when the timeout expires.
+    Raises CommandTimeout (a CalledProcessError) on timeout.
+    """
+    _count("commands")
+    with tracing.span("subprocess", " ".join(cmd[:2])):
+        return _run_command(cmd, timeout, check, input)
+
+
+def _run_command(cmd: list, timeout: float, check: bool, input: str) -> subprocess.CompletedProcess:
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, start_new_session=True)
+    try:
+        stdout, stderr = process.communicate(input, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_group(process)
+        _count("timeouts")
+        try:
+            stdout, stderr = process.communicate(timeout=KILL_GRACE)
+        except subprocess.TimeoutExpired:
+            # Something outside the group still holds the pipes open
+            process.kill()
+            stdout, stderr = None, None
+        print(f"[EXECUTOR] Killed {cmd} after {timeout:g}s timeout")
+        raise CommandTimeout(cmd, timeout, stdout, stderr)
+    except BaseException:
+        kill_process_group(process)
+        process.wait()
+        raise
+
+    if check and process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def spawn(cmd: list, timeout: float = None, on_exit=None, **popen_kwargs) -> subprocess.Popen:
+    """
+    Start a background process in its own process group. The reaper collects it
+    when it exits (calling on_exit(process)) and kills its group once the timeout passes.
+    """
+    process = subprocess.Popen(cmd, start_new_session=True, **popen_kwargs)
+    deadline = time.monotonic() + timeout if timeout else None
+    with _background_lock:
+        _background[process.pid] = (process, deadline, on_exit)
+    _count("spawned")
+    _start_reaper()
+    return process
+
+
+def reap():
+    """Collect exited background processes and kill the ones past their deadline"""
+    now = time.monotonic()
+    with _background_lock:
+        tracked = list(_background.items())
+    for pid, (process, deadline, on_exit) in tracked:
+        if process.poll() is None:
+            if deadline is None or now < deadline:
+                continue
+            print(f"[EXECUTOR] Killing background process {pid} ({process.args}) past its timeout")
+            kill_process_group(process)
+            _count("killed")
+            process.wait()
+        with _background_lock:
+            _background.pop(pid, None)
+        _count("reaped")
+        if on_exit is not None:
+            try:
+                on_exit(process)
+            except Exception as e:
+                print(f"[EXECUTOR] Exit handler for {pid} failed: {str(e)}")
+
+
+def _reaper_loop():
+    while not _reaper_stop.wait(REAP_INTERVAL):
+        reap()
+
+
+def _start_reaper():
+    global _reaper_thread
+    if _reaper_thread is not None and _reaper_thread.is_alive():
+        return
+    _reaper_stop.clear()
+    _reaper_thread = threading.Thread(target=_reaper_loop, name="process-reaper", daemon=True)
+    _reaper_thread.start()
+
+
+def in_slow_pool(fn):
+    """Endpoint decorator: run a blocking endpoint in the slow pool instead of the shared threadpool"""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Carry the request's context (its trace) over to the pool thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(slow_pool, functools.partial(context.run, fn, *args, **kwargs))
+    return wrapper
+
+
+def submit_fast(fn, *args):
+    """fast_pool.submit that carries the caller's context (its request trace) over to the worker"""
+    return fast_pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def stats() -> dict:
+    with _background_lock:
+        background = [{"pid": pid, "args": process.args} for pid, (process, _, _) in _background.items()]
+    with _counters_lock:
+        counters = dict(_counters)
+    return {
+        **counters,
+        "background": background,
+        "slow_workers": SLOW_WORKERS,
+        "fast_workers": FAST_WORKERS,
+        "timeouts_config": {"command": COMMAND_TIMEOUT, "control": CONTROL_TIMEOUT, "script": SCRIPT_TIMEOUT},
+    }
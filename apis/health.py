@@ -0,0 +1,88 @@
+import os
+import time
+from . import disk_budget
+from . import host_probe
+from . import host_sampler
+from . import resource_controller
+from . import script_jobs
+from . import state_watcher
+from . import status_feed
+
+# Readiness fails when the last golemsp status read is older than this
+# (default: three idle polling intervals)
+STATUS_MAX_AGE = float(os.environ["GOLEM_API_READY_STATUS_MAX_AGE"]) if "GOLEM_API_READY_STATUS_MAX_AGE" in os.environ else None
+
+STARTED_AT = time.time()
+
+
+def liveness() -> dict:
+    """The API process is up and its event loop is answering"""
+    return {"status": "ok", "uptime": time.time() - STARTED_AT}
+
+
+def readiness() -> tuple:
+    """
+    Check the in-memory state the API serves from: host probe, status snapshot
+    age and background thread liveness. Nothing here forks or touches the disk.
+    Returns (ready, checks); every check has an "ok" flag, and informational
+    checks (provider running, host requirements) don't affect readiness.
+    """
+    now = time.time()
+    checks = {}
+
+    probe = host_probe.cached_probe()
+    checks["host_probe"] = {
+        "ok": probe is not None,
+        "probed_at": probe["probed_at"] if probe else None,
+    }
+
+    feed = status_feed.current()
+    snapshot = feed["status"] or {}
+    age = now - feed["updated_at"] if feed["updated_at"] else None
+    max_age = STATUS_MAX_AGE or status_feed.idle_interval() * 3
+    checks["status_snapshot"] = {
+        "ok": age is not None and age <= max_age,
+        "age": age,
+        "max_age": max_age,
+        "version": feed["version"],
+        "error": snapshot.get("error"),  # golemsp status failed on the last read
+    }
+
+    checks["status_feed"] = {"ok": status_feed.is_running()}
+    # The sampler only runs where /proc is available
+    checks["host_sampler"] = {
+        "ok": host_sampler.is_running() or not host_sampler.SUPPORTED,
+        "running": host_sampler.is_running(),
+    }
+    checks["resource_controller"] = {
+        "ok": resource_controller.is_running() or not resource_controller.is_enabled(),
+        "enabled": resource_controller.is_enabled(),
+        "running": resource_controller.is_running(),
+    }
+    checks["disk_evictor"] = {
+        "ok": disk_budget.is_running() or not disk_budget.is_enabled(),
+        "enabled": disk_budget.is_enabled(),
+        "running": disk_budget.is_running(),
+    }
+    checks["state_watcher"] = {
+        "ok": state_watcher.is_running() or not state_watcher.is_enabled(),
+        "enabled": state_watcher.is_enabled(),
+        "running": state_watcher.is_running(),
+    }
+    started, alive = script_jobs.workers_alive()
+    checks["script_workers"] = {"ok": alive == started, "started": started, "alive": alive}
+
+    ready = all(check["ok"] for check in checks.values())
+
+    checks["provider"] = {
+        "ok": snapshot.get("service_status") == "is running",
+        "service_status": snapshot.get("service_status"),
+        "informational": True,
+    }
+    requirements = probe["requirements"] if probe else {}
+    checks["requirements"] = {
+        "ok": bool(requirements.get("meets_requirements")),
+        "golem_installed": probe["golem"]["installed"] if probe else None,
+        "informational": True,
+    }
+    return ready, checks
@@ -0,0 +1,294 @@
+import csv
+import io
+import os
+import threading
+import time
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+ENABLED = os.environ.get("GOLEM_API_HISTORY", "1") == "1"
+HISTORY_DIR = "~/.local/share/golem-api/history"   # One CSV file per UTC day, e.g. 2024-01-15.csv
+RECORD_INTERVAL = float(os.environ.get("GOLEM_API_HISTORY_INTERVAL", "60"))  # Unchanged readings are kept this often
+RETENTION_DAYS = int(os.environ.get("GOLEM_API_HISTORY_RETENTION_DAYS", "400"))
+CHUNK_ROWS = 10000              # Rows per CSV chunk, Arrow record batch and Parquet row group
+FORMATS = {                     # format -> (media type, file extension)
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),   # Needs the pyarrow package
+    "parquet": ("application/vnd.apache.parquet", "parquet"),     # Needs the pyarrow package
+}
+
+# Column -> type; status fields from golemsp status, earnings flattened into the row
+COLUMNS = {
+    "timestamp": "float",
+    "running": "bool",
+    "service_status": "str",
+    "version": "str",
+    "node_name": "str",
+    "subnet": "str",
+    "vm_status": "str",
+    "network": "str",
+    "amount_total": "float",     # GLM
+    "amount_onchain": "float",
+    "amount_polygon": "float",
+    "pending": "float",
+    "pending_count": "int",
+    "issued": "float",
+    "issued_count": "int",
+    "error": "str",              # Set when golemsp status could not be read
+}
+EARNINGS_COLUMNS = ("network", "amount_total", "amount_onchain", "amount_polygon",
+                    "pending", "pending_count", "issued", "issued_count")
+
+_lock = threading.Lock()
+_state = {"last_row": None, "last_recorded": 0.0, "day": None, "recorded": 0, "last_error": None}
+
+
+def available_formats() -> list:
+    return [name for name in FORMATS if name == "csv" or pyarrow is not None]
+
+
+def history_dir() -> str:
+    return os.path.expanduser(HISTORY_DIR)
+
+
+def _day(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def to_row(snapshot: dict, timestamp: float) -> dict:
+    """Flatten a parsed golemsp status (or {"error": ...}) into a history row"""
+    earnings = snapshot.get("earnings") or {}
+    row = {name: snapshot.get(name) for name in COLUMNS}
+    row.update({name: earnings.get(name) for name in EARNINGS_COLUMNS})
+    row["timestamp"] = timestamp
+    row["running"] = snapshot.get("service_status") == "is running" if "error" not in snapshot else None
+    return row
+
+
+def _prune(today: str):
+    """Drop day files older than RETENTION_DAYS (lock held)"""
+    oldest = _day(time.time() - RETENTION_DAYS * 86400)
+    for name in os.listdir(history_dir()):
+        if name.endswith(".csv") and name[:-4] < oldest and name[:-4] != today:
+            os.unlink(os.path.join(history_dir(), name))
+
+
+def record(snapshot: dict, timestamp: float):
+    """
+    Status feed listener: append a reading to today's file when it differs from
+    the last one recorded, or RECORD_INTERVAL after it otherwise.
+    """
+    if not ENABLED:
+        return
+    row = to_row(snapshot, timestamp)
+    values = [row[name] for name in COLUMNS if name != "timestamp"]
+    with _lock:
+        if values == _state["last_row"] and timestamp - _state["last_recorded"] < RECORD_INTERVAL:
+            return
+        day = _day(timestamp)
+        path = os.path.join(history_dir(), f"{day}.csv")
+        try:
+            os.makedirs(history_dir(), exist_ok=True)
+            new_file = not os.path.exists(path)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if new_file:
+                writer.writerow(COLUMNS)
+            writer.writerow(["" if row[name] is None else row[name] for name in COLUMNS])
+            # One write per reading, so readers never see half a row
+            with open(path, "a", newline="") as f:
+                f.write(buffer.getvalue())
+            if day != _state["day"]:
+                _state["day"] = day
+                _prune(day)
+        except OSError as e:
+            _state["last_error"] = str(e)
+            print(f"[HISTORY] Could not record status: {str(e)}")
+            return
+        _state["last_row"] = values
+        _state["last_recorded"] = timestamp
+        _state["recorded"] += 1
+        _state["last_error"] = None
+
+
+def list_files() -> list:
+    """(day, path) of the stored day files, oldest first"""
+    try:
+        names = sorted(name for name in os.listdir(history_dir()) if name.endswith(".csv"))
+    except OSError:
+        return []
+    return [(name[:-4], os.path.join(history_dir(), name)) for name in names]
+
+
+def _convert(value: str, column_type: str):
+    if value is None or value == "":
+        return None
+    if column_type == "float":
+        return float(value)
+    if column_type == "int":
+        return int(value)
+    if column_type == "bool":
+        return value == "True"
+    return value
+
+
+def iter_rows(start: float = None, end: float = None):
+    """Typed rows recorded between start and end (Unix timestamps, inclusive), oldest first"""
+    first_day = _day(start) if start is not None else None
+    last_day = _day(end) if end is not None else None
+    for day, path in list_files():
+        if (first_day and day < first_day) or (last_day and day > last_day):
+            continue
+        try:
+            f = open(path, newline="")
+        except OSError:
+            continue    # Pruned since it was listed
+        with f:
+            for raw in csv.DictReader(f):
+                if raw.get("timestamp") in (None, "") or None in raw.values():
+                    continue    # Row still being written
+                timestamp = float(raw["timestamp"])
+                if (start is not None and timestamp < start) or (end is not None and timestamp > end):
+                    continue
+                # Columns missing from older files come out as None
+                yield {name: _convert(raw.get(name), column_type) for name, column_type in COLUMNS.items()}
+
+
+def select_columns(columns: str = None) -> list:
+    """Comma separated column names to export, all by default; raises ValueError for unknown ones"""
+    if not columns:
+        return list(COLUMNS)
+    selected = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return selected
+
+
+def iter_chunks(columns: list, start: float = None, end: float = None):
+    """Column name -> list of values, CHUNK_ROWS rows at a time"""
+    chunk = {name: [] for name in columns}
+    rows = 0
+    for row in iter_rows(start, end):
+        for name in columns:
+            chunk[name].append(row[name])
+        rows += 1
+        if rows == CHUNK_ROWS:
+            yield chunk
+            chunk = {name: [] for name in columns}
+            rows = 0
+    if rows:
+        yield chunk
+
+
+class _Sink:
+    """Write-only file object whose contents are handed to the response after every batch"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.position += len(data)
+        return self.buffer.write(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def _arrow_schema(columns: list):
+    types = {"float": pyarrow.float64(), "int": pyarrow.int64(), "bool": pyarrow.bool_(), "str": pyarrow.string()}
+    return pyarrow.schema([(name, types[COLUMNS[name]]) for name in columns])
+
+
+def _export_csv(columns: list, start: float, end: float):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    for chunk in iter_chunks(columns, start, end):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(zip(*(["" if value is None else value for value in chunk[name]] for name in columns)))
+        yield buffer.getvalue().encode()
+
+
+def _export_arrow(columns: list, start: float, end: float, file_format: str):
+    schema = _arrow_schema(columns)
+    sink = _Sink()
+    if file_format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+        write = writer.write_table
+        to_table = pyarrow.Table.from_pydict
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+        to_table = pyarrow.RecordBatch.from_pydict
+    for chunk in iter_chunks(columns, start, end):
+        write(to_table(chunk, schema=schema))
+        data = sink.take()
+        if data:
+            yield data
+    writer.close()
+    yield sink.take()
+
+
+def export(file_format: str, columns: list, start: float = None, end: float = None):
+    """
+    Generator of the history between start and end in csv, Arrow IPC stream or
+    Parquet format. Day files are read a chunk at a time, so memory use doesn't
+    depend on the length of the range.
+    """
+    if file_format not in available_formats():
+        raise ValueError(f"Unsupported format: {file_format} (available: {', '.join(available_formats())})")
+    if file_format == "csv":
+        return _export_csv(columns, start, end)
+    return _export_arrow(columns, start, end, file_format)
+
+
+def media_type(file_format: str) -> str:
+    return FORMATS[file_format][0]
+
+
+def file_extension(file_format: str) -> str:
+    return FORMATS[file_format][1]
+
+
+def status() -> dict:
+    files = []
+    for day, path in list_files():
+        try:
+            files.append({"day": day, "size": os.path.getsize(path)})
+        except OSError:
+            continue
+    with _lock:
+        return {
+            "enabled": ENABLED,
+            "path": history_dir(),
+            "record_interval": RECORD_INTERVAL,
+            "retention_days": RETENTION_DAYS,
+            "recorded": _state["recorded"],
+            "last_recorded": _state["last_recorded"] or None,
+            "last_error": _state["last_error"],
+            "files": files,
+            "columns": dict(COLUMNS),
+            "formats": available_formats(),
+        }
@@ -0,0 +1,220 @@
+import json
+import os
+import platform
+import shutil
+import stat
+import threading
+import time
+from . import tracing
+
+CPUINFO_PATH = "/proc/cpuinfo"
+MEMINFO_PATH = "/proc/meminfo"
+KVM_DEVICE = "/dev/kvm"
+NESTED_VIRTUALIZATION_PATHS = {
+    "intel": "/sys/module/kvm_intel/parameters/nested",
+    "amd": "/sys/module/kvm_amd/parameters/nested",
+}
+GOLEMSP_FALLBACK_PATH = "~/.local/bin/golemsp"
+DATA_PATH = "~/.local/share"
+BENCHMARK_PATH = "~/.local/share/golem-api/benchmark.json"  # Last benchmark result, kept across restarts
+
+_probe = None
+_probe_lock = threading.Lock()
+
+
+def read_cpu_virtualization(cpuinfo_path: str = CPUINFO_PATH) -> dict:
+    """Count logical CPUs exposing vmx/svm flags, without forking egrep"""
+    cpu = {
+        "logical_cpus": 0,
+        "virtualization_count": 0,
+        "virtualization_type": None,
+        "hypervisor": False,
+        "model_name": None,
+    }
+    with open(cpuinfo_path) as cpuinfo:
+        for line in cpuinfo:
+            key, _, value = line.partition(":")
+            key = key.strip()
+            if key == "processor":
+                cpu["logical_cpus"] += 1
+            elif key == "model name" and cpu["model_name"] is None:
+                cpu["model_name"] = value.strip()
+            elif key == "flags":
+                flags = value.split()
+                if "vmx" in flags:
+                    cpu["virtualization_count"] += 1
+                    cpu["virtualization_type"] = "vmx"
+                elif "svm" in flags:
+                    cpu["virtualization_count"] += 1
+                    cpu["virtualization_type"] = "svm"
+                if "hypervisor" in flags:
+                    cpu["hypervisor"] = True
+    return cpu
+
+
+def read_meminfo(meminfo_path: str = MEMINFO_PATH) -> dict:
+    """Read /proc/meminfo into a dict of byte values"""
+    meminfo = {}
+    with open(meminfo_path) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            parts = value.split()
+            if not parts:
+                continue
+            amount = int(parts[0])
+            if len(parts) > 1 and parts[1] == "kB":
+                amount *= 1024
+            meminfo[key] = amount
+    return meminfo
+
+
+def format_device_listing(path: str, st: os.stat_result) -> str:
+    """Format a device node like `ls -l` does"""
+    import grp
+    import pwd
+    try:
+        owner = pwd.getpwuid(st.st_uid).pw_name
+    except KeyError:
+        owner = str(st.st_uid)
+    try:
+        group = grp.getgrgid(st.st_gid).gr_name
+    except KeyError:
+        group = str(st.st_gid)
+    if stat.S_ISCHR(st.st_mode) or stat.S_ISBLK(st.st_mode):
+        size = f"{os.major(st.st_rdev)}, {os.minor(st.st_rdev)}"
+    else:
+        size = str(st.st_size)
+    modified = time.strftime("%b %e %H:%M", time.localtime(st.st_mtime))
+    return f"{stat.filemode(st.st_mode)} {st.st_nlink} {owner} {group} {size} {modified} {path}"
+
+
+def read_kvm_device(device: str = KVM_DEVICE) -> dict:
+    """Check /dev/kvm presence and whether this process can use it"""
+    try:
+        st = os.stat(device)
+    except OSError:
+        return {"available": False, "device": None, "readable": False, "writable": False}
+    return {
+        "available": True,
+        "device": format_device_listing(device, st),
+        "readable": os.access(device, os.R_OK),
+        "writable": os.access(device, os.W_OK),
+    }
+
+
+def read_nested_virtualization() -> dict:
+    """Read the kvm_intel/kvm_amd nested parameter if the module is loaded"""
+    for vendor, path in NESTED_VIRTUALIZATION_PATHS.items():
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        return {"module": f"kvm_{vendor}", "enabled": value in ("Y", "1")}
+    return {"module": None, "enabled": False}
+
+
+def find_golemsp() -> str:
+    """Locate golemsp on PATH or in the default install location"""
+    golem_path = shutil.which("golemsp")
+    if golem_path:
+        return golem_path
+    fallback = os.path.expanduser(GOLEMSP_FALLBACK_PATH)
+    if os.access(fallback, os.X_OK):
+        return fallback
+    return None
+
+
+def read_disk(path: str = DATA_PATH) -> dict:
+    """Disk space on the filesystem holding the Golem data directories"""
+    path = os.path.expanduser(path)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    usage = shutil.disk_usage(path)
+    return {"path": path, "total": usage.total, "used": usage.used, "free": usage.free}
+
+
+def probe_host() -> dict:
+    """Collect host capabilities directly from /proc, /sys and /dev"""
+    probe = {
+        "platform": platform.system(),
+        "cpu": None,
+        "memory": None,
+        "disk": None,
+        "kvm": read_kvm_device(),
+        "nested_virtualization": None,
+        "golem": None,
+        "errors": {},
+    }
+
+    if probe["platform"] == "Linux":
+        try:
+            probe["cpu"] = read_cpu_virtualization()
+        except OSError as e:
+            probe["errors"]["cpu"] = str(e)
+        try:
+            meminfo = read_meminfo()
+            probe["memory"] = {
+                "total": meminfo.get("MemTotal"),
+                "available": meminfo.get("MemAvailable"),
+            }
+        except (OSError, ValueError) as e:
+            probe["errors"]["memory"] = str(e)
+        probe["nested_virtualization"] = read_nested_virtualization()
+
+    try:
+        probe["disk"] = read_disk()
+    except OSError as e:
+        probe["errors"]["disk"] = str(e)
+
+    golem_path = find_golemsp()
+    probe["golem"] = {"installed": golem_path is not None, "path": golem_path}
+
+    virtualization_count = probe["cpu"]["virtualization_count"] if probe["cpu"] else 0
+    probe["requirements"] = {
+        "platform": probe["platform"],
+        "virtualization_support": virtualization_count > 0,
+        "virtualization_count": virtualization_count,
+        "meets_requirements": probe["platform"] == "Linux" and virtualization_count > 0
+    }
+    probe["benchmark"] = load_benchmark()
+    probe["probed_at"] = time.time()
+    return probe
+
+
+def load_benchmark() -> dict:
+    try:
+        with open(os.path.expanduser(BENCHMARK_PATH)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_benchmark(result: dict):
+    """Keep a benchmark result with the probe data and on disk"""
+    path = os.path.expanduser(BENCHMARK_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(result, f, indent=2)
+    os.replace(temp_path, path)
+    with _probe_lock:
+        if _probe is not None:
+            _probe["benchmark"] = result
+
+
+def cached_probe() -> dict:
+    """The last host probe, or None if the host hasn't been probed yet (never probes)"""
+    return _probe
+
+
+@tracing.timed("cache", "host probe")
+def get_host_probe(refresh: bool = False) -> dict:
+    """Return the cached host probe, probing the host on first use or when refresh is set"""
+    global _probe
+    if _probe is not None and not refresh:
+        return _probe
+    with _probe_lock:
+        if _probe is None or refresh:
+            _probe = probe_host()
+        return _probe
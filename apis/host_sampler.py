@@ -0,0 +1,262 @@
+import collections
+import math
+import os
+import threading
+import time
+
+PROC_STAT_PATH = "/proc/stat"
+PROC_MEMINFO_PATH = "/proc/meminfo"
+PROC_DISKSTATS_PATH = "/proc/diskstats"
+DATA_PATH = "~/.local/share"
+
+# Checked once at import; /proc doesn't come and go while the API runs
+SUPPORTED = os.path.exists(PROC_STAT_PATH)
+
+SAMPLE_INTERVAL = float(os.environ.get("GOLEM_API_SAMPLE_INTERVAL", "5"))  # seconds
+HISTORY_SIZE = int(os.environ.get("GOLEM_API_SAMPLE_HISTORY", "720"))     # 1 hour at 5s
+PERCENTILES = (50, 90, 99)
+SECTOR_SIZE = 512
+
+# Processes whose CPU and memory count as provider usage rather than host load
+# (/proc/<pid>/comm is truncated to 15 characters)
+PROVIDER_PROCESS_NAMES = ("golemsp", "yagna", "ya-provider", "exe-unit", "vmrt",
+                          "ya-runtime-vm", "ya-runtime-wasi", "qemu-system-x86")
+
+_history = collections.deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+_stop_event = threading.Event()
+_thread = None
+
+
+def read_cpu_times() -> tuple:
+    """Return (busy, iowait, total) jiffies summed over all CPUs from /proc/stat"""
+    with open(PROC_STAT_PATH) as f:
+        fields = f.readline().split()
+    # user nice system idle iowait irq softirq steal (guest time is already in user)
+    values = [int(v) for v in fields[1:9]]
+    total = sum(values)
+    idle, iowait = values[3], values[4]
+    return total - idle - iowait, iowait, total
+
+
+def read_memory() -> dict:
+    """Read total/available memory in bytes from /proc/meminfo"""
+    memory = {}
+    with open(PROC_MEMINFO_PATH) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("MemTotal", "MemAvailable"):
+                memory[key] = int(value.split()[0]) * 1024
+    return memory
+
+
+def read_disk_counters() -> dict:
+    """Read (sectors read, sectors written, ms doing I/O) per physical disk from /proc/diskstats"""
+    disks = {}
+    with open(PROC_DISKSTATS_PATH) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 13:
+                continue
+            name = fields[2]
+            # Only whole physical disks - partitions, loop and device-mapper devices are skipped
+            if not os.path.exists(f"/sys/block/{name}/device"):
+                continue
+            disks[name] = (int(fields[5]), int(fields[9]), int(fields[12]))
+    return disks
+
+
+def read_provider_processes() -> dict:
+    """Map pid -> (cpu ticks, resident bytes) for Golem provider processes"""
+    processes = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                stat = f.read()
+            comm = stat[stat.index("(") + 1:stat.rindex(")")]
+            if comm not in PROVIDER_PROCESS_NAMES:
+                continue
+            fields = stat[stat.rindex(")") + 2:].split()
+            # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+            ticks = int(fields[11]) + int(fields[12])
+            with open(f"/proc/{pid}/statm") as f:
+                resident = int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+        processes[int(pid)] = (ticks, resident)
+    return processes
+
+
+def data_path() -> str:
+    """Nearest existing directory of DATA_PATH, for statvfs"""
+    path = os.path.expanduser(DATA_PATH)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    return path
+
+
+def read_counters() -> dict:
+    """Take one raw reading of all counters"""
+    busy, iowait, total = read_cpu_times()
+    statvfs = os.statvfs(data_path())
+    return {
+        "time": time.monotonic(),
+        "cpu": (busy, iowait, total),
+        "memory": read_memory(),
+        "disks": read_disk_counters(),
+        "provider": read_provider_processes(),
+        "statvfs": statvfs,
+    }
+
+
+def compute_sample(previous: dict, current: dict) -> dict:
+    """Turn two counter readings into utilization figures using deltas"""
+    elapsed = max(current["time"] - previous["time"], 1e-6)
+    busy = current["cpu"][0] - previous["cpu"][0]
+    iowait = current["cpu"][1] - previous["cpu"][1]
+    total = max(current["cpu"][2] - previous["cpu"][2], 1)
+
+    # Ticks used by provider processes since the previous reading; a process that
+    # appeared in between counts from zero
+    provider_ticks = 0
+    for pid, (ticks, _) in current["provider"].items():
+        previous_ticks = previous["provider"].get(pid, (0, 0))[0]
+        provider_ticks += max(ticks - previous_ticks, 0)
+    provider_resident = sum(resident for _, resident in current["provider"].values())
+
+    cpu_percent = 100.0 * busy / total
+    provider_cpu_percent = min(100.0 * provider_ticks / total, cpu_percent)
+
+    memory_total = current["memory"].get("MemTotal", 0)
+    memory_used = memory_total - current["memory"].get("MemAvailable", 0)
+    host_memory_used = max(memory_used - provider_resident, 0)
+
+    read_bytes = write_bytes = 0
+    io_busy_percent = 0.0
+    for name, (sectors_read, sectors_written, io_ms) in current["disks"].items():
+        if name not in previous["disks"]:
+            continue
+        prev_read, prev_written, prev_io_ms = previous["disks"][name]
+        read_bytes += (sectors_read - prev_read) * SECTOR_SIZE
+        write_bytes += (sectors_written - prev_written) * SECTOR_SIZE
+        io_busy_percent = max(io_busy_percent, min(100.0 * (io_ms - prev_io_ms) / (elapsed * 1000), 100.0))
+
+    statvfs = current["statvfs"]
+    disk_total = statvfs.f_blocks * statvfs.f_frsize
+    disk_free = statvfs.f_bavail * statvfs.f_frsize
+
+    return {
+        "timestamp": time.time(),
+        "interval": elapsed,
+        "cpu_percent": cpu_percent,
+        "iowait_percent": 100.0 * iowait / total,
+        "provider_cpu_percent": provider_cpu_percent,
+        "host_cpu_percent": cpu_percent - provider_cpu_percent,
+        "memory_total": memory_total,
+        "memory_used": memory_used,
+        "memory_percent": 100.0 * memory_used / memory_total if memory_total else 0.0,
+        "provider_memory_used": provider_resident,
+        "host_memory_used": host_memory_used,
+        "host_memory_percent": 100.0 * host_memory_used / memory_total if memory_total else 0.0,
+        "disk_read_bytes_per_sec": read_bytes / elapsed,
+        "disk_write_bytes_per_sec": write_bytes / elapsed,
+        "disk_io_busy_percent": io_busy_percent,
+        "disk_total": disk_total,
+        "disk_free": disk_free,
+        "disk_used_percent": 100.0 * (disk_total - disk_free) / disk_total if disk_total else 0.0,
+    }
+
+
+def _sampler_loop():
+    previous = None
+    while previous is None:
+        try:
+            previous = read_counters()
+        except (OSError, ValueError) as e:
+            print(f"[HOST-SAMPLER] Could not read host counters: {str(e)}")
+            if _stop_event.wait(SAMPLE_INTERVAL):
+                return
+    while not _stop_event.wait(SAMPLE_INTERVAL):
+        try:
+            current = read_counters()
+            sample = compute_sample(previous, current)
+            previous = current
+        except (OSError, ValueError) as e:
+            print(f"[HOST-SAMPLER] Could not sample host: {str(e)}")
+            continue
+        with _history_lock:
+            _history.append(sample)
+
+
+def start():
+    """Start the background sampler thread (Linux only)"""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    if not SUPPORTED:
+        print("[HOST-SAMPLER] /proc/stat not available, host sampling disabled")
+        return
+    _stop_event.clear()
+    _thread = threading.Thread(target=_sampler_loop, name="host-sampler", daemon=True)
+    _thread.start()
+    print(f"[HOST-SAMPLER] Sampling host every {SAMPLE_INTERVAL}s (history: {HISTORY_SIZE} samples)")
+
+
+def stop():
+    _stop_event.set()
+
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+
+def latest() -> dict:
+    with _history_lock:
+        return _history[-1] if _history else None
+
+
+def history(limit: int = None) -> list:
+    with _history_lock:
+        samples = list(_history)
+    return samples[-limit:] if limit else samples
+
+
+def percentile(values: list, percent: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100.0 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def percentiles(samples: list = None) -> dict:
+    """Percentiles of every utilization metric over the retained history"""
+    samples = history() if samples is None else samples
+    if not samples:
+        return {}
+    metrics = [key for key in samples[0] if key not in ("timestamp", "interval")]
+    return {
+        metric: {f"p{p}": percentile([s[metric] for s in samples], p) for p in PERCENTILES}
+        for metric in metrics
+    }
+
+
+def free_capacity(samples: list = None, cpu_count: int = None) -> dict:
+    """Estimate capacity left over by the host's own workloads, using p90 of host load"""
+    samples = history() if samples is None else samples
+    if not samples:
+        return None
+    cpu_count = cpu_count or os.cpu_count() or 1
+    host_cpu_p90 = percentile([s["host_cpu_percent"] for s in samples], 90)
+    host_memory_p90 = percentile([s["host_memory_used"] for s in samples], 90)
+    latest_sample = samples[-1]
+    return {
+        "cpu_cores": cpu_count * (1 - host_cpu_p90 / 100.0),
+        "memory_bytes": max(latest_sample["memory_total"] - host_memory_p90, 0),
+        "disk_bytes": latest_sample["disk_free"],
+        "based_on_samples": len(samples),
+    }
@@ -0,0 +1,133 @@
+import asyncio
+import collections
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_RETAINED_OPERATIONS = 100
+MAX_WAIT = 600              # Seconds a request may wait for an operation before getting its id back
+
+FINISHED_STATES = ("succeeded", "failed")
+
+# One thread: start, stop, settings edits and upgrades run one at a time, in order
+_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lifecycle")
+_operations = collections.OrderedDict()   # operation_id -> Operation, oldest first
+_pending = []                             # Queued and running operations, in submission order
+_lock = threading.Lock()
+_counters = {"submitted": 0, "joined": 0, "succeeded": 0, "failed": 0}
+
+
+class Operation:
+    def __init__(self, kind: str, params: dict):
+        self.operation_id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.joined_requests = 0
+        self.result = None
+        self.future = None
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        data = {
+            "operation_id": self.operation_id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "joined_requests": self.joined_requests,
+        }
+        if self.started_at:
+            data["duration"] = (self.finished_at or time.time()) - self.started_at
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+def _prune_finished():
+    """Drop the oldest finished operations once more than MAX_RETAINED_OPERATIONS are kept (lock held)"""
+    finished = [operation_id for operation_id, operation in _operations.items() if operation.status in FINISHED_STATES]
+    for operation_id in finished[:max(0, len(finished) - MAX_RETAINED_OPERATIONS)]:
+        del _operations[operation_id]
+
+
+def _run(operation: Operation, fn) -> dict:
+    with _lock:
+        operation.status = "running"
+        operation.started_at = time.time()
+    try:
+        result = fn()
+    except Exception as e:
+        result = {"status": "error", "message": f"{operation.kind} operation failed", "details": str(e)}
+    status = "failed" if result.get("status") == "error" else "succeeded"
+    with _lock:
+        operation.result = result
+        operation.status = status
+        operation.finished_at = time.time()
+        _pending.remove(operation)
+        _counters[status] += 1
+        _prune_finished()
+    print(f"[LIFECYCLE] {operation.kind} operation {operation.operation_id} {status}")
+    return result
+
+
+def submit(kind: str, fn, params: dict = None) -> tuple:
+    """
+    Queue fn (returning a response dict) behind the other lifecycle operations.
+    A request identical to the last one submitted joins it while it hasn't
+    finished, instead of queueing the same work again. Returns (operation, joined).
+    """
+    params = params or {}
+    with _lock:
+        if _pending and _pending[-1].kind == kind and _pending[-1].params == params:
+            operation = _pending[-1]
+            operation.joined_requests += 1
+            _counters["joined"] += 1
+            return operation, True
+
+        operation = Operation(kind, params)
+        _operations[operation.operation_id] = operation
+        _pending.append(operation)
+        _counters["submitted"] += 1
+        # The operation runs in the first requester's context, so its spans land in that request's trace
+        operation.future = _runner.submit(contextvars.copy_context().run, _run, operation, fn)
+    print(f"[LIFECYCLE] Queued {kind} operation {operation.operation_id}")
+    return operation, False
+
+
+async def wait(operation: Operation, timeout: float = None) -> bool:
+    """Wait up to timeout seconds (None: until it finishes) without holding a thread; True once finished"""
+    if not operation.future.done():
+        await asyncio.wait({asyncio.wrap_future(operation.future)}, timeout=timeout)
+    return operation.future.done()
+
+
+def busy() -> bool:
+    """True while an operation is queued or running"""
+    with _lock:
+        return bool(_pending)
+
+
+def get_operation(operation_id: str) -> Operation:
+    with _lock:
+        return _operations.get(operation_id)
+
+
+def list_operations() -> list:
+    with _lock:
+        return list(reversed(_operations.values()))
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            **_counters,
+            "pending": [operation.operation_id for operation in _pending],
+            "retained": len(_operations),
+        }
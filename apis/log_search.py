@@ -0,0 +1,185 @@
+import functools
+import mmap
+import multiprocessing
+import os
+import re
+import time
+
+LOG_FILES = {
+    "yagna": "~/.local/share/yagna/yagna_rCURRENT.log",
+    "ya-provider": "~/.local/share/ya-provider/ya-provider_rCURRENT.log",
+}
+
+WINDOW_BYTES = 16 * 1024 * 1024  # Bytes scanned between time limit checks
+MAX_RESULTS = 1000
+MAX_CONTEXT_LINES = 20
+MAX_LINE_BYTES = 4096            # Longer lines are cut in results
+DEFAULT_TIME_LIMIT = 2.0         # Seconds
+MAX_TIME_LIMIT = 10.0
+# A single regex call can't be interrupted, so searches run in a process that is
+# killed this long after time_limit (covers process start and the last window)
+KILL_GRACE = 2.0
+
+
+class SearchError(Exception):
+    """Raised for an unknown log or an invalid pattern"""
+
+
+@functools.lru_cache(maxsize=64)
+def compile_pattern(pattern: str, ignore_case: bool = False):
+    """Compile (and cache) a search pattern as a bytes regex"""
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    try:
+        return re.compile(pattern.encode("utf-8"), flags)
+    except re.error as e:
+        raise SearchError(f"Invalid pattern: {str(e)}")
+
+
+def _decode_line(data: mmap.mmap, start: int, end: int) -> str:
+    return data[start:min(end, start + MAX_LINE_BYTES)].decode("utf-8", errors="replace").rstrip("\r")
+
+
+def _line_bounds(data: mmap.mmap, position: int, size: int) -> tuple:
+    """Start and end (exclusive of the newline) of the line containing position"""
+    line_start = data.rfind(b"\n", 0, position) + 1
+    line_end = data.find(b"\n", position)
+    return line_start, size if line_end == -1 else line_end
+
+
+def _context_before(data: mmap.mmap, line_start: int, count: int) -> list:
+    lines = []
+    end = line_start - 1
+    while count > 0 and end >= 0:
+        start = data.rfind(b"\n", 0, end) + 1
+        lines.insert(0, _decode_line(data, start, end))
+        end = start - 1
+        count -= 1
+    return lines
+
+
+def _context_after(data: mmap.mmap, line_end: int, count: int, size: int) -> list:
+    lines = []
+    start = line_end + 1
+    while count > 0 and start < size:
+        end = data.find(b"\n", start)
+        end = size if end == -1 else end
+        lines.append(_decode_line(data, start, end))
+        start = end + 1
+        count -= 1
+    return lines
+
+
+def search(log: str, pattern: str, start: int = 0, end: int = None, context: int = 2,
+           limit: int = 100, time_limit: float = DEFAULT_TIME_LIMIT, ignore_case: bool = False) -> dict:
+    """
+    Search a log for a regex within the byte range [start, end) using mmap, so the
+    file is never loaded into Python strings. Returns at most `limit` matching lines
+    with context and a `next_cursor` byte offset to continue from, or None when the
+    range has been fully searched. The search runs in a child process that is
+    killed if a pattern runs past the time limit inside one regex call.
+    """
+    if log not in LOG_FILES:
+        raise SearchError(f"Unknown log: {log}")
+    compile_pattern(pattern, ignore_case)  # Reject invalid patterns without starting a process
+    time_limit = max(0.1, min(time_limit, MAX_TIME_LIMIT))
+
+    # spawn: forking a process with the API's threads running is not safe
+    mp_context = multiprocessing.get_context("spawn")
+    receiver, sender = mp_context.Pipe(duplex=False)
+    process = mp_context.Process(target=_search_worker, name="log-search", daemon=True,
+                                 args=(sender, log, pattern, start, end, context, limit, time_limit, ignore_case))
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(time_limit + KILL_GRACE):
+            raise SearchError(f"Search stopped: the pattern ran past the {time_limit:g}s time limit, "
+                              "use a simpler pattern or a smaller range")
+        outcome, value = receiver.recv()
+    except EOFError:
+        raise SearchError("Search process exited unexpectedly")
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+    if outcome == "error":
+        raise value
+    return value
+
+
+def _search_worker(conn, *args):
+    """Child process entry point: send back ("result", dict) or ("error", exception)"""
+    try:
+        conn.send(("result", _search(*args)))
+    except (SearchError, OSError, ValueError) as e:
+        conn.send(("error", e))
+    finally:
+        conn.close()
+
+
+def _search(log: str, pattern: str, start: int, end: int, context: int, limit: int,
+            time_limit: float, ignore_case: bool) -> dict:
+    regex = compile_pattern(pattern, ignore_case)
+    limit = max(1, min(limit, MAX_RESULTS))
+    context = max(0, min(context, MAX_CONTEXT_LINES))
+    log_file = os.path.expanduser(LOG_FILES[log])
+
+    started = time.monotonic()
+    results = []
+    next_cursor = None
+    stop_reason = None
+
+    with open(log_file, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if end is None else max(0, min(end, size))
+        start = max(0, min(start, end))
+        if size == 0 or start == end:
+            return {"file_size": size, "start": start, "end": end, "results": [],
+                    "next_cursor": None, "stop_reason": None, "elapsed": 0.0}
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            position = start
+            while position < end:
+                # Scan one window, extended to the end of its last line
+                window_end = min(position + WINDOW_BYTES, end)
+                if window_end < end:
+                    newline = data.find(b"\n", window_end, end)
+                    window_end = end if newline == -1 else newline + 1
+
+                last_line_start = -1
+                for match in regex.finditer(data, position, window_end):
+                    line_start, line_end = _line_bounds(data, match.start(), size)
+                    if line_start == last_line_start:
+                        continue  # One result per line
+                    last_line_start = line_start
+                    results.append({
+                        "offset": line_start,
+                        "line": _decode_line(data, line_start, line_end),
+                        "match": match.group(0)[:MAX_LINE_BYTES].decode("utf-8", errors="replace"),
+                        "before": _context_before(data, line_start, context),
+                        "after": _context_after(data, line_end, context, size),
+                    })
+                    if len(results) >= limit:
+                        next_cursor = min(line_end + 1, end)
+                        stop_reason = "result_limit"
+                        break
+
+                if stop_reason:
+                    break
+                position = window_end
+                if position < end and time.monotonic() - started > time_limit:
+                    next_cursor = position
+                    stop_reason = "time_limit"
+                    break
+
+    if next_cursor is not None and next_cursor >= end:
+        next_cursor = None
+    return {
+        "file_size": size,
+        "start": start,
+        "end": end,
+        "results": results,
+        "next_cursor": next_cursor,
+        "stop_reason": stop_reason,
+        "elapsed": time.monotonic() - started,
+    }
@@ -1,6 +1,9 @@
-from fastapi import FastAPI, Body
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import FastAPI, Body, Header, Query
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, Union
+import asyncio
+import functools
 import subprocess
 import time
 import json
@@ -10,10 +13,41 @@ import string
 import os
 import re
 import requests
+import tarfile
 import tempfile
+from concurrent.futures import Future
 from . import bootstrap_host
-
-app = FastAPI()
+from . import script_output
+from . import script_jobs
+from . import host_probe
+from . import host_sampler
+from . import resource_controller
+from . import provider_events
+from . import log_search
+from . import yagna_api
+from . import status_feed
+from . import models
+from . import admission
+from . import health
+from . import executor
+from . import artifact_mirror
+from . import upgrade
+from . import disk_budget
+from . import profiling
+from . import state_watcher
+from . import diagnostics
+from . import benchmark
+from . import tracing
+from . import lifecycle
+from . import history
+
+app = FastAPI(default_response_class=models.default_response_class())
+# Routes record when their endpoint returned, so traces can tell endpoint time from encoding
+app.router.route_class = tracing.TracedRoute
+# Concurrency and rate limits per endpoint class (heavy, script, read, health)
+app.add_middleware(admission.AdmissionMiddleware)
+# Request spans and Server-Timing headers (outermost, so admission waits count too)
+app.add_middleware(tracing.TracingMiddleware)
 
 # GitHub script URLs - change these to point to different repositories or branches
 GITHUB_SCRIPT_BASE_URL = "https://raw.githubusercontent.com/skillDeCoder/idle-finance-v2/main/automation/golem/scripts"
@@ -38,6 +72,77 @@ class GolemSettings(BaseModel):
     cpu_per_hour: Optional[str] = None
     account: Optional[str] = None
 
+# Resource controller settings model - only provided fields are changed
+class ResourceControllerConfig(BaseModel):
+    enabled: Optional[bool] = None
+    dry_run: Optional[bool] = None
+    interval: Optional[float] = None
+    window: Optional[float] = None
+    reserve_cores: Optional[int] = None
+    reserve_memory_gib: Optional[float] = None
+    min_cores: Optional[int] = None
+    max_cores: Optional[int] = None
+    min_memory_gib: Optional[float] = None
+    max_memory_gib: Optional[float] = None
+    up_hysteresis_cores: Optional[int] = None
+    up_hysteresis_memory_gib: Optional[float] = None
+    max_step_cores: Optional[int] = None
+    max_step_memory_gib: Optional[float] = None
+    down_cooldown: Optional[float] = None
+    up_cooldown: Optional[float] = None
+    quiet_window: Optional[float] = None
+    max_changes_per_hour: Optional[int] = None
+
+# Disk budget evictor settings model - only provided fields are changed
+class DiskBudgetConfig(BaseModel):
+    enabled: Optional[bool] = None
+    dry_run: Optional[bool] = None
+    interval: Optional[float] = None
+    budget_gib: Optional[float] = None
+    min_free_gib: Optional[float] = None
+    min_age: Optional[float] = None
+
+# Request tracing settings model - only provided fields are changed
+class TracingConfig(BaseModel):
+    enabled: Optional[bool] = None
+    slow_threshold: Optional[float] = None
+    keep_slowest: Optional[int] = None
+    server_timing: Optional[bool] = None
+    clear: Optional[bool] = None
+
+# Script job submission model
+class ScriptJobRequest(BaseModel):
+    script_url: str
+    priority: int = Field(script_jobs.DEFAULT_PRIORITY, ge=script_jobs.MIN_PRIORITY, le=script_jobs.MAX_PRIORITY)
+    timeout: Optional[float] = Field(None, gt=0, le=script_jobs.MAX_JOB_TIMEOUT)
+
+
+
+# Artifact mirror models - an artifact comes from a URL or a local path
+class MirrorArtifactRequest(BaseModel):
+    url: Optional[str] = None
+    path: Optional[str] = None
+    kind: str = "provider"
+    name: Optional[str] = None
+    sha256: Optional[str] = None
+
+class MirrorSyncRequest(BaseModel):
+    peer_url: str
+    names: Optional[list] = None
+
+class MirrorInstallRequest(BaseModel):
+    names: Optional[list] = None
+    bundle_path: Optional[str] = None  # Import this bundle first
+    peer_url: Optional[str] = None     # Fetch missing artifacts from this peer first
+
+
+
+# Upgrade model - artifact names a mirrored tarball, otherwise the release for version is mirrored
+class UpgradeRequest(BaseModel):
+    version: str
+    artifact: Optional[str] = None
+    health_timeout: float = upgrade.HEALTH_TIMEOUT
+
 
 
 # Import helper functions from bootstrap_host module
@@ -47,7 +152,7 @@ from .bootstrap_host import clean_ansi, check_golem_installed, check_golem_runni
 def is_golem_running() -> bool:
     """Check if Golem is running using golemsp status"""
     try:
-        result = subprocess.run(["golemsp", "status"], capture_output=True, text=True, check=True)
+        result = executor.run_command(["golemsp", "status"])
         raw_output = result.stdout.strip()
         
         # Parse the status using existing function
@@ -60,6 +165,7 @@ def is_golem_running() -> bool:
         return False
 
 # Parsing functions (imported from main.py)
+@tracing.timed("parse")
 def parse_golem_status(output: str) -> dict:
     parsed = {}
     output = clean_ansi(output)
@@ -83,24 +189,32 @@ def parse_golem_status(output: str) -> dict:
     # Earnings block
     earnings_patterns = {
         "network": r"network\s+([a-zA-Z0-9]+)",
-        "amount_total": r"amount \(total\)\s+([\d\.]+ GLM)",
-        "amount_onchain": r"\(on-chain\)\s+([\d\.]+ GLM)",
-        "amount_polygon": r"\(polygon\)\s+([\d\.]+ GLM)",
-        "pending": r"pending\s+([\d\.]+ GLM \(\d+\))",
-        "issued": r"issued\s+([\d\.]+ GLM \(\d+\))",
+        "amount_total": r"amount \(total\)\s+([\d\.]+) GLM",
+        "amount_onchain": r"\(on-chain\)\s+([\d\.]+) GLM",
+        "amount_polygon": r"\(polygon\)\s+([\d\.]+) GLM",
+        "pending": r"pending\s+([\d\.]+) GLM \((\d+)\)",
+        "issued": r"issued\s+([\d\.]+) GLM \((\d+)\)",
     }
 
+    # Amounts are GLM as numbers; pending/issued also carry the invoice count
     earnings = {}
     for key, pattern in earnings_patterns.items():
         match = re.search(pattern, output)
-        if match:
+        if not match:
+            continue
+        if key == "network":
             earnings[key] = match.group(1).strip()
+            continue
+        earnings[key] = float(match.group(1))
+        if match.lastindex == 2:
+            earnings[f"{key}_count"] = int(match.group(2))
 
     if earnings:
         parsed["earnings"] = earnings
 
     return parsed
 
+@tracing.timed("parse")
 def parse_golem_settings(output: str) -> dict:
     settings_data = {
         "raw_output": output,
@@ -156,6 +270,17 @@ def parse_golem_settings(output: str) -> dict:
 
     return settings_data
 
+def fetch_golem_status() -> dict:
+    """Run golemsp status and parse the output"""
+    result = executor.run_command(["golemsp", "status"])
+    return parse_golem_status(result.stdout.strip())
+
+def read_golem_settings() -> dict:
+    """Run golemsp settings show and parse the output"""
+    result = executor.run_command(["golemsp", "settings", "show"])
+    return parse_golem_settings(result.stdout.strip())
+
+@tracing.timed("parse")
 def parse_yagna_id_output(output: str) -> dict:
     """Parse yagna id show output and extract node information"""
     # Extract node ID using regex
@@ -188,19 +313,168 @@ def parse_yagna_id_output(output: str) -> dict:
     
     return parsed_data
 
+class NodeIdentityError(Exception):
+    """Node identity could not be determined; details are added to the error response"""
+    def __init__(self, message: str, **details):
+        super().__init__(message)
+        self.details = details
+
+def lookup_node_identity(refresh: bool = False, check_running=None) -> tuple:
+    """
+    Find the node identity: persistent cache, then the yagna REST API, then
+    yagna id show. Returns (node_data, source). check_running is only called
+    when the CLI is needed and defaults to is_golem_running.
+    """
+    if not refresh:
+        cached = yagna_api.load_cached_identity()
+        if cached:
+            return cached, "cache"
+    
+    # Prefer the local yagna REST API over forking the CLI
+    try:
+        parsed_data = yagna_api.get_identity()
+        yagna_api.save_cached_identity(parsed_data)
+        return parsed_data, "api"
+    except yagna_api.YagnaApiError as e:
+        print(f"[NODE-ID] yagna API unavailable, falling back to CLI: {str(e)}")
+    
+    if not (check_running or is_golem_running)():
+        raise NodeIdentityError("Golem provider is not running",
+                                note="Start the provider first using /start-golem")
+    
+    result = executor.run_command(["yagna", "id", "show"])
+    output = result.stdout.strip()
+    
+    # Parse yagna output using the imported function
+    parsed_data = parse_yagna_id_output(output)
+    if not parsed_data:
+        raise NodeIdentityError("Could not parse node ID from yagna output", raw_output=output)
+    
+    yagna_api.save_cached_identity(parsed_data)
+    return parsed_data, "cli"
+
+def lookup_yagna_data(api_call, cli_command: list) -> tuple:
+    """(data, source): from the yagna REST API, or the JSON output of a yagna CLI command when it isn't available"""
+    try:
+        return api_call(), "api"
+    except yagna_api.YagnaApiError as e:
+        print(f"[YAGNA-API] yagna API unavailable, falling back to CLI: {str(e)}")
+    result = executor.run_command(cli_command)
+    return json.loads(result.stdout), "cli"
+
+def read_golem_uptime() -> str:
+    """Elapsed time of the golemsp run process from ps, or an empty string"""
+    cmd = "ps -eo etime,cmd | grep '[g]olemsp run' | awk '{print $1}'"
+    result = executor.run_command(["bash", "-c", cmd])
+    return result.stdout.strip()
+
+def launch_golem() -> str:
+    """Start golemsp run in the background and return its pid"""
+    cmd = "nohup golemsp run > ~/.local/share/yagna/yagna_rCURRENT.log 2>&1 & echo $!"
+    result = executor.run_command(["bash", "-c", cmd])
+    return result.stdout.strip()
+
+def stop_golem_provider() -> subprocess.CompletedProcess:
+    state_watcher.expect_stop()
+    return executor.run_command(["golemsp", "stop"], timeout=executor.CONTROL_TIMEOUT)
+
+def script_stream_response(script_path: str, tag: str, mode: str) -> StreamingResponse:
+    """Wrap a script's live output in a chunked text or SSE response"""
+    media_type = "text/event-stream" if mode == "sse" else "text/plain; charset=utf-8"
+    return StreamingResponse(
+        script_output.stream_script(script_path, tag, mode),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def invalid_stream_mode(stream: str) -> dict:
+    return {
+        "status": "error",
+        "message": f"Invalid stream mode: {stream}",
+        "available_modes": list(script_output.STREAM_MODES)
+    }
+
+
+@app.on_event("startup")
+def probe_host_on_startup():
+    """Probe host capabilities once so health checks are served from memory"""
+    probe = host_probe.get_host_probe(refresh=True)
+    print(f"[HOST-PROBE] Host probed: {probe['requirements']}")
+
+@app.on_event("startup")
+def start_host_sampler():
+    host_sampler.start()
+
+@app.on_event("shutdown")
+def stop_host_sampler():
+    host_sampler.stop()
+
+@app.on_event("startup")
+def start_status_feed():
+    # Every status reading is also offered to the history recorder
+    status_feed.add_listener(history.record)
+    status_feed.start(fetch_golem_status)
+
+@app.on_event("shutdown")
+def stop_status_feed():
+    status_feed.stop()
+
+@app.on_event("startup")
+def start_state_watcher():
+    state_watcher.start()
+
+@app.on_event("shutdown")
+def stop_state_watcher():
+    state_watcher.stop()
+
+@app.on_event("startup")
+def start_resource_controller():
+    resource_controller.start(read_settings=read_golem_settings)
+
+@app.on_event("shutdown")
+def stop_resource_controller():
+    resource_controller.stop()
+
+@app.on_event("startup")
+def start_disk_evictor():
+    disk_budget.start()
+
+@app.on_event("shutdown")
+def stop_disk_evictor():
+    disk_budget.stop()
+
 
 # Bootstrap endpoint for direct host
 @app.post("/bootstrap")
+@executor.in_slow_pool
 def bootstrap_host_endpoint():
     """Bootstrap Golem provider directly on host"""
-    return bootstrap_host.bootstrap_host()
+    result = bootstrap_host.bootstrap_host()
+    # Installation state has changed, re-probe the host
+    host_probe.get_host_probe(refresh=True)
+    return result
+
+# Health endpoints - answered from memory, never fork
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the API is up"""
+    return health.liveness()
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: host probe done, status snapshot fresh and background threads alive"""
+    ready, checks = health.readiness()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": checks}
+    )
 
 # Golem management endpoints (simplified - no VM names)
-@app.get("/golem-status")
+@app.get("/golem-status", response_model=Union[models.GolemStatusResponse, models.ErrorResponse], response_model_exclude_unset=True)
 def golem_status():
     """Get Golem provider status"""
     try:
-        result = subprocess.run(["golemsp", "status"], capture_output=True, text=True, check=True)
+        result = executor.run_command(["golemsp", "status"])
         raw_output = result.stdout.strip()
         
         # Parse status using the imported function
@@ -224,9 +498,95 @@ def golem_status():
             "stderr": e.stderr
         }
 
-@app.post("/start-golem")
-def start_golem():
-    """Start Golem provider on host"""
+def run_overview_section(fn, *args) -> dict:
+    """Run one /overview section, turning failures into a per-section error"""
+    started = time.time()
+    try:
+        section = {"status": "success", "data": fn(*args)}
+    except NodeIdentityError as e:
+        section = {"status": "error", "message": str(e), **e.details}
+    except subprocess.CalledProcessError as e:
+        section = {"status": "error", "message": str(e), "stdout": e.stdout, "stderr": e.stderr}
+    except Exception as e:
+        section = {"status": "error", "message": str(e)}
+    section["elapsed"] = time.time() - started
+    return section
+
+def overview_uptime(running: bool) -> str:
+    if not running:
+        raise RuntimeError("Golem provider is not running")
+    uptime = read_golem_uptime()
+    if not uptime:
+        raise RuntimeError("Could not determine uptime")
+    return uptime
+
+def overview_identity(running) -> dict:
+    # running: Future of the status section's answer; only the CLI fallback waits for it
+    node_data, source = lookup_node_identity(check_running=running.result)
+    return {**node_data, "source": source}
+
+@app.get("/overview")
+def golem_overview():
+    """Get status, settings, node identity and uptime in one response"""
+    started = time.time()
+    
+    # Settings and identity don't need golemsp status, so they run while it does
+    running_future = Future()
+    futures = {
+        "settings": executor.submit_fast(run_overview_section, read_golem_settings),
+        "identity": executor.submit_fast(run_overview_section, overview_identity, running_future),
+    }
+    
+    # golemsp status runs once; its result tells uptime (and the identity CLI fallback) whether Golem is running
+    running = False
+    try:
+        status_section = run_overview_section(fetch_golem_status)
+        if status_section["status"] == "success":
+            status_feed.publish(status_section["data"])
+            running = status_section["data"].get("service_status") == "is running"
+    finally:
+        running_future.set_result(running)
+    futures["uptime"] = executor.submit_fast(run_overview_section, overview_uptime, running)
+    
+    sections = {"status": status_section}
+    sections.update({name: future.result() for name, future in futures.items()})
+    
+    failed = [name for name, section in sections.items() if section["status"] != "success"]
+    return {
+        "status": "success" if not failed else ("error" if len(failed) == len(sections) else "partial"),
+        "running": running,
+        "failed_sections": failed,
+        "sections": sections,
+        "elapsed": time.time() - started,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+@app.get("/golem-status/stream")
+def golem_status_stream():
+    """Subscribe to Golem status changes: one snapshot, then diffs, as Server-Sent Events"""
+    return StreamingResponse(
+        status_feed.subscribe(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def lifecycle_response(operation: lifecycle.Operation, joined: bool, wait: Optional[float]):
+    """The operation's result once it finishes within wait seconds, else 202 with its id to follow"""
+    if await lifecycle.wait(operation, wait):
+        return {
+            **operation.result,
+            "operation": {**operation.to_dict(include_result=False), "joined": joined}
+        }
+    
+    return JSONResponse(status_code=202, content={
+        "status": "accepted",
+        "message": f"{operation.kind} operation is {operation.status}",
+        "operation_id": operation.operation_id,
+        "operation": {**operation.to_dict(include_result=False), "joined": joined},
+        "note": f"Use /operations/{operation.operation_id} to follow it"
+    })
+
+def start_golem_operation() -> dict:
     try:
         # Check if already running
         if is_golem_running():
@@ -236,10 +596,19 @@ def start_golem():
                 "log_file": "~/.local/share/yagna/yagna_rCURRENT.log"
             }
         
+        # golemsp status says "not running" until a freshly launched provider is up
+        starting_pid = state_watcher.scan_processes().get("golemsp")
+        if starting_pid:
+            return {
+                "status": "success",
+                "message": "Golem provider is already starting",
+                "log_file": "~/.local/share/yagna/yagna_rCURRENT.log",
+                "pid": str(starting_pid),
+                "note": "Use /golem-status to check if fully started"
+            }
+        
         # Start golemsp in background
-        cmd = "nohup golemsp run > ~/.local/share/yagna/yagna_rCURRENT.log 2>&1 & echo $!"
-        result = subprocess.run(["bash", "-c", cmd], capture_output=True, text=True, check=True)
-        pid = result.stdout.strip()
+        pid = launch_golem()
         
         return {
             "status": "success",
@@ -258,9 +627,13 @@ def start_golem():
             "stderr": e.stderr
         }
 
-@app.post("/stop-golem")
-def stop_golem():
-    """Stop Golem provider on host"""
+@app.post("/start-golem")
+async def start_golem(wait: Optional[float] = Query(None, ge=0, le=lifecycle.MAX_WAIT)):
+    """Start Golem provider on host; concurrent start requests share one operation"""
+    operation, joined = lifecycle.submit("start", start_golem_operation)
+    return await lifecycle_response(operation, joined, wait)
+
+def stop_golem_operation() -> dict:
     try:
         if not is_golem_running():
             return {
@@ -268,7 +641,7 @@ def stop_golem():
                 "message": "Golem provider is not running"
             }
         
-        result = subprocess.run(["golemsp", "stop"], capture_output=True, text=True, check=True)
+        result = stop_golem_provider()
         
         return {
             "status": "success",
@@ -285,36 +658,56 @@ def stop_golem():
             "stderr": e.stderr
         }
 
-@app.get("/node-id")
-def get_node_id():
-    """Get node ID using yagna id show"""
+@app.post("/stop-golem")
+async def stop_golem(wait: Optional[float] = Query(None, ge=0, le=lifecycle.MAX_WAIT)):
+    """Stop Golem provider on host; concurrent stop requests share one operation"""
+    operation, joined = lifecycle.submit("stop", stop_golem_operation)
+    return await lifecycle_response(operation, joined, wait)
+
+@app.get("/operations")
+def list_operations():
+    """List queued, running and recent start, stop, settings and upgrade operations"""
+    return {
+        "status": "success",
+        "operations": lifecycle.stats(),
+        "recent": [operation.to_dict(include_result=False) for operation in lifecycle.list_operations()]
+    }
+
+@app.get("/operations/{operation_id}")
+async def get_operation(operation_id: str, wait: float = Query(0, ge=0, le=lifecycle.MAX_WAIT)):
+    """Get a lifecycle operation and its result, waiting up to wait seconds for it to finish"""
+    operation = lifecycle.get_operation(operation_id)
+    if operation is None:
+        return JSONResponse(status_code=404, content={
+            "status": "error",
+            "message": f"Operation {operation_id} not found"
+        })
+    
+    await lifecycle.wait(operation, wait)
+    return {
+        "status": "success",
+        "operation": operation.to_dict()
+    }
+
+@app.get("/node-id", response_model=Union[models.NodeIdResponse, models.ErrorResponse], response_model_exclude_unset=True)
+def get_node_id(refresh: bool = False):
+    """Get node ID from the cache, the yagna REST API or yagna id show"""
     try:
-        if not is_golem_running():
-            return {
-                "status": "error",
-                "message": "Golem provider is not running",
-                "note": "Start the provider first using /start-golem"
-            }
-        
-        result = subprocess.run(["yagna", "id", "show"], capture_output=True, text=True, check=True)
-        output = result.stdout.strip()
+        parsed_data, source = lookup_node_identity(refresh)
         
-        # Parse yagna output using the imported function
-        parsed_data = parse_yagna_id_output(output)
-        
-        if parsed_data:
-            return {
-                "status": "success",
-                "message": "Node ID retrieved",
-                "node_data": parsed_data
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "Could not parse node ID from yagna output",
-                "raw_output": output
-            }
+        return {
+            "status": "success",
+            "message": "Node ID retrieved",
+            "source": source,
+            "node_data": parsed_data
+        }
         
+    except NodeIdentityError as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            **e.details
+        }
     except subprocess.CalledProcessError as e:
         return {
             "status": "error",
@@ -324,15 +717,37 @@ def get_node_id():
             "stderr": e.stderr
         }
 
-@app.get("/golem-settings")
+@app.get("/payment-status")
+def get_payment_status():
+    """Get issued, pending and settled invoice totals from the yagna REST API or yagna payment status"""
+    try:
+        data, source = lookup_yagna_data(yagna_api.get_payment_status, ["yagna", "payment", "status", "--json"])
+    except (subprocess.CalledProcessError, ValueError) as e:
+        return operation_error("Could not get payment status", e)
+    return {
+        "status": "success",
+        "source": source,
+        "payment_status": data
+    }
+
+@app.get("/activity-status")
+def get_activity_status():
+    """Get activity counts by state from the yagna REST API or yagna activity status"""
+    try:
+        data, source = lookup_yagna_data(yagna_api.get_activity_status, ["yagna", "activity", "status", "--json"])
+    except (subprocess.CalledProcessError, ValueError) as e:
+        return operation_error("Could not get activity status", e)
+    return {
+        "status": "success",
+        "source": source,
+        "activity_status": data
+    }
+
+@app.get("/golem-settings", response_model=Union[models.GolemSettingsResponse, models.ErrorResponse], response_model_exclude_unset=True)
 def golem_settings():
     """Get Golem provider settings"""
     try:
-        result = subprocess.run(["golemsp", "settings", "show"], capture_output=True, text=True, check=True)
-        settings_output = result.stdout.strip()
-        
-        # Parse settings using the imported function
-        parsed_settings = parse_golem_settings(settings_output)
+        parsed_settings = read_golem_settings()
         
         return {
             "status": "success",
@@ -348,9 +763,7 @@ def golem_settings():
             "stderr": e.stderr
         }
 
-@app.post("/edit-golem")
-def edit_golem_settings(settings: GolemSettings = Body(...)):
-    """Edit Golem provider settings"""
+def edit_golem_operation(settings: GolemSettings) -> dict:
     try:
         # Build the golemsp settings command
         settings_commands = []
@@ -383,12 +796,14 @@ def edit_golem_settings(settings: GolemSettings = Body(...)):
         cmd = ["golemsp", "settings", "set"] + settings_commands
         settings_args = " ".join(cmd)  # For display purposes
         
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        result = executor.run_command(cmd, timeout=executor.CONTROL_TIMEOUT)
+        # Let the resource controller re-read the settings it manages
+        resource_controller.reset_current_settings()
         
         return {
             "status": "success",
             "message": "Golem settings updated",
-            "updated_settings": {k: v for k, v in settings.dict().items() if v is not None},
+            "updated_settings": settings.model_dump(exclude_none=True),
             "command": settings_args,
             "output": result.stdout
         }
@@ -402,16 +817,28 @@ def edit_golem_settings(settings: GolemSettings = Body(...)):
             "stderr": e.stderr
         }
 
+@app.post("/edit-golem", response_model=Union[models.EditGolemResponse, models.ErrorResponse], response_model_exclude_unset=True)
+async def edit_golem_settings(settings: GolemSettings = Body(...),
+                              wait: Optional[float] = Query(None, ge=0, le=lifecycle.MAX_WAIT)):
+    """Edit Golem provider settings; identical concurrent edits share one operation"""
+    changes = settings.model_dump(exclude_none=True)
+    if not changes:
+        # Nothing to queue; this only returns the available settings
+        return edit_golem_operation(settings)
+    operation, joined = lifecycle.submit("edit", functools.partial(edit_golem_operation, settings), changes)
+    return await lifecycle_response(operation, joined, wait)
+
 
 @app.get("/check-requirements")
-def check_requirements():
+def check_requirements(refresh: bool = False):
     """Check host requirements for Golem"""
     try:
-        requirements = check_requirement()
+        probe = host_probe.get_host_probe(refresh=refresh)
         
         return {
             "status": "success",
-            "requirements": requirements
+            "requirements": probe["requirements"],
+            "probed_at": probe["probed_at"]
         }
         
     except Exception as e:
@@ -421,39 +848,28 @@ def check_requirements():
         }
 
 @app.get("/verify-installation")
-def verify_installation():
+def verify_installation(refresh: bool = False):
     """Verify that Golem and KVM are properly installed"""
     try:
-        verification_results = {}
-        
-        # Verify Golem installation
-        try:
-            golem_result = subprocess.run(["which", "golemsp"], capture_output=True, text=True, check=True)
-            golem_path = golem_result.stdout.strip()
-            verification_results["golem_path"] = golem_path
-            verification_results["golem_installed"] = True
-        except subprocess.CalledProcessError:
-            verification_results["golem_path"] = None
-            verification_results["golem_installed"] = False
-        
-        # Verify KVM availability
-        try:
-            kvm_result = subprocess.run(["ls", "-l", "/dev/kvm"], capture_output=True, text=True, check=True)
-            kvm_info = kvm_result.stdout.strip()
-            verification_results["kvm_device"] = kvm_info
-            verification_results["kvm_available"] = True
-        except subprocess.CalledProcessError:
-            verification_results["kvm_device"] = None
-            verification_results["kvm_available"] = False
+        probe = host_probe.get_host_probe(refresh=refresh)
+        
+        verification_results = {
+            "golem_path": probe["golem"]["path"],
+            "golem_installed": probe["golem"]["installed"],
+            "kvm_device": probe["kvm"]["device"],
+            "kvm_available": probe["kvm"]["available"],
+            "kvm_accessible": probe["kvm"]["readable"] and probe["kvm"]["writable"]
+        }
         
         # Check if everything is working
-        all_good = verification_results.get("golem_installed", False) and verification_results.get("kvm_available", False)
+        all_good = verification_results["golem_installed"] and verification_results["kvm_available"]
         
         return {
             "status": "success" if all_good else "warning",
             "message": "Installation verification completed",
             "all_systems_go": all_good,
             "verification": verification_results,
+            "probed_at": probe["probed_at"],
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }
         
@@ -463,8 +879,137 @@ def verify_installation():
             "message": f"Could not verify installation: {str(e)}"
         }
 
+@app.get("/host-probe")
+def host_probe_endpoint(refresh: bool = False):
+    """Get cached host capabilities (CPU, KVM, memory, disk, nested virtualization)"""
+    try:
+        return {
+            "status": "success",
+            "host": host_probe.get_host_probe(refresh=refresh)
+        }
+        
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Could not probe host: {str(e)}"
+        }
+
+@app.get("/host-utilization")
+def get_host_utilization(history: int = 0):
+    """Get live host CPU, memory and disk utilization with percentiles and free capacity"""
+    samples = host_sampler.history()
+    if not samples:
+        return {
+            "status": "error",
+            "message": "No host utilization samples yet",
+            "sampler_running": host_sampler.is_running(),
+            "note": f"Samples are taken every {host_sampler.SAMPLE_INTERVAL} seconds"
+        }
+    
+    cpu_count = None
+    probe = host_probe.get_host_probe()
+    if probe.get("cpu"):
+        cpu_count = probe["cpu"]["logical_cpus"]
+    
+    response = {
+        "status": "success",
+        "sampler_running": host_sampler.is_running(),
+        "sample_interval": host_sampler.SAMPLE_INTERVAL,
+        "current": samples[-1],
+        "percentiles": host_sampler.percentiles(samples),
+        "free_capacity": host_sampler.free_capacity(samples, cpu_count)
+    }
+    if history > 0:
+        response["history"] = samples[-history:]
+    return response
+
+@app.get("/resource-controller")
+def get_resource_controller():
+    """Get the adaptive resource controller state and recent decisions"""
+    return {
+        "status": "success",
+        "controller": resource_controller.status()
+    }
+
+@app.post("/resource-controller")
+def configure_resource_controller(config: ResourceControllerConfig = Body(...)):
+    """Enable, disable or tune the adaptive resource controller"""
+    changes = config.model_dump(exclude_none=True)
+    if not changes:
+        return {
+            "status": "error",
+            "message": "No controller settings provided to update",
+            "available_settings": list(resource_controller.DEFAULT_CONFIG)
+        }
+    
+    resource_controller.configure(**changes)
+    return {
+        "status": "success",
+        "message": "Resource controller updated",
+        "updated_settings": changes,
+        "controller": resource_controller.status()
+    }
+
+@app.get("/disk-usage")
+def get_disk_usage():
+    """Get disk usage of yagna and ya-provider data by category"""
+    try:
+        return {
+            "status": "success",
+            "usage": disk_budget.usage()
+        }
+    except OSError as e:
+        return {
+            "status": "error",
+            "message": "Could not read disk usage",
+            "details": str(e)
+        }
+
+@app.get("/disk-budget")
+def get_disk_budget():
+    """Get the disk budget evictor state and recent evictions"""
+    return {
+        "status": "success",
+        "evictor": disk_budget.status()
+    }
 
-@app.get("/golem-log")
+@app.post("/disk-budget")
+def configure_disk_budget(config: DiskBudgetConfig = Body(...)):
+    """Enable, disable or tune the disk budget evictor"""
+    changes = config.model_dump(exclude_none=True)
+    if not changes:
+        return {
+            "status": "error",
+            "message": "No disk budget settings provided to update",
+            "available_settings": list(disk_budget.DEFAULT_CONFIG)
+        }
+    
+    disk_budget.configure(**changes)
+    return {
+        "status": "success",
+        "message": "Disk budget updated",
+        "updated_settings": changes,
+        "evictor": disk_budget.status()
+    }
+
+@app.post("/disk-budget/evict")
+@executor.in_slow_pool
+def run_disk_eviction(dry_run: bool = True):
+    """Run one eviction pass now; dry_run (the default) only reports what would be deleted"""
+    try:
+        return {
+            "status": "success",
+            "eviction": disk_budget.evict(dry_run=dry_run)
+        }
+    except OSError as e:
+        return {
+            "status": "error",
+            "message": "Eviction failed",
+            "details": str(e)
+        }
+
+
+@app.get("/golem-log", response_model=Union[models.LogResponse, models.ErrorResponse], response_model_exclude_unset=True)
 def get_golem_log(lines: int = 20):
     """Get Golem provider logs"""
     try:
@@ -476,7 +1021,7 @@ def get_golem_log(lines: int = 20):
                 "note": "Provider may not be running or logs not generated yet"
             }
         
-        result = subprocess.run(["tail", "-n", str(lines), log_file], capture_output=True, text=True, check=True)
+        result = executor.run_command(["tail", "-n", str(lines), log_file])
         
         return {
             "status": "success",
@@ -490,7 +1035,7 @@ def get_golem_log(lines: int = 20):
             "details": str(e)
         }
 
-@app.get("/golem-uptime")
+@app.get("/golem-uptime", response_model=Union[models.UptimeResponse, models.ErrorResponse], response_model_exclude_unset=True)
 def get_golem_uptime():
     """Get Golem provider uptime"""
     try:
@@ -502,10 +1047,7 @@ def get_golem_uptime():
                 "note": "Start the provider first using /start-golem"
             }
         
-        # Get uptime using ps command
-        cmd = "ps -eo etime,cmd | grep '[g]olemsp run' | awk '{print $1}'"
-        result = subprocess.run(["bash", "-c", cmd], capture_output=True, text=True, check=True)
-        uptime = result.stdout.strip()
+        uptime = read_golem_uptime()
         
         if not uptime:
             return {
@@ -529,7 +1071,7 @@ def get_golem_uptime():
             "stderr": e.stderr
         }
 
-@app.get("/ya-provider-log")
+@app.get("/ya-provider-log", response_model=Union[models.LogResponse, models.ErrorResponse], response_model_exclude_unset=True)
 def get_ya_provider_log(lines: int = 20):
     """Get ya-provider daemon logs"""
     try:
@@ -541,7 +1083,7 @@ def get_ya_provider_log(lines: int = 20):
                 "note": "Provider daemon may not be running or logs not generated yet"
             }
         
-        result = subprocess.run(["tail", "-n", str(lines), log_file], capture_output=True, text=True, check=True)
+        result = executor.run_command(["tail", "-n", str(lines), log_file])
         
         return {
             "status": "success",
@@ -557,9 +1099,594 @@ def get_ya_provider_log(lines: int = 20):
 
 
 
+@app.get("/log-search")
+def search_logs(pattern: str, log: str = "yagna", start: int = 0, end: Optional[int] = None,
+                context: int = 2, limit: int = 100, time_limit: float = log_search.DEFAULT_TIME_LIMIT,
+                ignore_case: bool = False):
+    """Regex search over the yagna or ya-provider log with context lines and a continuation cursor"""
+    try:
+        result = log_search.search(log, pattern, start, end, context, limit, time_limit, ignore_case)
+        
+        return {
+            "status": "success",
+            "log": log,
+            "pattern": pattern,
+            **result
+        }
+        
+    except log_search.SearchError as e:
+        return {
+            "status": "error",
+            "message": str(e),
+            "available_logs": list(log_search.LOG_FILES)
+        }
+    except FileNotFoundError:
+        return {
+            "status": "error",
+            "message": f"{log} log file not found",
+            "note": "Provider may not be running or logs not generated yet"
+        }
+    except (OSError, ValueError) as e:
+        return {
+            "status": "error",
+            "message": f"Could not search {log} log",
+            "details": str(e)
+        }
+
+@app.get("/provider-events")
+def get_provider_events(event_type: Optional[str] = Query(None, alias="type"), since: Optional[float] = None,
+                        event_id: Optional[str] = Query(None, alias="id"), limit: int = 100):
+    """Get typed agreement, activity and invoice events parsed from the ya-provider log"""
+    if event_type is not None and event_type not in provider_events.EVENT_TYPES:
+        return {
+            "status": "error",
+            "message": f"Unknown event type: {event_type}",
+            "available_types": provider_events.EVENT_TYPES
+        }
+    
+    try:
+        provider_events.refresh()
+        events = provider_events.query_events(event_type, since, event_id, limit)
+        
+        return {
+            "status": "success",
+            "count": len(events),
+            "events": events
+        }
+        
+    except OSError as e:
+        return {
+            "status": "error",
+            "message": "Could not read ya-provider log",
+            "details": str(e)
+        }
+
+@app.get("/provider-processes")
+def get_provider_processes(limit: int = 100):
+    """Get provider processes and the start, stop and crash events seen by the state watcher"""
+    return {
+        "status": "success",
+        **state_watcher.stats(),
+        "events": state_watcher.recent_events(limit)
+    }
+
+@app.get("/diagnostics")
+def export_diagnostics(
+    compression: str = Query("gz", alias="format", description="gz, or zst if the zstandard package is installed"),
+    rotated: bool = Query(True, description="Include rotated logs, not only the current ones"),
+    since: Optional[float] = Query(None, description="Only logs modified after this Unix timestamp")
+):
+    """Stream a tar.gz (or tar.zst) support bundle with logs and status, settings and host snapshots"""
+    if compression not in diagnostics.available_formats():
+        return {
+            "status": "error",
+            "message": f"Unsupported format: {compression}",
+            "available_formats": diagnostics.available_formats()
+        }
+    
+    snapshots = {
+        "status": fetch_golem_status,
+        "status_feed": status_feed.current,
+        "settings": read_golem_settings,
+        "host_probe": host_probe.get_host_probe,
+        "host_utilization": host_sampler.history,
+        "provider_processes": state_watcher.stats,
+        "provider_stats": provider_events.stats,
+        "disk_usage": disk_budget.usage,
+        "executor": executor.stats,
+        "admission": admission.stats,
+        "history": history.status,
+    }
+    name = diagnostics.bundle_name()
+    return StreamingResponse(
+        diagnostics.stream_bundle(name, snapshots, diagnostics.list_logs(rotated, since), compression),
+        media_type=diagnostics.media_type(compression),
+        headers={"Content-Disposition": f'attachment; filename="{name}.{diagnostics.file_extension(compression)}"'}
+    )
+
+@app.get("/history")
+def get_history():
+    """Get the status history recorder state, stored days, columns and export formats"""
+    return {
+        "status": "success",
+        "history": history.status()
+    }
+
+@app.get("/history/export")
+def export_history(
+    file_format: str = Query("csv", alias="format", description="csv, or arrow / parquet if the pyarrow package is installed"),
+    start: Optional[float] = Query(None, description="Unix timestamp of the first reading"),
+    end: Optional[float] = Query(None, description="Unix timestamp of the last reading"),
+    columns: Optional[str] = Query(None, description="Comma separated columns, e.g. timestamp,running,amount_total")
+):
+    """Stream recorded status and earnings history as CSV, Arrow IPC or Parquet"""
+    try:
+        selected = history.select_columns(columns)
+        chunks = history.export(file_format, selected, start, end)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": str(e),
+            "available_formats": history.available_formats(),
+            "available_columns": list(history.COLUMNS)
+        })
+    
+    name = f"golem-history-{platform.node()}-{time.strftime('%Y%m%d-%H%M%S')}"
+    return StreamingResponse(
+        chunks,
+        media_type=history.media_type(file_format),
+        headers={"Content-Disposition": f'attachment; filename="{name}.{history.file_extension(file_format)}"'}
+    )
+
+@app.get("/admission")
+def get_admission_stats():
+    """Get admission control limits and counters per endpoint class"""
+    return {
+        "status": "success",
+        "admission": admission.stats()
+    }
+
+@app.get("/tracing")
+def get_tracing():
+    """Get request tracing settings and counters"""
+    return {
+        "status": "success",
+        "tracing": tracing.status()
+    }
+
+@app.post("/tracing")
+def configure_tracing(config: TracingConfig = Body(...)):
+    """Turn request tracing on or off, tune the slow request log or clear it"""
+    changes = config.model_dump(exclude_none=True)
+    clear = changes.pop("clear", False)
+    if not changes and not clear:
+        return {
+            "status": "error",
+            "message": "No tracing settings provided to update",
+            "available_settings": [*tracing.DEFAULT_CONFIG, "clear"]
+        }
+    
+    tracing.configure(**changes)
+    if clear:
+        tracing.clear()
+    return {
+        "status": "success",
+        "message": "Tracing updated",
+        "updated_settings": changes,
+        "cleared": clear,
+        "tracing": tracing.status()
+    }
+
+@app.get("/tracing/slow")
+def get_slow_requests(limit: int = 20, path: Optional[str] = None, recent: bool = False):
+    """Get the slowest traced requests with their span breakdown; recent lists the latest over the threshold instead"""
+    return {
+        "status": "success",
+        "enabled": tracing.is_enabled(),
+        "requests": tracing.slow_requests(limit, path, recent)
+    }
+
+@app.get("/provider-stats")
+def get_provider_stats():
+    """Get agreement/activity/invoice counts, hourly throughput and task duration histogram"""
+    try:
+        provider_events.refresh()
+        
+        return {
+            "status": "success",
+            "stats": provider_events.stats()
+        }
+        
+    except OSError as e:
+        return {
+            "status": "error",
+            "message": "Could not read ya-provider log",
+            "details": str(e)
+        }
+
+
+# Artifact mirror endpoints
+def operation_error(message: str, e: Exception) -> dict:
+    return {
+        "status": "error",
+        "message": message,
+        "details": str(e)
+    }
+
+@app.get("/mirror")
+def get_mirror():
+    """Get the artifact mirror manifest"""
+    return {
+        "status": "success",
+        **artifact_mirror.stats()
+    }
+
+@app.post("/mirror/artifacts")
+@executor.in_slow_pool
+def add_mirror_artifact(artifact: MirrorArtifactRequest = Body(...)):
+    """Add an installer artifact to the mirror from a URL or a local path"""
+    try:
+        if artifact.url:
+            entry = artifact_mirror.add_from_url(artifact.url, artifact.kind, artifact.name, artifact.sha256)
+        elif artifact.path:
+            entry = artifact_mirror.add_from_file(artifact.path, artifact.kind, artifact.name, artifact.sha256)
+        else:
+            return {
+                "status": "error",
+                "message": "Provide either url or path"
+            }
+        return {
+            "status": "success",
+            "artifact": entry
+        }
+    except (artifact_mirror.MirrorError, requests.RequestException, OSError) as e:
+        return operation_error("Could not add artifact", e)
+
+@app.post("/mirror/release")
+@executor.in_slow_pool
+def add_mirror_release(version: str = Body(..., embed=True), runtime_version: Optional[str] = Body(None, embed=True)):
+    """Mirror the golem provider and VM runtime release tarballs for a version"""
+    try:
+        return {
+            "status": "success",
+            "artifacts": artifact_mirror.add_release(version, runtime_version)
+        }
+    except (artifact_mirror.MirrorError, requests.RequestException, OSError) as e:
+        return operation_error(f"Could not mirror release {version}", e)
+
+@app.get("/mirror/artifacts/{name}")
+def download_mirror_artifact(name: str):
+    """Download a mirrored artifact (used by peers syncing from this node)"""
+    try:
+        return FileResponse(artifact_mirror.artifact_path(name), filename=name,
+                            media_type="application/octet-stream")
+    except artifact_mirror.MirrorError as e:
+        return JSONResponse(status_code=404, content={"status": "error", "message": str(e)})
+
+@app.delete("/mirror/artifacts/{name}")
+def delete_mirror_artifact(name: str):
+    """Remove an artifact from the mirror"""
+    if not artifact_mirror.remove(name):
+        return JSONResponse(status_code=404, content={"status": "error", "message": f"Artifact not in mirror: {name}"})
+    return {
+        "status": "success",
+        "message": f"Removed {name}"
+    }
+
+@app.get("/mirror/verify")
+@executor.in_slow_pool
+def verify_mirror():
+    """Re-hash every mirrored artifact against the manifest"""
+    results = artifact_mirror.verify()
+    return {
+        "status": "success" if all(result == "ok" for result in results.values()) else "error",
+        "artifacts": results
+    }
+
+@app.get("/mirror/bundle")
+@executor.in_slow_pool
+def export_mirror_bundle():
+    """Download the whole mirror as one tar bundle"""
+    try:
+        return FileResponse(artifact_mirror.export_bundle(), filename=artifact_mirror.BUNDLE_NAME,
+                            media_type="application/x-tar")
+    except OSError as e:
+        return operation_error("Could not export mirror bundle", e)
+
+@app.post("/mirror/import")
+@executor.in_slow_pool
+def import_mirror_bundle(path: str = Body(..., embed=True)):
+    """Import a bundle exported by another node from a local path"""
+    try:
+        return {
+            "status": "success",
+            "artifacts": artifact_mirror.import_bundle(path)
+        }
+    except (artifact_mirror.MirrorError, tarfile.TarError, OSError) as e:
+        return operation_error("Could not import mirror bundle", e)
+
+@app.post("/mirror/sync")
+@executor.in_slow_pool
+def sync_mirror(sync_request: MirrorSyncRequest = Body(...)):
+    """Fetch artifacts missing from this mirror from a peer node's API"""
+    try:
+        return {
+            "status": "success",
+            "synced": artifact_mirror.sync_from_peer(sync_request.peer_url, sync_request.names)
+        }
+    except (artifact_mirror.MirrorError, requests.RequestException, OSError, KeyError) as e:
+        return operation_error(f"Could not sync from {sync_request.peer_url}", e)
+
+@app.post("/mirror/install")
+@executor.in_slow_pool
+def install_from_mirror(install_request: MirrorInstallRequest = Body(...)):
+    """Install golem binaries from the mirror, optionally importing a bundle or syncing a peer first"""
+    try:
+        if install_request.bundle_path:
+            artifact_mirror.import_bundle(install_request.bundle_path)
+        if install_request.peer_url:
+            artifact_mirror.sync_from_peer(install_request.peer_url, install_request.names)
+        installed = artifact_mirror.install(install_request.names)
+    except (artifact_mirror.MirrorError, requests.RequestException, tarfile.TarError, OSError, KeyError) as e:
+        return operation_error("Could not install from mirror", e)
+    # Installation state has changed, re-probe the host
+    host_probe.get_host_probe(refresh=True)
+    return {
+        "status": "success",
+        "installed": installed,
+        "note": "Use /verify-installation to check the installed binaries"
+    }
+
+# Benchmark endpoints
+@app.get("/benchmark")
+def get_benchmark(
+    preset: str = Query("vm", description="Pricing preset to evaluate"),
+    target_per_glm: Optional[float] = Query(None, gt=0, description="Desired SHA-256 MiB per GLM, to suggest a cpu_per_hour")
+):
+    """Get the last benchmark result and the throughput per GLM at the current prices"""
+    result = host_probe.load_benchmark()
+    if result is None:
+        return {
+            "status": "error",
+            "message": "No benchmark has been run on this host",
+            "note": "Use POST /benchmark to run one"
+        }
+    
+    try:
+        settings = read_golem_settings()
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        return operation_error("Could not read golem settings for pricing", e)
+    return {
+        "status": "success",
+        "benchmark": result,
+        "pricing": benchmark.pricing(result, settings, preset, target_per_glm)
+    }
+
+@app.post("/benchmark")
+@executor.in_slow_pool
+def run_benchmark(
+    benchmarks: Optional[str] = Query(None, description="Comma separated: cpu, memory, disk (default: all)"),
+    duration: float = Query(benchmark.DEFAULT_DURATION, gt=0, le=benchmark.MAX_DURATION, description="Seconds per measurement"),
+    workers: Optional[int] = Query(None, ge=1, le=benchmark.MAX_WORKERS, description="Parallel processes (default and max: logical CPUs)")
+):
+    """Run CPU, memory bandwidth and disk microbenchmarks and store the result with the host probe"""
+    try:
+        result = benchmark.run(benchmarks.split(",") if benchmarks else None, duration, workers)
+    except (benchmark.BenchmarkError, OSError) as e:
+        return operation_error("Could not run the benchmark", e)
+    
+    try:
+        pricing = benchmark.pricing(result, read_golem_settings())
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        pricing = {"error": str(e)}
+    return {
+        "status": "success",
+        "benchmark": result,
+        "pricing": pricing
+    }
+
+# Upgrade endpoints
+@app.get("/upgrade")
+def get_upgrade_status():
+    """Get staged versions and the result of the last upgrade"""
+    return {
+        "status": "success",
+        **upgrade.status()
+    }
+
+@app.post("/upgrade/stage")
+@executor.in_slow_pool
+def stage_upgrade(upgrade_request: UpgradeRequest = Body(...)):
+    """Download and check a golem version ahead of the upgrade, while the current one keeps running"""
+    try:
+        return {
+            "status": "success",
+            "staged": upgrade.stage(upgrade_request.version, upgrade_request.artifact)
+        }
+    except (upgrade.UpgradeError, artifact_mirror.MirrorError, requests.RequestException,
+            tarfile.TarError, OSError, StopIteration) as e:
+        return operation_error(f"Could not stage golem {upgrade_request.version}", e)
+    except subprocess.CalledProcessError as e:
+        return {
+            "status": "error",
+            "message": f"Staged golem {upgrade_request.version} does not run",
+            "details": str(e),
+            "stdout": e.stdout,
+            "stderr": e.stderr
+        }
+
+def upgrade_golem_operation(upgrade_request: UpgradeRequest) -> dict:
+    try:
+        result = upgrade.upgrade(upgrade_request.version, launch_golem, stop_golem_provider, fetch_golem_status,
+                                 artifact=upgrade_request.artifact, health_timeout=upgrade_request.health_timeout)
+    except (upgrade.UpgradeError, artifact_mirror.MirrorError, requests.RequestException,
+            tarfile.TarError, OSError, StopIteration) as e:
+        return operation_error(f"Could not upgrade golem to {upgrade_request.version}", e)
+    except subprocess.CalledProcessError as e:
+        return {
+            "status": "error",
+            "message": f"Could not upgrade golem to {upgrade_request.version}",
+            "details": str(e),
+            "stdout": e.stdout,
+            "stderr": e.stderr
+        }
+    # Binaries and provider state have changed
+    host_probe.get_host_probe(refresh=True)
+    status_feed.request_refresh()
+    return result
+
+@app.post("/upgrade")
+async def upgrade_golem(upgrade_request: UpgradeRequest = Body(...),
+                        wait: Optional[float] = Query(None, ge=0, le=lifecycle.MAX_WAIT)):
+    """Upgrade golem with a quick stop, swap and start, rolling back if the new version isn't healthy"""
+    operation, joined = lifecycle.submit("upgrade", functools.partial(upgrade_golem_operation, upgrade_request),
+                                         upgrade_request.model_dump())
+    return await lifecycle_response(operation, joined, wait)
+
+# Debug endpoints - 404 unless GOLEM_API_DEBUG=1, hidden from the OpenAPI schema while disabled
+def debug_access_error(x_debug_token: Optional[str]):
+    refused = profiling.access_error(x_debug_token)
+    if refused is None:
+        return None
+    status_code, message = refused
+    return JSONResponse(status_code=status_code, content={"status": "error", "message": message})
+
+@app.get("/debug/profile", include_in_schema=profiling.ENABLED)
+def get_profile_status(x_debug_token: Optional[str] = Header(None)):
+    """Get the state of the profiling session"""
+    return debug_access_error(x_debug_token) or {
+        "status": "success",
+        **profiling.profile_status()
+    }
+
+@app.post("/debug/profile", include_in_schema=profiling.ENABLED)
+async def profile_window(
+    mode: str = Query("sample", description="sample (stack sampling) or cprofile"),
+    seconds: float = Query(10, gt=0, le=profiling.MAX_PROFILE_SECONDS),
+    interval: float = Query(profiling.DEFAULT_SAMPLE_INTERVAL, gt=0, description="Seconds between stack samples"),
+    x_debug_token: Optional[str] = Header(None)
+):
+    """Profile the running API for a time window and return the stats"""
+    refused = debug_access_error(x_debug_token)
+    if refused:
+        return refused
+    try:
+        profiling.start_profile(mode, seconds + 1, interval)
+    except profiling.ProfilingError as e:
+        return operation_error("Could not start profiling", e)
+    await asyncio.sleep(seconds)
+    try:
+        return {
+            "status": "success",
+            **profiling.stop_profile()
+        }
+    except profiling.ProfilingError as e:
+        return operation_error("Profiling session was stopped by another request", e)
+
+@app.post("/debug/profile/start", include_in_schema=profiling.ENABLED)
+def start_profile(
+    mode: str = Query("sample", description="sample (stack sampling) or cprofile"),
+    seconds: float = Query(profiling.MAX_PROFILE_SECONDS, gt=0, le=profiling.MAX_PROFILE_SECONDS,
+                           description="Stop automatically after this many seconds"),
+    interval: float = Query(profiling.DEFAULT_SAMPLE_INTERVAL, gt=0, description="Seconds between stack samples"),
+    x_debug_token: Optional[str] = Header(None)
+):
+    """Start a profiling session that runs until /debug/profile/stop or its time window ends"""
+    refused = debug_access_error(x_debug_token)
+    if refused:
+        return refused
+    try:
+        return {
+            "status": "success",
+            **profiling.start_profile(mode, seconds, interval),
+            "note": "Use POST /debug/profile/stop to collect the stats"
+        }
+    except profiling.ProfilingError as e:
+        return operation_error("Could not start profiling", e)
+
+@app.post("/debug/profile/stop", include_in_schema=profiling.ENABLED)
+def stop_profile(x_debug_token: Optional[str] = Header(None)):
+    """Stop the profiling session and return its stats"""
+    refused = debug_access_error(x_debug_token)
+    if refused:
+        return refused
+    try:
+        return {
+            "status": "success",
+            **profiling.stop_profile()
+        }
+    except profiling.ProfilingError as e:
+        return operation_error("Could not stop profiling", e)
+
+@app.get("/debug/tracemalloc", include_in_schema=profiling.ENABLED)
+def get_tracemalloc_status(x_debug_token: Optional[str] = Header(None)):
+    """Get traced memory and the stored snapshots"""
+    return debug_access_error(x_debug_token) or {
+        "status": "success",
+        **profiling.tracemalloc_status()
+    }
+
+@app.post("/debug/tracemalloc/start", include_in_schema=profiling.ENABLED)
+def start_tracemalloc(
+    frames: int = Query(10, ge=1, le=100, description="Stack frames stored per allocation"),
+    x_debug_token: Optional[str] = Header(None)
+):
+    """Start tracing memory allocations"""
+    return debug_access_error(x_debug_token) or {
+        "status": "success",
+        **profiling.start_tracemalloc(frames)
+    }
+
+@app.post("/debug/tracemalloc/stop", include_in_schema=profiling.ENABLED)
+def stop_tracemalloc(x_debug_token: Optional[str] = Header(None)):
+    """Stop tracing memory allocations and drop the stored snapshots"""
+    return debug_access_error(x_debug_token) or {
+        "status": "success",
+        **profiling.stop_tracemalloc()
+    }
+
+@app.post("/debug/tracemalloc/snapshot", include_in_schema=profiling.ENABLED)
+def take_tracemalloc_snapshot(
+    group_by: str = Query("lineno", description="lineno, filename or traceback"),
+    x_debug_token: Optional[str] = Header(None)
+):
+    """Take a tracemalloc snapshot and return the largest allocation sites"""
+    refused = debug_access_error(x_debug_token)
+    if refused:
+        return refused
+    try:
+        return {
+            "status": "success",
+            **profiling.take_snapshot(group_by)
+        }
+    except (profiling.ProfilingError, ValueError) as e:
+        return operation_error("Could not take a snapshot", e)
+
+@app.get("/debug/tracemalloc/diff", include_in_schema=profiling.ENABLED)
+def diff_tracemalloc_snapshots(
+    from_id: int = Query(..., description="Older snapshot"),
+    to_id: Optional[int] = Query(None, description="Newer snapshot (default: take one now)"),
+    group_by: str = Query("lineno", description="lineno, filename or traceback"),
+    x_debug_token: Optional[str] = Header(None)
+):
+    """Compare two tracemalloc snapshots, largest growth first"""
+    refused = debug_access_error(x_debug_token)
+    if refused:
+        return refused
+    try:
+        return {
+            "status": "success",
+            **profiling.diff_snapshots(from_id, to_id, group_by)
+        }
+    except (profiling.ProfilingError, ValueError) as e:
+        return operation_error("Could not compare snapshots", e)
+
 @app.get("/hello-world")
-def hello_world():
+@executor.in_slow_pool
+def hello_world(stream: Optional[str] = None):
     """Execute hello world script from Idle Finance GitHub repository"""
+    if stream is not None and stream not in script_output.STREAM_MODES:
+        return invalid_stream_mode(stream)
     try:
         print("[HELLO-WORLD] Starting hello-world endpoint")
         
@@ -598,9 +1725,12 @@ echo "Current time: $(date)"
         os.chmod(temp_script_path, 0o755)
         print(f"[HELLO-WORLD] Made script executable")
         
+        if stream:
+            return script_stream_response(temp_script_path, "HELLO-WORLD", stream)
+        
         # Execute the script
         print(f"[HELLO-WORLD] Executing script...")
-        result = subprocess.run(["bash", temp_script_path], capture_output=True, text=True, check=True)
+        result = executor.run_command(["bash", temp_script_path], timeout=executor.SCRIPT_TIMEOUT)
         print(f"[HELLO-WORLD] Script execution completed")
         print(f"[HELLO-WORLD] Script output: {result.stdout.strip()}")
         print(f"[HELLO-WORLD] Script stderr: {result.stderr.strip()}")
@@ -647,8 +1777,11 @@ echo "Current time: $(date)"
 
 
 @app.post("/run-script")
-def run_script_from_url(script_url: str = Body(..., embed=True)):
+@executor.in_slow_pool
+def run_script_from_url(script_url: str = Body(..., embed=True), stream: Optional[str] = None):
     """Execute any script from a given URL"""
+    if stream is not None and stream not in script_output.STREAM_MODES:
+        return invalid_stream_mode(stream)
     try:
         print(f"[RUN-SCRIPT] Starting script execution from URL")
         print(f"[RUN-SCRIPT] Downloading script from: {script_url}")
@@ -661,40 +1794,37 @@ def run_script_from_url(script_url: str = Body(..., embed=True)):
         print(f"[RUN-SCRIPT] Downloaded script content ({len(response.text)} chars)")
         print(f"[RUN-SCRIPT] Script preview: {response.text[:200]}...")
         
-        # Create temporary file and write script content
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as temp_file:
-            temp_file.write(response.text)
-            temp_script_path = temp_file.name
-        
-        print(f"[RUN-SCRIPT] Saved script to temp file: {temp_script_path}")
-        
-        # Make script executable
-        os.chmod(temp_script_path, 0o755)
-        print(f"[RUN-SCRIPT] Made script executable")
-        
-        # Execute the script
-        print(f"[RUN-SCRIPT] Executing script...")
-        result = subprocess.run(["bash", temp_script_path], capture_output=True, text=True, check=True)
+        if stream:
+            # Streams follow the request's connection, so they run here; admission's script class bounds them
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as temp_file:
+                temp_file.write(response.text)
+                temp_script_path = temp_file.name
+            os.chmod(temp_script_path, 0o755)
+            print(f"[RUN-SCRIPT] Saved script to temp file: {temp_script_path}")
+            return script_stream_response(temp_script_path, "RUN-SCRIPT", stream)
         
-        print(f"[RUN-SCRIPT] Script execution completed")
-        print(f"[RUN-SCRIPT] Script output: {result.stdout.strip()}")
-        print(f"[RUN-SCRIPT] Script stderr: {result.stderr.strip()}")
-        
-        # Clean up
-        os.unlink(temp_script_path)
-        print(f"[RUN-SCRIPT] Cleaned up temp file: {temp_script_path}")
-        
-        print(f"[RUN-SCRIPT] Successfully completed!")
-        
-        return {
-            "status": "success",
-            "message": "Script executed successfully",
-            "output": result.stdout.strip(),
-            "stderr": result.stderr.strip() if result.stderr.strip() else None,
+        # Run it on the bounded script worker pool; the result is fetched from /script-jobs/{job_id}
+        try:
+            job = script_jobs.submit(script_url, timeout=min(executor.SCRIPT_TIMEOUT, script_jobs.MAX_JOB_TIMEOUT),
+                                     script_text=response.text)
+        except script_jobs.QueueFullError as e:
+            return JSONResponse(status_code=503, headers={"Retry-After": "30"}, content={
+                "status": "error",
+                "message": str(e),
+                "script_url": script_url,
+                "queue": script_jobs.stats()
+            })
+        print(f"[RUN-SCRIPT] Queued as script job {job.job_id}")
+        
+        return JSONResponse(status_code=202, content={
+            "status": "accepted",
+            "message": "Script job queued",
+            "job_id": job.job_id,
+            "job": job.to_dict(include_output=False),
             "script_url": script_url,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "script_content_preview": response.text[:200] + "..." if len(response.text) > 200 else response.text
-        }
+            "script_content_preview": response.text[:200] + "..." if len(response.text) > 200 else response.text,
+            "note": f"Use /script-jobs/{job.job_id} to check the result"
+        })
         
     except requests.RequestException as e:
         print(f"[RUN-SCRIPT] Request error: {str(e)}")
@@ -704,18 +1834,6 @@ def run_script_from_url(script_url: str = Body(..., embed=True)):
             "script_url": script_url,
             "details": str(e)
         }
-    except subprocess.CalledProcessError as e:
-        print(f"[RUN-SCRIPT] Script execution error: {str(e)}")
-        print(f"[RUN-SCRIPT] Script stdout: {e.stdout}")
-        print(f"[RUN-SCRIPT] Script stderr: {e.stderr}")
-        return {
-            "status": "error",
-            "message": "Failed to execute script",
-            "details": str(e),
-            "stdout": e.stdout,
-            "stderr": e.stderr,
-            "script_url": script_url
-        }
     except Exception as e:
         print(f"[RUN-SCRIPT] Unexpected error: {str(e)}")
         return {
@@ -725,22 +1843,62 @@ def run_script_from_url(script_url: str = Body(..., embed=True)):
         }
 
 
+@app.post("/script-jobs")
+def submit_script_job(job_request: ScriptJobRequest = Body(...)):
+    """Queue a script from a given URL on the bounded script worker pool"""
+    try:
+        job = script_jobs.submit(job_request.script_url, job_request.priority, job_request.timeout)
+    except script_jobs.QueueFullError as e:
+        return JSONResponse(status_code=503, headers={"Retry-After": "30"}, content={
+            "status": "error",
+            "message": str(e),
+            "queue": script_jobs.stats()
+        })
+    
+    return JSONResponse(status_code=202, content={
+        "status": "accepted",
+        "message": "Script job queued",
+        "job_id": job.job_id,
+        "job": job.to_dict(include_output=False),
+        "note": f"Use /script-jobs/{job.job_id} to check the result"
+    })
+
+@app.get("/script-jobs")
+def list_script_jobs():
+    """List queued, running and retained script jobs"""
+    return {
+        "status": "success",
+        "queue": script_jobs.stats(),
+        "jobs": [job.to_dict(include_output=False) for job in script_jobs.list_jobs()]
+    }
 
+@app.get("/script-jobs/{job_id}")
+def get_script_job(job_id: str):
+    """Get the status and output of a script job"""
+    job = script_jobs.get_job(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={
+            "status": "error",
+            "message": f"Script job {job_id} not found"
+        })
+    
+    return {
+        "status": "success",
+        "job": job.to_dict()
+    }
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+@app.delete("/script-jobs/{job_id}")
+def cancel_script_job(job_id: str):
+    """Cancel a queued or running script job"""
+    job = script_jobs.cancel(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={
+            "status": "error",
+            "message": f"Script job {job_id} not found"
+        })
+    
+    return {
+        "status": "success",
+        "message": f"Script job is {job.status}",
+        "job": job.to_dict(include_output=False)
+    }
@@ -0,0 +1,132 @@
+import re
+from typing import Any, Dict, Literal, Optional
+import fastapi
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# From FastAPI 0.130 response models are serialized straight to JSON bytes with
+# pydantic-core, which only happens while the default response class is kept
+# (ORJSONResponse is deprecated there). Older releases run jsonable_encoder +
+# json.dumps, where orjson is the faster renderer.
+PYDANTIC_JSON_FAST_PATH_VERSION = (0, 130)
+
+
+def version_tuple(version: str) -> tuple:
+    """(major, minor, patch) of a version string, e.g. "0.130.0rc1" -> (0, 130, 0)"""
+    numbers = []
+    for part in version.split(".")[:3]:
+        match = re.match(r"\d+", part)
+        numbers.append(int(match.group()) if match else 0)
+    return tuple(numbers)
+
+
+def default_response_class(fastapi_version: str = fastapi.__version__):
+    """Response class for the app: orjson where FastAPI doesn't already serialize with pydantic-core"""
+    if orjson is None or version_tuple(fastapi_version) >= PYDANTIC_JSON_FAST_PATH_VERSION:
+        return JSONResponse
+    from fastapi.responses import ORJSONResponse
+    return ORJSONResponse
+
+
+# Error responses carry endpoint specific extras (note, raw_output, available_settings, ...)
+class ErrorResponse(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    status: Literal["error"] = "error"
+    message: str
+    details: Optional[str] = None
+    stdout: Optional[str] = None
+    stderr: Optional[str] = None
+
+
+# golemsp status
+class Earnings(BaseModel):
+    network: Optional[str] = None
+    amount_total: Optional[float] = None     # GLM
+    amount_onchain: Optional[float] = None
+    amount_polygon: Optional[float] = None
+    pending: Optional[float] = None
+    pending_count: Optional[int] = None      # Number of pending invoices
+    issued: Optional[float] = None
+    issued_count: Optional[int] = None
+
+
+class GolemStatus(BaseModel):
+    timestamp: float
+    service_status: Optional[str] = None
+    version: Optional[str] = None
+    commit: Optional[str] = None
+    date: Optional[str] = None
+    build: Optional[str] = None
+    node_name: Optional[str] = None
+    subnet: Optional[str] = None
+    vm_status: Optional[str] = None
+    earnings: Optional[Earnings] = None
+    raw_output: Optional[str] = None
+
+
+class GolemStatusResponse(BaseModel):
+    status: Literal["success"] = "success"
+    golem_status: GolemStatus
+
+
+# golemsp settings
+class GolemSettingsInfo(BaseModel):
+    raw_output: str
+    name: Optional[str] = None
+    cpu_cores: Optional[str] = None
+    memory: Optional[str] = None
+    disk: Optional[str] = None
+    account: Optional[str] = None
+    presets: Dict[str, Dict[str, float]] = {}  # Preset name -> price per usage counter (GLM)
+    timestamp: float
+
+
+class GolemSettingsResponse(BaseModel):
+    status: Literal["success"] = "success"
+    golem_settings: GolemSettingsInfo
+
+
+class EditGolemResponse(BaseModel):
+    status: Literal["success"] = "success"
+    message: str
+    updated_settings: Dict[str, Any]
+    command: str
+    output: str
+    operation: Optional[Dict[str, Any]] = None   # Lifecycle operation that ran the edit
+
+
+# Node identity
+class NodeIdentity(BaseModel):
+    nodeId: str
+    alias: Optional[str] = None
+    role: Optional[str] = None
+    deleted: Optional[bool] = None
+    isDefault: Optional[bool] = None
+    isLocked: Optional[bool] = None
+    raw_output: Optional[str] = None
+    cached_at: Optional[float] = None
+
+
+class NodeIdResponse(BaseModel):
+    status: Literal["success"] = "success"
+    message: str
+    source: Literal["cache", "api", "cli"]
+    node_data: NodeIdentity
+
+
+# Logs and uptime
+class LogResponse(BaseModel):
+    status: Literal["success"] = "success"
+    log: str
+
+
+class UptimeResponse(BaseModel):
+    status: Literal["success"] = "success"
+    uptime: str
+    timestamp: str
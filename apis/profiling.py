@@ -0,0 +1,266 @@
+import collections
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+# Debug endpoints are off unless GOLEM_API_DEBUG=1; GOLEM_API_DEBUG_TOKEN additionally
+# requires an X-Debug-Token header
+ENABLED = os.environ.get("GOLEM_API_DEBUG", "0") == "1"
+TOKEN = os.environ.get("GOLEM_API_DEBUG_TOKEN")
+
+PROFILE_MODES = ("sample", "cprofile")
+DEFAULT_SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+MAX_PROFILE_SECONDS = 300
+MAX_STACK_DEPTH = 64
+TOP_ENTRIES = 30
+MAX_SNAPSHOTS = 5
+
+_lock = threading.Lock()
+_session = None
+_snapshots = collections.OrderedDict()  # id -> (taken_at, tracemalloc.Snapshot)
+_snapshot_ids = iter(range(1, sys.maxsize))
+
+
+class ProfilingError(Exception):
+    """Raised when a session is already running, none is running or a mode is unavailable"""
+
+
+def access_error(token: str):
+    """(status code, message) when a debug request must be refused, else None"""
+    if not ENABLED:
+        return 404, "Not Found"
+    if TOKEN and not hmac.compare_digest(token or "", TOKEN):
+        return 403, "Invalid or missing X-Debug-Token"
+    return None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingSession:
+    """Periodically samples every thread's stack with sys._current_frames()"""
+
+    mode = "sample"
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.started_at = time.time()
+        self.samples = 0
+        self.stacks = collections.Counter()        # "thread;root;...;leaf" -> samples
+        self.self_counts = collections.Counter()   # Leaf function -> samples
+        self.total_counts = collections.Counter()  # Function anywhere on the stack -> samples
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.reverse()
+                self.stacks[";".join([thread_names.get(ident, str(ident))] + labels)] += 1
+                self.self_counts[labels[-1]] += 1
+                for label in set(labels):
+                    self.total_counts[label] += 1
+            self.samples += 1
+
+    def stop(self) -> dict:
+        self._stop.set()
+        self._thread.join()
+        thread_samples = sum(self.self_counts.values()) or 1
+        return {
+            "mode": self.mode,
+            "duration": time.time() - self.started_at,
+            "interval": self.interval,
+            "samples": self.samples,
+            "top_self": [{"function": label, "samples": count, "percent": round(100.0 * count / thread_samples, 2)}
+                         for label, count in self.self_counts.most_common(TOP_ENTRIES)],
+            "top_cumulative": [{"function": label, "samples": count, "percent": round(100.0 * count / thread_samples, 2)}
+                               for label, count in self.total_counts.most_common(TOP_ENTRIES)],
+            # Collapsed stacks, one "frame;frame;... count" per line (flamegraph.pl / speedscope input)
+            "collapsed_stacks": "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common(500)),
+        }
+
+
+class CProfileSession:
+    """
+    cProfile over all threads. Python 3.12+ implements cProfile with sys.monitoring,
+    which is interpreter wide; older versions only profile the calling thread.
+    """
+
+    mode = "cprofile"
+
+    def __init__(self, sort: str = "cumulative"):
+        if sys.version_info < (3, 12):
+            raise ProfilingError("cprofile mode needs Python 3.12+ to see every thread, use mode=sample")
+        self.sort = sort
+        self.started_at = time.time()
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self) -> dict:
+        self.profiler.disable()
+        output = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=output)
+        stats.sort_stats(self.sort).print_stats(TOP_ENTRIES)
+        top = []
+        for (filename, line, function), (calls, primitive_calls, total_time, cumulative_time, _) in stats.stats.items():
+            top.append({
+                "function": f"{function} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "total_time": total_time,
+                "cumulative_time": cumulative_time,
+            })
+        sort_key = "total_time" if self.sort in ("tottime", "time") else "cumulative_time"
+        top.sort(key=lambda entry: entry[sort_key], reverse=True)
+        return {
+            "mode": self.mode,
+            "duration": time.time() - self.started_at,
+            "top": top[:TOP_ENTRIES],
+            "report": output.getvalue(),
+        }
+
+
+def start_profile(mode: str = "sample", seconds: float = None, interval: float = DEFAULT_SAMPLE_INTERVAL) -> dict:
+    """Start a profiling session; with seconds it stops itself (results are kept until collected)"""
+    global _session
+    if mode not in PROFILE_MODES:
+        raise ProfilingError(f"Unknown profile mode: {mode} (expected one of {', '.join(PROFILE_MODES)})")
+    with _lock:
+        # A session that stopped itself and was never collected is dropped
+        if _session is not None and _session["result"] is None:
+            raise ProfilingError(f"A {_session['profiler'].mode} session is already running")
+        profiler = SamplingSession(max(interval, 0.001)) if mode == "sample" else CProfileSession()
+        profiler.start()
+        seconds = min(seconds or MAX_PROFILE_SECONDS, MAX_PROFILE_SECONDS)
+        timer = threading.Timer(seconds, _finish_session)
+        timer.daemon = True
+        timer.start()
+        _session = {"profiler": profiler, "timer": timer, "ends_at": time.time() + seconds, "result": None}
+    return {"mode": mode, "ends_at": _session["ends_at"]}
+
+
+def _finish_session():
+    with _lock:
+        if _session is not None and _session["result"] is None:
+            _session["result"] = _session["profiler"].stop()
+
+
+def stop_profile() -> dict:
+    """Stop the running session (or collect one that stopped itself) and return its stats"""
+    global _session
+    with _lock:
+        if _session is None:
+            raise ProfilingError("No profiling session is running")
+        session = _session
+        _session = None
+        session["timer"].cancel()
+        return session["result"] or session["profiler"].stop()
+
+
+def profile_status() -> dict:
+    with _lock:
+        if _session is None:
+            return {"running": False}
+        return {
+            "running": _session["result"] is None,
+            "mode": _session["profiler"].mode,
+            "ends_at": _session["ends_at"],
+            "finished": _session["result"] is not None,
+        }
+
+
+def start_tracemalloc(frames: int = 10) -> dict:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return tracemalloc_status()
+
+
+def stop_tracemalloc() -> dict:
+    tracemalloc.stop()
+    with _lock:
+        _snapshots.clear()
+    return tracemalloc_status()
+
+
+def _top_stats(stats: list) -> list:
+    return [{
+        "location": str(stat.traceback[0]) if stat.traceback else None,
+        "size": stat.size,
+        "count": stat.count,
+        **({"size_diff": stat.size_diff, "count_diff": stat.count_diff} if hasattr(stat, "size_diff") else {}),
+    } for stat in stats[:TOP_ENTRIES]]
+
+
+def take_snapshot(group_by: str = "lineno") -> dict:
+    """Snapshot traced allocations; the newest MAX_SNAPSHOTS are kept for diffs"""
+    if not tracemalloc.is_tracing():
+        raise ProfilingError("tracemalloc is not running, start it first")
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    with _lock:
+        snapshot_id = next(_snapshot_ids)
+        _snapshots[snapshot_id] = (time.time(), snapshot)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    stats = snapshot.statistics(group_by)
+    return {
+        "snapshot_id": snapshot_id,
+        "total_size": sum(stat.size for stat in stats),
+        "top": _top_stats(stats),
+    }
+
+
+def diff_snapshots(from_id: int, to_id: int = None, group_by: str = "lineno") -> dict:
+    """What grew between two snapshots (to_id defaults to a new snapshot)"""
+    with _lock:
+        if from_id not in _snapshots:
+            raise ProfilingError(f"Unknown snapshot: {from_id}")
+        if to_id is not None and to_id not in _snapshots:
+            raise ProfilingError(f"Unknown snapshot: {to_id}")
+        old = _snapshots[from_id][1]
+        new = _snapshots[to_id][1] if to_id is not None else None
+    if new is None:
+        to_id = take_snapshot(group_by)["snapshot_id"]
+        new = _snapshots[to_id][1]
+    stats = new.compare_to(old, group_by)
+    return {
+        "from_id": from_id,
+        "to_id": to_id,
+        "size_diff": sum(stat.size_diff for stat in stats),
+        "top": _top_stats(stats),
+    }
+
+
+def tracemalloc_status() -> dict:
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    with _lock:
+        snapshots = [{"snapshot_id": snapshot_id, "taken_at": taken_at} for snapshot_id, (taken_at, _) in _snapshots.items()]
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_memory": current,
+        "peak_traced_memory": peak,
+        "snapshots": snapshots,
+    }
@@ -0,0 +1,187 @@
+import collections
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+PROVIDER_LOG_PATH = "~/.local/share/ya-provider/ya-provider_rCURRENT.log"
+
+MAX_EVENTS = 10000          # Most recent typed events kept in memory
+MAX_OPEN_ACTIVITIES = 10000 # Activities waiting for a destroyed event
+MAX_READ_BYTES = 64 * 1024 * 1024  # Largest chunk of new log parsed per refresh
+THROUGHPUT_BUCKET = 3600    # Seconds per throughput bucket
+MAX_THROUGHPUT_BUCKETS = 168  # One week of hourly buckets
+DURATION_BUCKETS = (60, 300, 900, 1800, 3600, 7200, 21600, 86400)  # Activity duration histogram (seconds)
+
+# ya-provider log line prefix, e.g. "[2024-01-15T14:30:45.123+0100 INFO  ya_provider::market] ..."
+LOG_LINE_PATTERN = re.compile(r'^\[(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)\s+(\w+)\s+([^\]]+)\]\s*(.*)$')
+ID_PATTERN = r'\[?([0-9a-fA-Fx-]{16,})\]?'
+
+# (event type, pattern) - the first match wins, so specific patterns come first
+EVENT_PATTERNS = [
+    ("agreement_terminated", re.compile(r'agreement\s+' + ID_PATTERN + r'.*terminated|terminat\w*\s+agreement\s+' + ID_PATTERN, re.I)),
+    ("agreement_approved", re.compile(r'agreement\s+' + ID_PATTERN + r'.*approved|approved\s+agreement\s+' + ID_PATTERN, re.I)),
+    ("agreement_proposed", re.compile(r'(?:proposal|proposed|propose)\w*\s+.*?' + ID_PATTERN + r'|agreement\s+' + ID_PATTERN + r'.*proposed', re.I)),
+    ("activity_destroyed", re.compile(r'activity\s+' + ID_PATTERN + r'.*(?:destroyed|terminated)|destroy\w*\s+activity\s+' + ID_PATTERN, re.I)),
+    ("activity_created", re.compile(r'activity\s+' + ID_PATTERN + r'.*created|creat\w*\s+activity\s+' + ID_PATTERN, re.I)),
+    ("invoice_paid", re.compile(r'invoice\s+' + ID_PATTERN + r'.*(?:paid|settled|accepted)|(?:paid|settled)\s+invoice\s+' + ID_PATTERN, re.I)),
+    ("invoice_sent", re.compile(r'invoice\s+' + ID_PATTERN + r'.*(?:sent|issued)|(?:sent|issued)\s+invoice\s+' + ID_PATTERN, re.I)),
+]
+EVENT_TYPES = [event_type for event_type, _ in EVENT_PATTERNS]
+
+_lock = threading.Lock()
+_state = {
+    "inode": None,
+    "offset": 0,
+    "lines_parsed": 0,
+    "last_refresh": None,
+}
+_events = collections.deque(maxlen=MAX_EVENTS)
+_counts = collections.Counter()
+_throughput = collections.OrderedDict()  # bucket start -> Counter of event types
+_activity_started = {}                   # activity id -> start timestamp
+_durations = {"count": 0, "total": 0.0, "max": 0.0, "buckets": collections.Counter()}
+
+
+def parse_timestamp(value: str) -> float:
+    """Parse a ya-provider log timestamp into epoch seconds"""
+    value = value.replace("Z", "+0000")
+    for fmt in ("%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_line(line: str) -> dict:
+    """Turn one log line into a typed event, or None if it isn't one we track"""
+    match = LOG_LINE_PATTERN.match(line)
+    if not match:
+        return None
+    timestamp, level, module, message = match.groups()
+    for event_type, pattern in EVENT_PATTERNS:
+        event_match = pattern.search(message)
+        if event_match:
+            return {
+                "type": event_type,
+                "timestamp": parse_timestamp(timestamp),
+                "id": next((group for group in event_match.groups() if group), None),
+                "level": level,
+                "module": module.strip(),
+                "message": message.strip(),
+            }
+    return None
+
+
+def _duration_bucket(duration: float) -> str:
+    for limit in DURATION_BUCKETS:
+        if duration <= limit:
+            return f"<={limit}s"
+    return f">{DURATION_BUCKETS[-1]}s"
+
+
+def _record(event: dict):
+    """Add an event to the rolling aggregates (lock held)"""
+    _events.append(event)
+    _counts[event["type"]] += 1
+
+    timestamp = event["timestamp"] or time.time()
+    bucket = int(timestamp // THROUGHPUT_BUCKET * THROUGHPUT_BUCKET)
+    if bucket not in _throughput:
+        _throughput[bucket] = collections.Counter()
+        while len(_throughput) > MAX_THROUGHPUT_BUCKETS:
+            _throughput.popitem(last=False)
+    _throughput[bucket][event["type"]] += 1
+
+    if event["type"] == "activity_created" and event["id"]:
+        _activity_started[event["id"]] = timestamp
+        while len(_activity_started) > MAX_OPEN_ACTIVITIES:
+            del _activity_started[next(iter(_activity_started))]
+    elif event["type"] == "activity_destroyed" and event["id"] in _activity_started:
+        duration = max(timestamp - _activity_started.pop(event["id"]), 0.0)
+        event["duration"] = duration
+        _durations["count"] += 1
+        _durations["total"] += duration
+        _durations["max"] = max(_durations["max"], duration)
+        _durations["buckets"][_duration_bucket(duration)] += 1
+
+
+def refresh(log_file: str = PROVIDER_LOG_PATH) -> int:
+    """Parse lines appended to the log since the last refresh; returns the number of new events"""
+    log_file = os.path.expanduser(log_file)
+    with _lock:
+        try:
+            st = os.stat(log_file)
+        except OSError:
+            return 0
+
+        # Rotated or truncated - start from the beginning of the new file
+        if st.st_ino != _state["inode"] or st.st_size < _state["offset"]:
+            _state["inode"] = st.st_ino
+            _state["offset"] = 0
+
+        if st.st_size == _state["offset"]:
+            _state["last_refresh"] = time.time()
+            return 0
+
+        with open(log_file, "rb") as f:
+            f.seek(_state["offset"])
+            chunk = f.read(MAX_READ_BYTES)
+
+        # Only consume complete lines; a partial last line is re-read next time
+        end = chunk.rfind(b"\n") + 1
+        if end == 0 and len(chunk) == MAX_READ_BYTES:
+            # A single line longer than MAX_READ_BYTES - skip it
+            end = len(chunk)
+        new_events = 0
+        for raw_line in chunk[:end].splitlines():
+            _state["lines_parsed"] += 1
+            event = parse_line(raw_line.decode("utf-8", errors="replace"))
+            if event:
+                _record(event)
+                new_events += 1
+
+        _state["offset"] += end
+        _state["last_refresh"] = time.time()
+        return new_events
+
+
+def query_events(event_type: str = None, since: float = None, event_id: str = None, limit: int = 100) -> list:
+    """Most recent events, newest last, filtered by type, time and agreement/activity/invoice id"""
+    with _lock:
+        events = list(_events)
+    if event_type:
+        events = [e for e in events if e["type"] == event_type]
+    if since is not None:
+        events = [e for e in events if (e["timestamp"] or 0) >= since]
+    if event_id:
+        events = [e for e in events if e["id"] == event_id]
+    return events[-limit:] if limit else events
+
+
+def stats() -> dict:
+    """Event counts, hourly throughput and activity duration histogram"""
+    with _lock:
+        duration_count = _durations["count"]
+        return {
+            "log_offset": _state["offset"],
+            "lines_parsed": _state["lines_parsed"],
+            "last_refresh": _state["last_refresh"],
+            "event_counts": {event_type: _counts.get(event_type, 0) for event_type in EVENT_TYPES},
+            "throughput": [
+                {"bucket_start": bucket, "bucket_seconds": THROUGHPUT_BUCKET, **dict(counts)}
+                for bucket, counts in _throughput.items()
+            ],
+            "activity_durations": {
+                "count": duration_count,
+                "mean": _durations["total"] / duration_count if duration_count else None,
+                "max": _durations["max"] if duration_count else None,
+                "histogram": {
+                    label: _durations["buckets"].get(label, 0)
+                    for label in [f"<={limit}s" for limit in DURATION_BUCKETS] + [f">{DURATION_BUCKETS[-1]}s"]
+                },
+            },
+            "activities_in_progress": len(_activity_started),
+        }
@@ -0,0 +1,299 @@
+import collections
+import functools
+import math
+import os
+import re
+import subprocess
+import threading
+import time
+from . import executor
+from . import host_sampler
+from . import lifecycle
+
+GIB = 1024 ** 3
+
+# Controller configuration - every key can be changed at runtime via configure()
+DEFAULT_CONFIG = {
+    "enabled": os.environ.get("GOLEM_API_RESOURCE_CONTROLLER", "0") == "1",
+    "dry_run": False,             # Log decisions without calling golemsp settings set
+    "interval": 30,               # Seconds between control decisions
+    "window": 120,                # Seconds of host samples each decision looks at
+    "min_samples": 3,
+    "reserve_cores": 1,           # Cores always left to the host's own workloads
+    "reserve_memory_gib": 1.0,
+    "min_cores": 1,
+    "max_cores": None,            # Defaults to the number of logical CPUs
+    "min_memory_gib": 1.0,
+    "max_memory_gib": None,       # Defaults to total memory minus the reserve
+    "up_hysteresis_cores": 2,     # Grow only when at least this many cores are free beyond the current setting
+    "up_hysteresis_memory_gib": 2.0,
+    "max_step_cores": 2,          # Largest change applied in one step
+    "max_step_memory_gib": 4.0,
+    "down_cooldown": 60,          # Seconds after a change before shrinking again
+    "up_cooldown": 300,           # Seconds after a change before growing again
+    "quiet_window": 600,          # Host load must have stayed low this long before growing
+    "max_changes_per_hour": 6,
+}
+
+MAX_DECISIONS = 50
+
+_config = dict(DEFAULT_CONFIG)
+_state = {
+    "cores": None,
+    "memory_gib": None,
+    "last_change": 0.0,
+    "last_pressure": 0.0,   # Last time the host needed more than the current settings leave it
+    "changes": collections.deque(),
+    "last_error": None,
+}
+_decisions = collections.deque(maxlen=MAX_DECISIONS)
+_lock = threading.Lock()
+_wake_event = threading.Event()
+_thread = None
+_read_settings = None
+
+
+def parse_size_gib(value: str) -> float:
+    """Parse a golemsp size such as '9.31 GiB' or '8GB' into GiB"""
+    if value is None:
+        return None
+    match = re.match(r"\s*([\d\.]+)\s*([KMGT]i?B)?", value)
+    if not match:
+        return None
+    amount = float(match.group(1))
+    unit = (match.group(2) or "GiB").upper()
+    factors = {"KB": 1e3, "KIB": 1024, "MB": 1e6, "MIB": 1024 ** 2,
+               "GB": 1e9, "GIB": GIB, "TB": 1e12, "TIB": 1024 ** 4}
+    return amount * factors[unit] / GIB
+
+
+def _refresh_current_settings():
+    """Load the current cores/memory from golemsp settings show"""
+    settings = _read_settings()
+    _state["cores"] = int(settings["cpu_cores"]) if settings.get("cpu_cores") else None
+    _state["memory_gib"] = parse_size_gib(settings.get("memory"))
+
+
+def _clamp(value, low, high):
+    return max(low, min(value, high))
+
+
+def _step_towards(current, target, max_step):
+    if target > current:
+        return min(target, current + max_step)
+    return max(target, current - max_step)
+
+
+def decide(samples: list, now: float = None) -> dict:
+    """Work out the cores/memory the provider should sell given recent host samples"""
+    now = now or time.time()
+    config = _config
+    cpu_count = os.cpu_count() or 1
+    current_cores = _state["cores"]
+    current_memory = _state["memory_gib"]
+
+    # Size against the host's own p99 so its tail latency isn't eaten by the provider
+    host_cores_p99 = cpu_count * host_sampler.percentile([s["host_cpu_percent"] for s in samples], 99) / 100.0
+    host_memory_p99 = host_sampler.percentile([s["host_memory_used"] for s in samples], 99) / GIB
+    memory_total = samples[-1]["memory_total"] / GIB
+
+    max_cores = config["max_cores"] or cpu_count
+    max_memory = config["max_memory_gib"] or max(memory_total - config["reserve_memory_gib"], config["min_memory_gib"])
+    target_cores = _clamp(math.floor(cpu_count - host_cores_p99 - config["reserve_cores"]),
+                          config["min_cores"], max_cores)
+    target_memory = _clamp(math.floor(memory_total - host_memory_p99 - config["reserve_memory_gib"]),
+                           config["min_memory_gib"], max_memory)
+
+    decision = {
+        "timestamp": now,
+        "host_cores_p99": round(host_cores_p99, 2),
+        "host_memory_gib_p99": round(host_memory_p99, 2),
+        "current_cores": current_cores,
+        "current_memory_gib": current_memory,
+        "target_cores": target_cores,
+        "target_memory_gib": target_memory,
+        "new_cores": None,
+        "new_memory_gib": None,
+        "reason": None,
+    }
+
+    if current_cores is None or current_memory is None:
+        decision["reason"] = "current settings unknown"
+        return decision
+
+    shrink = target_cores < current_cores or target_memory < current_memory
+    if shrink:
+        _state["last_pressure"] = now
+
+    while _state["changes"] and _state["changes"][0] < now - 3600:
+        _state["changes"].popleft()
+    since_change = now - _state["last_change"]
+
+    if len(_state["changes"]) >= config["max_changes_per_hour"]:
+        decision["reason"] = "rate limited (max changes per hour reached)"
+    elif shrink:
+        if since_change < config["down_cooldown"]:
+            decision["reason"] = "host busy, waiting for down cooldown"
+        else:
+            decision["new_cores"] = _step_towards(current_cores, min(target_cores, current_cores), config["max_step_cores"])
+            decision["new_memory_gib"] = _step_towards(current_memory, min(target_memory, current_memory), config["max_step_memory_gib"])
+            decision["reason"] = "host load increased, shrinking provider"
+    else:
+        grow_cores = target_cores - current_cores >= config["up_hysteresis_cores"]
+        grow_memory = target_memory - current_memory >= config["up_hysteresis_memory_gib"]
+        if not (grow_cores or grow_memory):
+            decision["reason"] = "within hysteresis band"
+        elif since_change < config["up_cooldown"]:
+            decision["reason"] = "waiting for up cooldown"
+        elif now - _state["last_pressure"] < config["quiet_window"]:
+            decision["reason"] = "waiting for quiet window"
+        else:
+            decision["new_cores"] = _step_towards(current_cores, target_cores, config["max_step_cores"]) if grow_cores else current_cores
+            decision["new_memory_gib"] = _step_towards(current_memory, target_memory, config["max_step_memory_gib"]) if grow_memory else current_memory
+            decision["reason"] = "host idle, growing provider"
+
+    if decision["new_cores"] == current_cores and decision["new_memory_gib"] == current_memory:
+        decision["new_cores"] = decision["new_memory_gib"] = None
+    return decision
+
+
+def _set_settings(cmd: list, decision: dict) -> dict:
+    """
+    Lifecycle operation body: run golemsp settings set and return a response
+    dict. The known settings are updated here, so a later /edit-golem in the
+    queue resets them after this change rather than before.
+    """
+    try:
+        result = executor.run_command(cmd, timeout=executor.CONTROL_TIMEOUT)
+    except subprocess.CalledProcessError as e:
+        return {"status": "error", "message": "Could not update Golem settings", "details": str(e),
+                "stdout": e.stdout, "stderr": e.stderr}
+    now = time.time()
+    with _lock:
+        _state["cores"] = decision["new_cores"]
+        _state["memory_gib"] = decision["new_memory_gib"]
+        _state["last_change"] = now
+        _state["changes"].append(now)
+    return {"status": "success", "message": "Golem settings updated", "command": " ".join(cmd), "output": result.stdout}
+
+
+def apply(decision: dict) -> dict:
+    """
+    Push a decision through golemsp settings set, as an "edit" lifecycle
+    operation like /edit-golem, so it never runs in the middle of a start,
+    stop or upgrade. The step is skipped while another operation is in flight.
+    Must be called without _lock held: a queued /edit-golem resets the
+    controller's settings under it.
+    """
+    memory = f"{decision['new_memory_gib']:g}GiB"
+    cmd = ["golemsp", "settings", "set", "--cores", str(decision["new_cores"]), "--memory", memory]
+    decision["command"] = " ".join(cmd)
+    decision["applied"] = False
+    if _config["dry_run"]:
+        return decision
+    if lifecycle.busy():
+        decision["reason"] += "; skipped, a lifecycle operation is in flight"
+        return decision
+
+    operation, _ = lifecycle.submit("edit", functools.partial(_set_settings, cmd, decision),
+                                    {"cores": decision["new_cores"], "memory": memory})
+    result = operation.future.result()
+    decision["operation_id"] = operation.operation_id
+    if result.get("status") != "success":
+        raise subprocess.CalledProcessError(1, cmd, result.get("stdout"), result.get("stderr") or result.get("details"))
+    decision["applied"] = True
+    decision["output"] = result.get("output")
+    print(f"[RESOURCE-CONTROLLER] Applied: {decision['command']} ({decision['reason']})")
+    return decision
+
+
+def step():
+    """Run one control decision"""
+    samples = [s for s in host_sampler.history() if s["timestamp"] >= time.time() - _config["window"]]
+    if len(samples) < _config["min_samples"]:
+        return None
+
+    try:
+        with _lock:
+            if _state["cores"] is None or _state["memory_gib"] is None:
+                _refresh_current_settings()
+            decision = decide(samples)
+        if decision["new_cores"] is not None:
+            decision = apply(decision)
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError, KeyError) as e:
+        with _lock:
+            _state["last_error"] = str(e)
+        print(f"[RESOURCE-CONTROLLER] Control step failed: {str(e)}")
+        return None
+    with _lock:
+        _state["last_error"] = None
+        _decisions.append(decision)
+    return decision
+
+
+def _controller_loop():
+    while _config["enabled"]:
+        step()
+        _wake_event.wait(_config["interval"])
+        _wake_event.clear()
+
+
+def start(read_settings=None):
+    """Start the control loop if enabled; read_settings returns parsed golemsp settings"""
+    global _thread, _read_settings
+    if read_settings is not None:
+        _read_settings = read_settings
+    if not _config["enabled"] or (_thread is not None and _thread.is_alive()):
+        return
+    _thread = threading.Thread(target=_controller_loop, name="resource-controller", daemon=True)
+    _thread.start()
+    print(f"[RESOURCE-CONTROLLER] Started (dry_run={_config['dry_run']})")
+
+
+def stop():
+    _config["enabled"] = False
+    _wake_event.set()
+
+
+def configure(**changes) -> dict:
+    """Update controller settings and start or stop the loop accordingly"""
+    unknown = [key for key in changes if key not in DEFAULT_CONFIG]
+    if unknown:
+        raise KeyError(f"Unknown controller settings: {', '.join(unknown)}")
+    with _lock:
+        _config.update(changes)
+    # Pick up manual /edit-golem changes made while the controller was off
+    reset_current_settings()
+    if _config["enabled"]:
+        start()
+        _wake_event.set()
+    else:
+        stop()
+    return dict(_config)
+
+
+def reset_current_settings():
+    """Forget the known cores/memory so the next step re-reads golemsp settings"""
+    with _lock:
+        _state["cores"] = _state["memory_gib"] = None
+
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+
+def is_enabled() -> bool:
+    return _config["enabled"]
+
+
+def status() -> dict:
+    return {
+        "running": is_running(),
+        "config": dict(_config),
+        "current_cores": _state["cores"],
+        "current_memory_gib": _state["memory_gib"],
+        "last_change": _state["last_change"] or None,
+        "changes_last_hour": len(_state["changes"]),
+        "last_error": _state["last_error"],
+        "decisions": list(_decisions),
+    }
@@ -0,0 +1,254 @@
+import collections
+import itertools
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+import requests
+from . import script_output
+
+# Worker pool limits - keep these small so script runs can't starve compute tasks
+MAX_WORKERS = int(os.environ.get("GOLEM_API_SCRIPT_WORKERS", "2"))
+MAX_QUEUED_JOBS = int(os.environ.get("GOLEM_API_SCRIPT_QUEUE", "32"))
+MAX_RETAINED_JOBS = 100
+DEFAULT_JOB_TIMEOUT = 600  # seconds
+MAX_JOB_TIMEOUT = 3600
+DEFAULT_PRIORITY = 5  # Lower value runs first
+MIN_PRIORITY = 0
+MAX_PRIORITY = 9
+
+FINISHED_STATES = ("succeeded", "failed", "timeout", "cancelled")
+
+
+class QueueFullError(Exception):
+    """Raised when the script job queue is at capacity"""
+
+
+class ScriptJob:
+    def __init__(self, script_url: str, priority: int, timeout: float, script_text: str = None):
+        self.job_id = uuid.uuid4().hex
+        self.script_url = script_url
+        self.script_text = script_text
+        self.priority = priority
+        self.timeout = timeout
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.returncode = None
+        self.output = None
+        self.output_bytes = 0
+        self.output_truncated = False
+        self.error = None
+        self.process = None
+        self.done = threading.Event()
+
+    def to_dict(self, include_output: bool = True) -> dict:
+        data = {
+            "job_id": self.job_id,
+            "script_url": self.script_url,
+            "priority": self.priority,
+            "timeout": self.timeout,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "returncode": self.returncode,
+            "error": self.error,
+        }
+        if self.started_at:
+            data["duration"] = (self.finished_at or time.time()) - self.started_at
+        if include_output:
+            data["output"] = self.output
+            data["output_bytes"] = self.output_bytes
+            data["output_truncated"] = self.output_truncated
+        return data
+
+
+_jobs = collections.OrderedDict()
+_jobs_lock = threading.Lock()
+_queue = queue.PriorityQueue(maxsize=MAX_QUEUED_JOBS)
+_sequence = itertools.count()
+_workers = []
+
+
+def _ensure_workers():
+    with _jobs_lock:
+        if _workers:
+            return
+        for i in range(MAX_WORKERS):
+            worker = threading.Thread(target=_worker_loop, name=f"script-worker-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def _prune_finished_jobs():
+    """Drop the oldest finished jobs once more than MAX_RETAINED_JOBS are kept (lock held)"""
+    finished = [job_id for job_id, job in _jobs.items() if job.status in FINISHED_STATES]
+    for job_id in finished[:max(0, len(finished) - MAX_RETAINED_JOBS)]:
+        del _jobs[job_id]
+
+
+def _finish(job: ScriptJob, status: str):
+    job.status = status
+    job.finished_at = time.time()
+    job.process = None
+    with _jobs_lock:
+        _prune_finished_jobs()
+    job.done.set()
+    print(f"[SCRIPT-JOBS] Job {job.job_id} finished: {status}")
+
+
+def _run_job(job: ScriptJob):
+    script_text = job.script_text
+    if script_text is None:
+        try:
+            response = requests.get(job.script_url, timeout=15)
+            response.raise_for_status()
+            script_text = response.text
+        except requests.RequestException as e:
+            job.error = f"Could not download script from URL: {str(e)}"
+            _finish(job, "failed")
+            return
+
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as temp_file:
+        temp_file.write(script_text)
+        temp_script_path = temp_file.name
+    os.chmod(temp_script_path, 0o755)
+
+    tail = script_output.OutputTail()
+    timed_out = threading.Event()
+    try:
+        process = script_output.start_script(temp_script_path)
+        with _jobs_lock:
+            job.process = process
+            cancelled = job.status == "cancelling"
+        if cancelled:
+            script_output.kill_script(process)
+
+        def on_timeout():
+            timed_out.set()
+            script_output.kill_script(process)
+
+        timer = threading.Timer(job.timeout, on_timeout)
+        timer.daemon = True
+        timer.start()
+        try:
+            for line in script_output.iter_output_lines(process):
+                tail.append(line)
+            job.returncode = process.wait()
+        finally:
+            timer.cancel()
+            process.stdout.close()
+    except OSError as e:
+        job.error = f"Could not execute script: {str(e)}"
+    finally:
+        os.unlink(temp_script_path)
+
+    job.output = tail.text()
+    job.output_bytes = tail.total_bytes
+    job.output_truncated = tail.truncated
+
+    if job.status == "cancelling":
+        _finish(job, "cancelled")
+    elif timed_out.is_set():
+        job.error = f"Script exceeded timeout of {job.timeout} seconds"
+        _finish(job, "timeout")
+    elif job.returncode == 0:
+        _finish(job, "succeeded")
+    else:
+        if job.error is None:
+            job.error = f"Script exited with code {job.returncode}"
+        _finish(job, "failed")
+
+
+def _worker_loop():
+    while True:
+        _, _, job = _queue.get()
+        try:
+            # Claimed under the lock, so cancel() either sees it queued or running, never both
+            with _jobs_lock:
+                if job.status != "queued":
+                    continue
+                job.status = "running"
+                job.started_at = time.time()
+            print(f"[SCRIPT-JOBS] Running job {job.job_id} from {job.script_url}")
+            _run_job(job)
+        except Exception as e:
+            job.error = f"Unexpected error: {str(e)}"
+            _finish(job, "failed")
+        finally:
+            _queue.task_done()
+
+
+def submit(script_url: str, priority: int = DEFAULT_PRIORITY, timeout: float = None,
+           script_text: str = None) -> ScriptJob:
+    """
+    Queue a script run and return its job; raises QueueFullError when at capacity
+    and ValueError for a timeout or priority out of range
+    """
+    if timeout is not None and not 0 < timeout <= MAX_JOB_TIMEOUT:
+        raise ValueError(f"timeout must be more than 0 and at most {MAX_JOB_TIMEOUT} seconds")
+    if not MIN_PRIORITY <= priority <= MAX_PRIORITY:
+        raise ValueError(f"priority must be between {MIN_PRIORITY} and {MAX_PRIORITY}")
+    timeout = timeout or DEFAULT_JOB_TIMEOUT
+    job = ScriptJob(script_url, priority, timeout, script_text)
+    _ensure_workers()
+    with _jobs_lock:
+        try:
+            _queue.put_nowait((priority, next(_sequence), job))
+        except queue.Full:
+            raise QueueFullError(f"Script job queue is full ({MAX_QUEUED_JOBS} jobs)")
+        _jobs[job.job_id] = job
+    print(f"[SCRIPT-JOBS] Queued job {job.job_id} (priority {priority}, timeout {timeout}s)")
+    return job
+
+
+def get_job(job_id: str) -> ScriptJob:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs() -> list:
+    with _jobs_lock:
+        return list(_jobs.values())
+
+
+def cancel(job_id: str) -> ScriptJob:
+    """Cancel a queued or running job; returns None if the job is unknown"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        previous = job.status
+        process = None
+        if previous == "queued":
+            job.status = "cancelled"    # The worker skips it when it comes off the queue
+        elif previous == "running":
+            job.status = "cancelling"
+            process = job.process       # None until started; the worker then kills it itself
+    if previous == "queued":
+        _finish(job, "cancelled")
+    elif process is not None and process.poll() is None:
+        script_output.kill_script(process)
+    return job
+
+
+def workers_alive() -> tuple:
+    """(started, alive) worker thread counts; workers are started on the first job"""
+    return len(_workers), sum(1 for worker in _workers if worker.is_alive())
+
+
+def stats() -> dict:
+    jobs = list_jobs()
+    counts = collections.Counter(job.status for job in jobs)
+    return {
+        "workers": MAX_WORKERS,
+        "max_queued_jobs": MAX_QUEUED_JOBS,
+        "queued": counts.get("queued", 0),
+        "running": counts.get("running", 0) + counts.get("cancelling", 0),
+        "retained_jobs": len(jobs),
+        "by_status": dict(counts),
+    }
@@ -0,0 +1,132 @@
+import collections
+import json
+import os
+import subprocess
+import threading
+from . import executor
+
+# Limits for script output held in memory on the server
+MAX_OUTPUT_BYTES = 1024 * 1024  # Tail of the output kept for logging/results
+MAX_LINE_BYTES = 64 * 1024      # Longer lines are split into several chunks
+
+STREAM_MODES = ("text", "sse")
+
+
+class OutputTail:
+    """Keep the last MAX_OUTPUT_BYTES of a script's output"""
+
+    def __init__(self, limit: int = MAX_OUTPUT_BYTES):
+        self.limit = limit
+        self.lines = collections.deque()
+        self.size = 0
+        self.total_bytes = 0
+        self.truncated = False
+
+    def append(self, line: bytes):
+        self.lines.append(line)
+        self.size += len(line)
+        self.total_bytes += len(line)
+        while self.size > self.limit and len(self.lines) > 1:
+            self.size -= len(self.lines.popleft())
+            self.truncated = True
+
+    def text(self) -> str:
+        return b"".join(self.lines).decode("utf-8", errors="replace")
+
+
+def start_script(script_path: str) -> subprocess.Popen:
+    """Start a bash script in its own process group with stderr merged into a piped stdout"""
+    return subprocess.Popen(["bash", script_path],
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT,
+                            start_new_session=True)
+
+
+def kill_script(process: subprocess.Popen):
+    """Kill a script started with start_script() along with any children it spawned"""
+    executor.kill_process_group(process)
+
+
+def iter_output_lines(process: subprocess.Popen):
+    """Yield raw output lines (bytes) from a running process as they are produced"""
+    while True:
+        line = process.stdout.readline(MAX_LINE_BYTES)
+        if not line:
+            break
+        yield line
+
+
+def format_sse(data: str, event: str = None) -> str:
+    """Format a single Server-Sent Events message"""
+    message = f"event: {event}\n" if event else ""
+    for data_line in data.split("\n"):
+        message += f"data: {data_line}\n"
+    return message + "\n"
+
+
+def stream_script(script_path: str, tag: str, mode: str = "text", timeout: float = None):
+    """
+    Run a script and yield its output line by line, as plain text chunks
+    or as SSE messages. The script is killed after timeout seconds
+    (default: executor.SCRIPT_TIMEOUT). The temp script file is removed once
+    the script exits or the client disconnects.
+    """
+    timeout = timeout or executor.SCRIPT_TIMEOUT
+    tail = OutputTail()
+    process = None
+    timed_out = threading.Event()
+    timer = None
+    try:
+        print(f"[{tag}] Streaming script output ({mode})...")
+        process = start_script(script_path)
+
+        def on_timeout():
+            timed_out.set()
+            kill_script(process)
+
+        timer = threading.Timer(timeout, on_timeout)
+        timer.daemon = True
+        timer.start()
+
+        for line in iter_output_lines(process):
+            tail.append(line)
+            if mode == "sse":
+                yield format_sse(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+            else:
+                yield line
+
+        returncode = process.wait()
+        timer.cancel()
+        if timed_out.is_set():
+            print(f"[{tag}] Script exceeded timeout of {timeout:g} seconds and was killed")
+        else:
+            print(f"[{tag}] Script exited with code {returncode} ({tail.total_bytes} bytes of output)")
+        print(f"[{tag}] Script output (tail): {tail.text().strip()}")
+
+        summary = {
+            "returncode": returncode,
+            "status": "timeout" if timed_out.is_set() else ("success" if returncode == 0 else "error"),
+            "output_bytes": tail.total_bytes,
+            "output_truncated": tail.truncated,
+        }
+        if timed_out.is_set():
+            summary["error"] = f"Script exceeded timeout of {timeout:g} seconds"
+        if mode == "sse":
+            yield format_sse(json.dumps(summary), event="exit")
+        else:
+            if timed_out.is_set():
+                yield f"\n[{summary['error']}]".encode()
+            yield f"\n[exit code {returncode}]\n".encode()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        # Client disconnected before the script finished
+        if process is not None and process.poll() is None:
+            print(f"[{tag}] Client disconnected, terminating script")
+            kill_script(process)
+            process.wait()
+        if process is not None:
+            process.stdout.close()
+        if os.path.exists(script_path):
+            os.unlink(script_path)
+            print(f"[{tag}] Cleaned up temp file: {script_path}")
@@ -0,0 +1,374 @@
+import collections
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from . import provider_events
+from . import status_feed
+
+# Event driven provider state on Linux: inotify on the data directories and
+# pidfd (or /proc) exit notifications for the provider processes, instead of
+# waiting for the next golemsp status poll
+ENABLED = os.environ.get("GOLEM_API_WATCHER", "1") == "1"
+PROC_PATH = "/proc"
+DATA_PARENT = "~/.local/share"
+DATA_DIRS = ("yagna", "ya-provider")    # Logs, lock and socket files
+PROVIDER_LOG_NAME = "ya-provider_rCURRENT.log"
+# Files whose creation or removal means a service started or stopped; everything
+# else in the data dirs (SQLite databases and their -wal/-shm files) is ignored
+STATE_FILE_SUFFIXES = (".lock", ".pid", ".sock", ".ipc")
+
+# (executable name, subcommand) of the long-running provider processes;
+# short-lived "golemsp status" calls don't count
+PROCESSES = (("golemsp", "run"), ("yagna", "service"), ("ya-provider", "run"))
+
+DEBOUNCE = 0.05          # Seconds to coalesce a burst of file events into one refresh
+RESCAN_INTERVAL = 60     # Safety net /proc scan for processes started without any file event
+LOG_RESCAN_INTERVAL = 1  # Log writes trigger a /proc scan at most this often while a process is missing
+PROC_POLL_INTERVAL = 1   # Exit check interval when pidfd_open isn't available
+EXPECTED_STOP_WINDOW = 180  # Exits this soon after expect_stop() are stops, not crashes
+MAX_EVENTS = 1000
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+DIR_MASK = IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+STATE_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+PARENT_MASK = IN_CREATE | IN_MOVED_TO | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+_lock = threading.Lock()
+_processes = {}   # name -> {"pid", "detected_at"}
+_events = collections.deque(maxlen=MAX_EVENTS)
+_counters = collections.Counter()
+_state = {"expected_stop_at": None, "last_event_at": None, "pidfd": False, "last_error": None}
+_stop_event = threading.Event()
+_thread = None
+_wake_fds = None
+
+
+class Inotify:
+    """Minimal inotify binding over libc with ctypes"""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.watches = {}  # wd -> path
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()), path)
+        self.watches[wd] = path
+        return wd
+
+    def read(self) -> list:
+        """Pending events as (watched path, mask, name)"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                path = self.watches.get(wd)
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                if path is not None:
+                    events.append((path, mask, name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+def is_supported() -> bool:
+    return sys.platform.startswith("linux") and os.path.isdir(PROC_PATH)
+
+
+def _match_process(pid: str) -> str:
+    try:
+        with open(os.path.join(PROC_PATH, pid, "cmdline"), "rb") as f:
+            args = [arg.decode(errors="replace") for arg in f.read().split(b"\0") if arg]
+    except OSError:
+        return None
+    if len(args) < 2:
+        return None
+    executable = os.path.basename(args[0])
+    for name, subcommand in PROCESSES:
+        if executable == name and subcommand in args[1:]:
+            return name
+    return None
+
+
+def scan_processes() -> dict:
+    """name -> pid of the provider processes currently running"""
+    found = {}
+    try:
+        pids = [name for name in os.listdir(PROC_PATH) if name.isdigit()]
+    except OSError:
+        return found
+    for pid in pids:
+        name = _match_process(pid)
+        if name and name not in found:
+            found[name] = int(pid)
+    return found
+
+
+def _record(event_type: str, **details):
+    now = time.time()
+    with _lock:
+        _events.append({"type": event_type, "timestamp": now, **details})
+        _counters[event_type] += 1
+        _state["last_event_at"] = now
+
+
+def expect_stop():
+    """Called before stopping the provider so the exits that follow aren't reported as crashes"""
+    _state["expected_stop_at"] = time.time()
+
+
+def _open_pidfd(pid: int):
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None  # Exited already, or the kernel is older than 5.3
+
+
+class _Watcher:
+    def __init__(self, wake_fd: int):
+        self.inotify = Inotify()
+        self.poller = select.poll()
+        self.poller.register(self.inotify.fd, select.POLLIN)
+        self.poller.register(wake_fd, select.POLLIN)
+        self.wake_fd = wake_fd
+        self.pidfds = {}      # fd -> (name, pid)
+        self.data_parent = os.path.expanduser(DATA_PARENT)
+        self.last_scan = 0.0
+
+    def watch_dirs(self):
+        """Watch the data dirs that exist, and their parent so dirs created later are picked up"""
+        if self.data_parent not in self.inotify.watches.values() and os.path.isdir(self.data_parent):
+            self.inotify.add_watch(self.data_parent, PARENT_MASK)
+        watched = set(self.inotify.watches.values())
+        for name in DATA_DIRS:
+            path = os.path.join(self.data_parent, name)
+            if path not in watched and os.path.isdir(path):
+                self.inotify.add_watch(path, DIR_MASK)
+
+    def rescan(self):
+        """Pick up started processes and track their exits"""
+        self.last_scan = time.monotonic()
+        found = scan_processes()
+        with _lock:
+            known = {name: info["pid"] for name, info in _processes.items()}
+        changed = False
+        for name, pid in found.items():
+            if known.get(name) == pid:
+                continue
+            with _lock:
+                _processes[name] = {"pid": pid, "detected_at": time.time()}
+            _record("start", process=name, pid=pid)
+            print(f"[WATCHER] {name} started (pid {pid})")
+            pidfd = _open_pidfd(pid)
+            if pidfd is not None:
+                self.pidfds[pidfd] = (name, pid)
+                self.poller.register(pidfd, select.POLLIN)
+            changed = True
+        return changed
+
+    def process_exited(self, name: str, pid: int):
+        with _lock:
+            if _processes.get(name, {}).get("pid") == pid:
+                del _processes[name]
+        expected_at = _state["expected_stop_at"]
+        event_type = "stop" if expected_at and time.time() - expected_at < EXPECTED_STOP_WINDOW else "crash"
+        _record(event_type, process=name, pid=pid)
+        print(f"[WATCHER] {name} (pid {pid}) {'stopped' if event_type == 'stop' else 'exited unexpectedly'}")
+
+    def check_pidfds(self, ready: set) -> bool:
+        exited = False
+        for fd in [fd for fd in self.pidfds if fd in ready]:
+            name, pid = self.pidfds.pop(fd)
+            self.poller.unregister(fd)
+            os.close(fd)
+            self.process_exited(name, pid)
+            exited = True
+        return exited
+
+    def check_proc(self) -> bool:
+        """Exit detection for processes without a pidfd"""
+        tracked_by_pidfd = {pid for _, pid in self.pidfds.values()}
+        with _lock:
+            untracked = [(name, info["pid"]) for name, info in _processes.items() if info["pid"] not in tracked_by_pidfd]
+        exited = False
+        for name, pid in untracked:
+            if not os.path.exists(os.path.join(PROC_PATH, str(pid))):
+                self.process_exited(name, pid)
+                exited = True
+        return exited
+
+    def handle_inotify(self) -> tuple:
+        """Returns (state may have changed, provider log grew)"""
+        state_changed = log_grew = False
+        for path, mask, name in self.inotify.read():
+            if path == self.data_parent:
+                if name in DATA_DIRS:
+                    self.watch_dirs()
+                    state_changed = True
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                state_changed = True
+                continue
+            if name.endswith(".log") and mask & IN_MODIFY:
+                with _lock:
+                    _counters["log_growth"] += 1
+                    missing = len(_processes) < len(PROCESSES)
+                log_grew = log_grew or name == PROVIDER_LOG_NAME
+                # A starting provider writes its logs before anything else shows up
+                if missing and time.monotonic() - self.last_scan >= LOG_RESCAN_INTERVAL:
+                    state_changed = True
+                continue
+            if not mask & STATE_MASK:
+                continue    # Writes to databases and other files say nothing about the services
+            # Lock, pid and socket files appear and disappear as the services start and stop;
+            # log rotation renames and creates logs
+            if name.endswith(STATE_FILE_SUFFIXES) or ".log" in name:
+                state_changed = True
+        return state_changed, log_grew
+
+    def run(self):
+        self.watch_dirs()
+        self.rescan()
+        status_feed.request_refresh()
+        pending_since = None
+        pending = {"state": False, "log": False}
+        while not _stop_event.is_set():
+            if pending_since is not None:
+                timeout = max(DEBOUNCE - (time.monotonic() - pending_since), 0)
+            else:
+                timeout = max(RESCAN_INTERVAL - (time.monotonic() - self.last_scan), 0)
+            with _lock:
+                without_pidfd = len(_processes) > len(self.pidfds)
+            if without_pidfd:
+                timeout = min(timeout, PROC_POLL_INTERVAL)
+            ready = {fd for fd, _ in self.poller.poll(timeout * 1000)}
+
+            if self.wake_fd in ready:
+                os.read(self.wake_fd, 64)
+                break
+            if self.inotify.fd in ready:
+                state_changed, log_grew = self.handle_inotify()
+                pending["state"] = pending["state"] or state_changed
+                pending["log"] = pending["log"] or log_grew
+                if (state_changed or log_grew) and pending_since is None:
+                    pending_since = time.monotonic()
+            # Exits are acted on right away
+            if self.check_pidfds(ready) | self.check_proc():
+                status_feed.request_refresh()
+
+            if pending_since is not None and time.monotonic() - pending_since >= DEBOUNCE:
+                if pending["state"]:
+                    self.rescan()
+                    status_feed.request_refresh()
+                if pending["log"]:
+                    provider_events.refresh()
+                pending_since = None
+                pending = {"state": False, "log": False}
+            elif time.monotonic() - self.last_scan >= RESCAN_INTERVAL:
+                if self.rescan():
+                    status_feed.request_refresh()
+
+    def close(self):
+        for fd in self.pidfds:
+            os.close(fd)
+        self.pidfds.clear()
+        self.inotify.close()
+
+
+def _watch_loop():
+    watcher = None
+    try:
+        watcher = _Watcher(_wake_fds[0])
+        _state["pidfd"] = hasattr(os, "pidfd_open")
+        status_feed.set_event_driven(True)
+        watcher.run()
+    except OSError as e:
+        _state["last_error"] = str(e)
+        print(f"[WATCHER] Stopped: {str(e)}")
+    finally:
+        status_feed.set_event_driven(False)
+        if watcher is not None:
+            watcher.close()
+
+
+def start():
+    """Start the watcher thread on Linux unless GOLEM_API_WATCHER=0"""
+    global _thread, _wake_fds
+    if not is_enabled() or (_thread is not None and _thread.is_alive()):
+        return
+    _stop_event.clear()
+    if _wake_fds is None:
+        _wake_fds = os.pipe()
+    _thread = threading.Thread(target=_watch_loop, name="state-watcher", daemon=True)
+    _thread.start()
+    print(f"[WATCHER] Watching {', '.join(DATA_DIRS)} and provider processes")
+
+
+def stop():
+    _stop_event.set()
+    if _wake_fds is not None:
+        os.write(_wake_fds[1], b"x")
+
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+
+def is_enabled() -> bool:
+    return ENABLED and is_supported()
+
+
+def processes() -> dict:
+    with _lock:
+        return {name: dict(info) for name, info in _processes.items()}
+
+
+def recent_events(limit: int = 100) -> list:
+    with _lock:
+        return list(_events)[-limit:]
+
+
+def stats() -> dict:
+    with _lock:
+        counters = dict(_counters)
+    return {
+        "enabled": is_enabled(),
+        "running": is_running(),
+        "pidfd": _state["pidfd"],
+        "processes": processes(),
+        "counters": counters,
+        "last_event_at": _state["last_event_at"],
+        "last_error": _state["last_error"],
+    }
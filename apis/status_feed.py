@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from . import tracing
+
+# Poll golemsp status this often while someone is subscribed, and less often otherwise
+ACTIVE_INTERVAL = float(os.environ.get("GOLEM_API_STATUS_INTERVAL", "5"))
+IDLE_INTERVAL = float(os.environ.get("GOLEM_API_STATUS_IDLE_INTERVAL", "30"))
+# Idle interval while the state watcher triggers refreshes on provider changes
+WATCHED_IDLE_INTERVAL = float(os.environ.get("GOLEM_API_STATUS_WATCHED_INTERVAL", "300"))
+HEARTBEAT_INTERVAL = 15
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_lock = threading.Lock()
+_wake_event = threading.Event()
+_stop_event = threading.Event()
+_state = {
+    "snapshot": None,
+    "updated_at": None,   # Last time golemsp status was read
+    "changed_at": None,   # Last time the snapshot changed
+    "version": 0,
+    "last_error": None,
+    "event_driven": False,
+}
+_subscribers = set()
+_listeners = []
+_thread = None
+_fetch_status = None
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def diff_snapshots(old: dict, new: dict) -> dict:
+    """Top-level fields that changed or were removed between two snapshots"""
+    old = old or {}
+    return {
+        "changed": {key: value for key, value in new.items() if old.get(key) != value or key not in old},
+        "removed": [key for key in old if key not in new],
+    }
+
+
+def _deliver(queue: asyncio.Queue, message: str):
+    """Runs on the subscriber's event loop"""
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        # Slow consumer - drop what it hasn't read and resync with a full snapshot
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(format_sse("snapshot", current()))
+
+
+def _broadcast(message: str):
+    with _lock:
+        subscribers = list(_subscribers)
+    for loop, queue in subscribers:
+        try:
+            loop.call_soon_threadsafe(_deliver, queue, message)
+        except RuntimeError:
+            pass  # Subscriber's loop is closed
+
+
+def add_listener(listener):
+    """listener(snapshot, timestamp) is called with every status reading, changed or not"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def publish(snapshot: dict):
+    """Store a new status snapshot and push a diff to subscribers if anything changed"""
+    now = time.time()
+    for listener in _listeners:
+        try:
+            listener(snapshot, now)
+        except Exception as e:
+            print(f"[STATUS-FEED] Listener {getattr(listener, '__name__', listener)} failed: {str(e)}")
+    with _lock:
+        previous = _state["snapshot"]
+        _state["updated_at"] = now
+        if snapshot == previous:
+            return
+        _state["snapshot"] = snapshot
+        _state["changed_at"] = now
+        _state["version"] += 1
+        version = _state["version"]
+    diff = diff_snapshots(previous, snapshot)
+    _broadcast(format_sse("diff", {"version": version, "timestamp": now, **diff}))
+
+
+def refresh():
+    """Read golemsp status once and publish it"""
+    try:
+        snapshot = _fetch_status()
+        _state["last_error"] = None
+    except Exception as e:
+        snapshot = {"error": str(e)}
+        _state["last_error"] = str(e)
+    publish(snapshot)
+
+
+def request_refresh():
+    """Wake the producer so it reads the status now instead of at the next interval"""
+    _wake_event.set()
+
+
+def set_event_driven(event_driven: bool):
+    """The state watcher calls request_refresh() on changes, so idle polling can slow down"""
+    _state["event_driven"] = event_driven
+
+
+def idle_interval() -> float:
+    return WATCHED_IDLE_INTERVAL if _state["event_driven"] else IDLE_INTERVAL
+
+
+def _producer_loop():
+    while not _stop_event.is_set():
+        refresh()
+        with _lock:
+            interval = ACTIVE_INTERVAL if _subscribers else idle_interval()
+        _wake_event.wait(interval)
+        _wake_event.clear()
+
+
+def start(fetch_status):
+    """Start the single status producer; fetch_status returns a parsed golemsp status dict"""
+    global _thread, _fetch_status
+    _fetch_status = fetch_status
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop_event.clear()
+    _thread = threading.Thread(target=_producer_loop, name="status-feed", daemon=True)
+    _thread.start()
+
+
+def stop():
+    _stop_event.set()
+    _wake_event.set()
+
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+
+@tracing.timed("cache", "status feed")
+def current() -> dict:
+    with _lock:
+        return {
+            "version": _state["version"],
+            "updated_at": _state["updated_at"],
+            "changed_at": _state["changed_at"],
+            "status": _state["snapshot"],
+        }
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "running": is_running(),
+            "subscribers": len(_subscribers),
+            "version": _state["version"],
+            "updated_at": _state["updated_at"],
+            "changed_at": _state["changed_at"],
+            "last_error": _state["last_error"],
+            "event_driven": _state["event_driven"],
+            "idle_interval": idle_interval(),
+        }
+
+
+async def subscribe():
+    """SSE stream: one full snapshot, then diffs as the status changes, with heartbeats"""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    subscriber = (loop, queue)
+    with _lock:
+        _subscribers.add(subscriber)
+    # Switch the producer to the active interval right away
+    request_refresh()
+    try:
+        yield format_sse("snapshot", current())
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield f": heartbeat {time.time()}\n\n"
+                continue
+            yield message
+    finally:
+        with _lock:
+            _subscribers.discard(subscriber)
@@ -0,0 +1,249 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import heapq
+import os
+import threading
+import time
+from collections import deque
+from fastapi.routing import APIRoute
+
+# Off by default; with tracing off a span costs one context variable lookup
+DEFAULT_CONFIG = {
+    "enabled": os.environ.get("GOLEM_API_TRACING", "0") == "1",
+    "slow_threshold": float(os.environ.get("GOLEM_API_TRACING_SLOW_THRESHOLD", "1.0")),  # Seconds
+    "keep_slowest": int(os.environ.get("GOLEM_API_TRACING_KEEP", "50")),
+    "server_timing": True,    # Send the spans back as a Server-Timing header
+}
+MAX_SPANS = 100               # Per request; later spans are only counted
+RECENT_SLOW = 100             # Most recent requests over slow_threshold
+UNTRACED_MEDIA_TYPES = (b"text/event-stream",)  # Subscriptions stay open, they aren't slow requests
+
+_config = dict(DEFAULT_CONFIG)
+_current = contextvars.ContextVar("golem_api_trace", default=None)
+_lock = threading.Lock()
+_slowest = []                 # Min-heap of (duration, sequence, record)
+_recent_slow = deque(maxlen=RECENT_SLOW)
+_counters = {"traced": 0, "slow": 0, "dropped_spans": 0}
+_sequence = 0
+_noop = contextlib.nullcontext()
+
+
+class Trace:
+    """Spans of one request; shared with the threads the request runs in"""
+
+    __slots__ = ("method", "path", "started", "started_at", "spans", "dropped", "endpoint_done")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans = []       # (name, detail, start offset, duration)
+        self.dropped = 0
+        self.endpoint_done = None
+
+    def add(self, name: str, detail, started: float, ended: float):
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append((name, detail, started - self.started, ended - started))
+
+    def breakdown(self, response_started: float) -> dict:
+        """name -> (total seconds, count); endpoint and encode come from the route wrapper"""
+        totals = {}
+        for name, _, _, duration in self.spans:
+            total, count = totals.get(name, (0.0, 0))
+            totals[name] = (total + duration, count + 1)
+        if self.endpoint_done is not None:
+            totals["endpoint"] = (self.endpoint_done - self.started, 1)
+            totals["encode"] = (max(response_started - self.endpoint_done, 0.0), 1)
+        totals["total"] = (response_started - self.started, 1)
+        return totals
+
+
+class _Span:
+    __slots__ = ("trace", "name", "detail", "started")
+
+    def __init__(self, trace: Trace, name: str, detail):
+        self.trace = trace
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.add(self.name, self.detail, self.started, time.perf_counter())
+        return False
+
+
+def span(name: str, detail: str = None):
+    """Context manager timing part of the current request, e.g. span("subprocess", "golemsp")"""
+    trace = _current.get()
+    if trace is None:
+        return _noop
+    return _Span(trace, name, detail)
+
+
+def timed(name: str, detail: str = None):
+    """Decorator: record every call of the function as a span of the current request"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with _Span(trace, name, detail or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _mark_endpoint_done(endpoint):
+    """Wrap an endpoint so the trace knows when it returned; the rest until the response starts is encoding"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                trace = _current.get()
+                if trace is not None:
+                    trace.endpoint_done = time.perf_counter()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                trace = _current.get()
+                if trace is not None:
+                    trace.endpoint_done = time.perf_counter()
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """Route class that separates endpoint time from response validation and encoding"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
+
+
+def server_timing(totals: dict) -> bytes:
+    entries = []
+    for name, (total, count) in totals.items():
+        entry = f"{name};dur={total * 1000:.2f}"
+        if count > 1:
+            entry += f';desc="{count} calls"'
+        entries.append(entry)
+    return ", ".join(entries).encode()
+
+
+def _record(trace: Trace, status_code: int, response_started: float, finished: float):
+    global _sequence
+    duration = finished - trace.started
+    totals = trace.breakdown(response_started)
+    record = {
+        "method": trace.method,
+        "path": trace.path,
+        "status_code": status_code,
+        "started_at": trace.started_at,
+        "duration": duration,
+        "response_start": response_started - trace.started,
+        "breakdown": {name: {"duration": total, "count": count} for name, (total, count) in totals.items()},
+        "spans": [
+            {"name": name, "detail": detail, "start": start, "duration": span_duration}
+            for name, detail, start, span_duration in trace.spans
+        ],
+        "dropped_spans": trace.dropped,
+    }
+    with _lock:
+        _counters["traced"] += 1
+        _counters["dropped_spans"] += trace.dropped
+        _sequence += 1
+        keep = _config["keep_slowest"]
+        if len(_slowest) < keep:
+            heapq.heappush(_slowest, (duration, _sequence, record))
+        elif keep and duration > _slowest[0][0]:
+            heapq.heapreplace(_slowest, (duration, _sequence, record))
+        if duration >= _config["slow_threshold"]:
+            _counters["slow"] += 1
+            _recent_slow.append(record)
+
+
+class TracingMiddleware:
+    """ASGI middleware that traces each request and adds a Server-Timing header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _config["enabled"]:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], scope["path"])
+        token = _current.set(trace)
+        response = {"status_code": None, "started": None, "untraced": False}
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                response["started"] = time.perf_counter()
+                response["status_code"] = message["status"]
+                headers = list(message.get("headers", []))
+                for key, value in headers:
+                    if key.lower() == b"content-type" and value.startswith(UNTRACED_MEDIA_TYPES):
+                        response["untraced"] = True
+                if _config["server_timing"]:
+                    headers.append((b"server-timing", server_timing(trace.breakdown(response["started"]))))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            _current.reset(token)
+            if response["started"] is not None and not response["untraced"]:
+                _record(trace, response["status_code"], response["started"], time.perf_counter())
+
+
+def configure(**changes):
+    with _lock:
+        _config.update(changes)
+        while len(_slowest) > _config["keep_slowest"]:
+            heapq.heappop(_slowest)
+
+
+def is_enabled() -> bool:
+    return _config["enabled"]
+
+
+def slow_requests(limit: int = 20, path: str = None, recent: bool = False) -> list:
+    """The slowest traced requests (or, with recent, the latest ones over the slow threshold)"""
+    with _lock:
+        if recent:
+            records = list(reversed(_recent_slow))
+        else:
+            records = [record for _, _, record in sorted(_slowest, key=lambda entry: entry[:2], reverse=True)]
+    if path is not None:
+        records = [record for record in records if record["path"] == path]
+    return records[:limit]
+
+
+def clear():
+    with _lock:
+        _slowest.clear()
+        _recent_slow.clear()
+
+
+def status() -> dict:
+    with _lock:
+        return {
+            "config": dict(_config),
+            **_counters,
+            "slowest_kept": len(_slowest),
+            "recent_slow_kept": len(_recent_slow),
+        }
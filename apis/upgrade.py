@@ -0,0 +1,284 @@
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from . import artifact_mirror
+from . import executor
+from . import host_probe
+
+STAGING_DIR = "~/.local/share/golem-api/staging"
+HEALTH_TIMEOUT = 120       # Seconds the new version has to report "is running"
+HEALTH_POLL_INTERVAL = 2
+VERSION_PATTERN = re.compile(r"(\d+\.\d+\.\d+)")
+
+_lock = threading.Lock()
+_state = {
+    "in_progress": False,
+    "staged": {},        # version -> staging info
+    "last_result": None,
+}
+
+
+class UpgradeError(Exception):
+    """Raised when staging fails or another upgrade is already running"""
+
+
+def staging_dir(version: str) -> str:
+    return os.path.join(os.path.expanduser(STAGING_DIR), version)
+
+
+def install_dir() -> str:
+    """Directory holding the golemsp currently in use"""
+    golem_path = host_probe.find_golemsp()
+    if golem_path:
+        return os.path.dirname(os.path.realpath(golem_path))
+    return os.path.expanduser(artifact_mirror.INSTALL_DIRS["provider"])
+
+
+def plugins_dir() -> str:
+    """Runtime plugins (ya-runtime-vm, ya-runtime-wasi and their descriptors) used by the provider"""
+    return os.path.expanduser(artifact_mirror.INSTALL_DIRS["runtime"])
+
+
+def _plugins_copy(suffix: str) -> str:
+    """.plugins.<suffix> next to the live plugins dir, so swapping them is a rename"""
+    return os.path.join(os.path.dirname(plugins_dir()), f".plugins.{suffix}")
+
+
+def read_binary_version(golemsp_path: str) -> str:
+    result = executor.run_command([golemsp_path, "--version"])
+    match = VERSION_PATTERN.search(result.stdout)
+    return match.group(1) if match else None
+
+
+def stage(version: str, artifact: str = None) -> dict:
+    """
+    Prepare an upgrade while the current version keeps running: mirror the
+    release, unpack it, check the new golemsp runs and reports the expected
+    version, and copy the new binaries next to the old ones, ready to be
+    renamed into place.
+    """
+    version = version.lstrip("v")
+    started = time.time()
+    if artifact is None:
+        artifact = artifact_mirror.add_from_url(artifact_mirror.release_url("provider", version), "provider")["name"]
+
+    target = staging_dir(version)
+    shutil.rmtree(target, ignore_errors=True)
+    files = [name for name in artifact_mirror.extract(artifact, target)
+             if "/" not in name and os.path.isfile(os.path.join(target, name))]
+    if "golemsp" not in files:
+        raise UpgradeError(f"Artifact {artifact} contains no golemsp binary")
+
+    staged_version = read_binary_version(os.path.join(target, "golemsp"))
+    if staged_version != version:
+        raise UpgradeError(f"Staged golemsp reports version {staged_version}, expected {version}")
+
+    # Copy next to the live binaries now, so the swap itself is only renames.
+    # Each version has its own copies, so staging another version doesn't replace these
+    suffix = f"upgrade-{version}"
+    binaries_dir = install_dir()
+    os.makedirs(binaries_dir, exist_ok=True)
+    for name in files:
+        shutil.copy2(os.path.join(target, name), os.path.join(binaries_dir, f".{name}.{suffix}"))
+
+    # The runtimes in plugins/ have to match the new exe-unit, so they are swapped along with it
+    plugins = None
+    if os.path.isdir(os.path.join(target, "plugins")):
+        staged_plugins = _plugins_copy(suffix)
+        os.makedirs(os.path.dirname(staged_plugins), exist_ok=True)
+        shutil.rmtree(staged_plugins, ignore_errors=True)
+        shutil.copytree(os.path.join(target, "plugins"), staged_plugins, symlinks=True)
+        plugins = sorted(os.listdir(staged_plugins))
+
+    staged = {
+        "version": version,
+        "artifact": artifact,
+        "suffix": suffix,
+        "files": files,
+        "plugins": plugins,
+        "install_dir": binaries_dir,
+        "plugins_dir": plugins_dir() if plugins is not None else None,
+        "staged_at": time.time(),
+        "stage_time": time.time() - started,
+    }
+    with _lock:
+        _state["staged"][version] = staged
+    print(f"[UPGRADE] Staged golem {version} ({len(files)} binaries, {len(plugins or [])} plugins) in {staged['stage_time']:.1f}s")
+    return staged
+
+
+def _swap(binaries_dir: str, files: list, suffix: str):
+    for name in files:
+        staged_path = os.path.join(binaries_dir, f".{name}.{suffix}")
+        if os.path.exists(staged_path):
+            os.replace(staged_path, os.path.join(binaries_dir, name))
+
+
+def _swap_plugins(incoming: str, keep_as: str = None):
+    """
+    Rename .plugins.<incoming> into place. The replaced tree is kept as
+    .plugins.<keep_as> for a rollback, or deleted without keep_as.
+    """
+    live = plugins_dir()
+    incoming_path = _plugins_copy(incoming)
+    if not os.path.isdir(incoming_path):
+        return
+    if keep_as:
+        # A tree kept by an earlier upgrade must not be mistaken for this one's
+        shutil.rmtree(_plugins_copy(keep_as), ignore_errors=True)
+    if os.path.exists(live):
+        if keep_as:
+            os.replace(live, _plugins_copy(keep_as))
+        else:
+            shutil.rmtree(live)
+    os.replace(incoming_path, live)
+
+
+def _backup(binaries_dir: str, files: list) -> list:
+    """
+    Keep the current binaries as .name.rollback so a failed upgrade can be
+    renamed back. Returns the files the release adds, which a rollback deletes.
+    """
+    added = []
+    for name in files:
+        current = os.path.join(binaries_dir, name)
+        backup = os.path.join(binaries_dir, f".{name}.rollback")
+        if os.path.exists(current):
+            shutil.copy2(current, backup)
+        else:
+            added.append(name)
+            if os.path.exists(backup):
+                os.unlink(backup)   # Left by an earlier upgrade, it isn't this file's old version
+    return added
+
+
+def _wait_healthy(fetch_status, version: str, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            status = fetch_status()
+            if status.get("service_status") == "is running" and (version is None or status.get("version") == version):
+                return True
+        except Exception as e:
+            print(f"[UPGRADE] Health check failed: {str(e)}")
+        time.sleep(HEALTH_POLL_INTERVAL)
+    return False
+
+
+def upgrade(version: str, start_provider, stop_provider, fetch_status, artifact: str = None,
+            health_timeout: float = HEALTH_TIMEOUT) -> dict:
+    """
+    Upgrade golem to a staged (or newly staged) version: stop, rename the new
+    binaries into place, start and wait for the new version to report running.
+    If it doesn't, the old binaries are renamed back and restarted.
+    start_provider/stop_provider/fetch_status are the API's own provider helpers.
+    """
+    version = version.lstrip("v")
+    with _lock:
+        if _state["in_progress"]:
+            raise UpgradeError("An upgrade is already in progress")
+        _state["in_progress"] = True
+
+    phases = {}
+    result = {"version": version, "started_at": time.time()}
+    try:
+        phase_started = time.time()
+        staged = _state["staged"].get(version) or stage(version, artifact)
+        # The staged binaries are used up by this attempt, whatever its outcome
+        with _lock:
+            _state["staged"].pop(version, None)
+        phases["stage"] = time.time() - phase_started
+
+        binaries_dir = staged["install_dir"]
+        files = staged["files"]
+        old_status = fetch_status()
+        result["from_version"] = old_status.get("version")
+        was_running = old_status.get("service_status") == "is running"
+
+        phase_started = time.time()
+        added = _backup(binaries_dir, files)
+        phases["backup"] = time.time() - phase_started
+
+        # Downtime starts here
+        down_started = time.time()
+        if was_running:
+            stop_provider()
+        phases["stop"] = time.time() - down_started
+
+        phase_started = time.time()
+        _swap(binaries_dir, files, staged["suffix"])
+        had_plugins = os.path.exists(plugins_dir())
+        if staged.get("plugins") is not None:
+            _swap_plugins(staged["suffix"], keep_as="rollback")
+        phases["swap"] = time.time() - phase_started
+
+        if not was_running:
+            result.update({"status": "success", "downtime": 0.0, "rolled_back": False,
+                           "message": f"Installed golem {version}; the provider was not running"})
+            return result
+
+        phase_started = time.time()
+        try:
+            start_provider()
+            healthy = _wait_healthy(fetch_status, version, health_timeout)
+        except (subprocess.CalledProcessError, OSError) as e:
+            result["start_error"] = str(e)
+            healthy = False
+        phases["start_and_health"] = time.time() - phase_started
+
+        if healthy:
+            result.update({"status": "success", "downtime": time.time() - down_started, "rolled_back": False,
+                           "message": f"Upgraded golem from {result['from_version']} to {version}"})
+            return result
+
+        # Roll back to the old binaries
+        print(f"[UPGRADE] golem {version} did not become healthy within {health_timeout}s, rolling back")
+        phase_started = time.time()
+        try:
+            stop_provider()
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"[UPGRADE] Stopping the failed version failed: {str(e)}")
+        _swap(binaries_dir, files, "rollback")
+        for name in added:
+            try:
+                os.unlink(os.path.join(binaries_dir, name))
+            except FileNotFoundError:
+                pass
+        if staged.get("plugins") is not None:
+            if had_plugins:
+                _swap_plugins("rollback")
+            else:
+                shutil.rmtree(plugins_dir(), ignore_errors=True)
+        try:
+            start_provider()
+            restored = _wait_healthy(fetch_status, result["from_version"], health_timeout)
+        except (subprocess.CalledProcessError, OSError) as e:
+            result["rollback_start_error"] = str(e)
+            restored = False
+        phases["rollback"] = time.time() - phase_started
+        result.update({
+            "status": "error",
+            "downtime": time.time() - down_started,
+            "rolled_back": True,
+            "rollback_healthy": restored,
+            "message": f"golem {version} did not become healthy, rolled back to {result['from_version']}",
+        })
+        return result
+    finally:
+        result["phases"] = phases
+        result["finished_at"] = time.time()
+        with _lock:
+            _state["in_progress"] = False
+            _state["last_result"] = result
+
+
+def status() -> dict:
+    with _lock:
+        return {
+            "in_progress": _state["in_progress"],
+            "staged": dict(_state["staged"]),
+            "last_result": _state["last_result"],
+        }
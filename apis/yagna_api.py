@@ -0,0 +1,175 @@
+import json
+import os
+import subprocess
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from . import executor
+from . import tracing
+
+# Local yagna REST API - YAGNA_API_URL and YAGNA_APPKEY are the same variables yagna itself uses
+YAGNA_API_URL = os.environ.get("YAGNA_API_URL", "http://127.0.0.1:7465")
+YAGNA_APPKEY = os.environ.get("YAGNA_APPKEY")
+REQUEST_TIMEOUT = 3  # seconds
+POOL_SIZE = 8
+MAX_INVOICES = 1000   # Most recent invoices summed into the payment status
+MAX_ACTIVITIES = 50   # Most recent activities whose state is looked up (one request each)
+
+NODE_ID_CACHE_PATH = "~/.local/share/golem-api/node_id.json"
+
+_session = None
+_session_lock = threading.Lock()
+_app_key = YAGNA_APPKEY
+
+
+class YagnaApiError(Exception):
+    """Raised when the local yagna REST API can't be used"""
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session for the local yagna API"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def _read_app_key() -> str:
+    """Look up an app key with the yagna CLI (done once, then kept in memory)"""
+    try:
+        result = executor.run_command(["yagna", "app-key", "list", "--json"])
+        keys = json.loads(result.stdout)
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError) as e:
+        raise YagnaApiError(f"Could not read yagna app key: {str(e)}")
+
+    # Newer yagna prints a list of objects, older versions a table of headers/values
+    candidates = []
+    if isinstance(keys, list):
+        candidates = [entry.get("key") for entry in keys if isinstance(entry, dict)]
+    elif isinstance(keys, dict) and "key" in keys.get("headers", []):
+        column = keys["headers"].index("key")
+        candidates = [row[column] for row in keys.get("values") or [] if len(row) > column]
+    for key in candidates:
+        if isinstance(key, str) and key:
+            return key
+    raise YagnaApiError("No yagna app key found, create one with `yagna app-key create`")
+
+
+def get_app_key() -> str:
+    global _app_key
+    if _app_key is None:
+        _app_key = _read_app_key()
+    return _app_key
+
+
+def api_get(path: str) -> dict:
+    """GET a path on the local yagna API and return the decoded JSON"""
+    global _app_key
+    try:
+        headers = {"Authorization": f"Bearer {get_app_key()}"}
+        with tracing.span("yagna_api", path):
+            response = get_session().get(f"{YAGNA_API_URL}{path}", headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 401:
+            # App key was removed or rotated - look it up again next time
+            _app_key = YAGNA_APPKEY
+        response.raise_for_status()
+        return response.json()
+    except (requests.RequestException, ValueError) as e:
+        raise YagnaApiError(f"yagna API request {path} failed: {str(e)}")
+
+
+def get_identity() -> dict:
+    """Node identity from the yagna API (GET /me)"""
+    me = api_get("/me")
+    if not isinstance(me, dict) or not me.get("identity"):
+        raise YagnaApiError("yagna API returned no identity")
+    return {
+        "nodeId": me["identity"],
+        "alias": me.get("name"),
+        "role": me.get("role"),
+    }
+
+
+def get_payment_status() -> dict:
+    """
+    Invoice totals from the yagna payment API (GET /payment-api/v1/invoices), the
+    same numbers golemsp status gets from yagna payment status: issued (not yet
+    accepted), pending (accepted, not yet paid) and settled, in GLM with counts
+    """
+    invoices = api_get(f"/payment-api/v1/invoices?maxItems={MAX_INVOICES}")
+    if not isinstance(invoices, list):
+        raise YagnaApiError("yagna API returned no invoice list")
+    groups = {"ISSUED": "issued", "RECEIVED": "issued", "ACCEPTED": "pending", "SETTLED": "settled"}
+    summary = {"issued": 0.0, "issued_count": 0, "pending": 0.0, "pending_count": 0,
+               "settled": 0.0, "settled_count": 0, "platforms": []}
+    for invoice in invoices:
+        if not isinstance(invoice, dict):
+            continue
+        group = groups.get(invoice.get("status"))
+        if group is None:
+            continue    # Rejected, failed and cancelled invoices don't pay
+        try:
+            summary[group] += float(invoice.get("amount") or 0)
+        except (TypeError, ValueError):
+            continue
+        summary[f"{group}_count"] += 1
+        platform = invoice.get("paymentPlatform")
+        if platform and platform not in summary["platforms"]:
+            summary["platforms"].append(platform)
+    summary["invoices"] = len(invoices)
+    return summary
+
+
+def get_activity_status() -> dict:
+    """Activities known to yagna (GET /activity-api/v1/activity) counted by state, the latest MAX_ACTIVITIES looked up"""
+    activity_ids = api_get("/activity-api/v1/activity")
+    if not isinstance(activity_ids, list):
+        raise YagnaApiError("yagna API returned no activity list")
+    by_state = {}
+    recent = []
+    for activity_id in activity_ids[-MAX_ACTIVITIES:]:
+        state = api_get(f"/activity-api/v1/activity/{activity_id}/state")
+        if not isinstance(state, dict):
+            state = {}
+        # state is [current, next]; next is set while a transition is in progress
+        states = state.get("state")
+        current = (states[0] if isinstance(states, list) and states else None) or "Unknown"
+        by_state[current] = by_state.get(current, 0) + 1
+        recent.append({"activity_id": activity_id, "state": current, "reason": state.get("reason")})
+    return {
+        "total": len(activity_ids),
+        "checked": len(recent),
+        "in_progress": sum(count for state, count in by_state.items() if state not in ("Terminated", "Unknown")),
+        "by_state": by_state,
+        "recent": recent,
+    }
+
+
+@tracing.timed("cache", "node identity")
+def load_cached_identity() -> dict:
+    """Node identity saved by a previous lookup, or None"""
+    try:
+        with open(os.path.expanduser(NODE_ID_CACHE_PATH)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_identity(node_data: dict):
+    """Persist the node identity; it practically never changes"""
+    cache_path = os.path.expanduser(NODE_ID_CACHE_PATH)
+    cached = {k: v for k, v in node_data.items() if k != "raw_output"}
+    cached["cached_at"] = time.time()
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(cached, f)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"[YAGNA-API] Could not save node ID cache: {str(e)}")
@@ -21,23 +21,83 @@ else:
 # Now import the FastAPI app
 try:
     from apis.main import app
+    from apis.cli import default_socket_path
+    import asyncio
+    import multiprocessing
+    import socket
     import uvicorn
     
+    # GOLEM_API_UDS=1 also serves the API on a Unix socket (GOLEM_API_SOCKET, see apis/cli.py);
+    # GOLEM_API_TCP=0 turns the TCP listener off so control endpoints aren't on the network
+    HOST = os.environ.get("GOLEM_API_HOST", "0.0.0.0")
+    PORT = int(os.environ.get("GOLEM_API_PORT", "8000"))
+    SERVE_TCP = os.environ.get("GOLEM_API_TCP", "1") == "1"
+    SERVE_UDS = os.environ.get("GOLEM_API_UDS", "0") == "1"
+    
+    def bind_unix_socket(path):
+        """Bind the API socket, usable by this user only"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                raise RuntimeError(f"Another server is already listening on {path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(path)  # Left over from a previous run
+            finally:
+                probe.close()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(2048)
+        return sock
+    
+    async def serve(servers):
+        """Run the servers on one event loop; when one exits (e.g. Ctrl+C) stop the others"""
+        tasks = [asyncio.create_task(server.serve(sockets=sockets)) for server, sockets in servers]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for server, _ in servers:
+            server.should_exit = True
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, BaseException):
+                raise result
+    
     def main():
+        if not SERVE_TCP and not SERVE_UDS:
+            print("❌ Both GOLEM_API_TCP and GOLEM_API_UDS are off, nothing to serve")
+            sys.exit(1)
+        
         print("🚀 Starting Golem Provider API Server...")
-        print("📍 Server will be available at: http://localhost:8000")
-        print("📚 API documentation: http://localhost:8000/docs")
+        servers = []
+        if SERVE_TCP:
+            print(f"📍 Server will be available at: http://localhost:{PORT}")
+            print(f"📚 API documentation: http://localhost:{PORT}/docs")
+            config = uvicorn.Config(app, host=HOST, port=PORT, log_level="info")
+            servers.append((uvicorn.Server(config), None))
+        socket_path = None
+        if SERVE_UDS:
+            socket_path = default_socket_path()
+            print(f"🔌 Unix socket: {socket_path} (client: python -m apis.cli status)")
+            # Startup and shutdown hooks must only run once, on the first server
+            config = uvicorn.Config(app, log_level="info", lifespan="off" if servers else "on")
+            servers.append((uvicorn.Server(config), [bind_unix_socket(socket_path)]))
         print("🛑 Press Ctrl+C to stop the server")
         print("-" * 50)
         
-        uvicorn.run(
-            app, 
-            host="0.0.0.0", 
-            port=8000,
-            log_level="info"
-        )
+        try:
+            asyncio.run(serve(servers))
+        except KeyboardInterrupt:
+            pass  # uvicorn re-raises the captured Ctrl+C after shutting down
+        finally:
+            if socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
     
     if __name__ == "__main__":
+        # Benchmark workers are spawned processes; in the bundled executable they re-run this binary
+        multiprocessing.freeze_support()
         main()
         
 except ImportError as e:
@@ -0,0 +1,179 @@
+import hashlib
+import io
+import os
+import shutil
+import tarfile
+
+import pytest
+
+from apis import artifact_mirror
+
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    """Mirror, import and install directories under tmp_path"""
+    monkeypatch.setattr(artifact_mirror, "MIRROR_DIR", str(tmp_path / "mirror"))
+    monkeypatch.setattr(artifact_mirror, "IMPORT_DIR", str(tmp_path / "import"))
+    monkeypatch.setattr(artifact_mirror, "INSTALL_DIRS", {
+        "provider": str(tmp_path / "bin"),
+        "runtime": str(tmp_path / "plugins"),
+    })
+    os.makedirs(tmp_path / "import")
+    return tmp_path
+
+
+def _add_file(archive: tarfile.TarFile, name: str, data: bytes, mode: int = 0o644):
+    member = tarfile.TarInfo(name)
+    member.size = len(data)
+    member.mode = mode
+    archive.addfile(member, io.BytesIO(data))
+
+
+def make_provider_tarball(path, top: str = "golem-provider-linux-v0.15.2") -> str:
+    """A provider release tarball: binaries under a top-level directory, one of them a hard link"""
+    with tarfile.open(path, "w:gz") as archive:
+        _add_file(archive, f"{top}/golemsp", b"#!/bin/sh\necho golemsp 0.15.2\n", 0o755)
+        _add_file(archive, f"{top}/yagna", b"yagna binary", 0o755)
+        _add_file(archive, f"{top}/plugins/ya-runtime-vm.json", b"[]")
+        link = tarfile.TarInfo(f"{top}/ya-provider")
+        link.type = tarfile.LNKTYPE
+        link.linkname = f"{top}/yagna"
+        archive.addfile(link)
+    return str(path)
+
+
+def sha256_of(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_add_from_file_and_verify(mirror):
+    tarball = make_provider_tarball(mirror / "import" / "provider.tar.gz")
+
+    entry = artifact_mirror.add_from_file("provider.tar.gz", "provider", sha256=sha256_of(tarball))
+
+    assert entry["sha256"] == sha256_of(tarball)
+    assert entry["size"] == os.path.getsize(tarball)
+    assert artifact_mirror.load_manifest()["provider.tar.gz"]["kind"] == "provider"
+    assert artifact_mirror.verify() == {"provider.tar.gz": "ok"}
+
+
+def test_verify_reports_corrupt_and_missing_blobs(mirror):
+    make_provider_tarball(mirror / "import" / "provider.tar.gz")
+    artifact_mirror.add_from_file("provider.tar.gz", "provider")
+    blob = artifact_mirror.artifact_path("provider.tar.gz")
+
+    with open(blob, "ab") as f:
+        f.write(b"garbage")
+    assert artifact_mirror.verify() == {"provider.tar.gz": "corrupt"}
+
+    os.unlink(blob)
+    assert artifact_mirror.verify(["provider.tar.gz", "unknown"]) == {"provider.tar.gz": "missing", "unknown": "missing"}
+
+
+def test_add_rejects_checksum_mismatch(mirror):
+    make_provider_tarball(mirror / "import" / "provider.tar.gz")
+
+    with pytest.raises(artifact_mirror.MirrorError, match="Checksum mismatch"):
+        artifact_mirror.add_from_file("provider.tar.gz", "provider", sha256="0" * 64)
+
+    assert artifact_mirror.load_manifest() == {}
+    assert os.listdir(mirror / "mirror" / artifact_mirror.BLOBS_DIR) == []
+
+
+@pytest.mark.parametrize("path", ["/etc/passwd", "../outside.tar.gz", "link.tar.gz"])
+def test_local_paths_outside_the_import_dir_are_refused(mirror, path):
+    outside = make_provider_tarball(mirror / "outside.tar.gz")
+    os.symlink(outside, mirror / "import" / "link.tar.gz")
+
+    with pytest.raises(artifact_mirror.MirrorError, match="Only files in"):
+        artifact_mirror.add_from_file(path, "provider")
+    with pytest.raises(artifact_mirror.MirrorError, match="Only files in"):
+        artifact_mirror.import_bundle(path)
+
+
+def test_export_and_import_bundle(mirror, monkeypatch):
+    make_provider_tarball(mirror / "import" / "provider.tar.gz")
+    added = artifact_mirror.add_from_file("provider.tar.gz", "provider")
+    bundle = artifact_mirror.export_bundle()
+    shutil.copy(bundle, mirror / "import" / artifact_mirror.BUNDLE_NAME)
+
+    # A second node with an empty mirror
+    monkeypatch.setattr(artifact_mirror, "MIRROR_DIR", str(mirror / "other-mirror"))
+    imported = artifact_mirror.import_bundle(artifact_mirror.BUNDLE_NAME)
+
+    assert [entry["sha256"] for entry in imported] == [added["sha256"]]
+    assert artifact_mirror.verify() == {"provider.tar.gz": "ok"}
+    # Importing again skips artifacts that are already there
+    assert artifact_mirror.import_bundle(artifact_mirror.BUNDLE_NAME) == []
+
+
+def test_import_rejects_tampered_bundle(mirror):
+    make_provider_tarball(mirror / "import" / "provider.tar.gz")
+    artifact_mirror.add_from_file("provider.tar.gz", "provider")
+    with open(artifact_mirror.artifact_path("provider.tar.gz"), "ab") as f:
+        f.write(b"tampered")
+    shutil.copy(artifact_mirror.export_bundle(), mirror / "import" / artifact_mirror.BUNDLE_NAME)
+    artifact_mirror.remove("provider.tar.gz")
+
+    with pytest.raises(artifact_mirror.MirrorError, match="Checksum mismatch"):
+        artifact_mirror.import_bundle(artifact_mirror.BUNDLE_NAME)
+    assert "provider.tar.gz" not in artifact_mirror.load_manifest()
+
+
+def test_install_strips_the_top_level_directory(mirror):
+    make_provider_tarball(mirror / "import" / "provider.tar.gz")
+    artifact_mirror.add_from_file("provider.tar.gz", "provider")
+
+    installed = artifact_mirror.install()
+
+    bin_dir = mirror / "bin"
+    assert installed == [{"name": "provider.tar.gz", "kind": "provider", "target": str(bin_dir), "files": 4}]
+    assert sorted(os.listdir(bin_dir)) == ["golemsp", "ya-provider", "yagna"]
+    assert os.access(bin_dir / "golemsp", os.X_OK)
+    assert (bin_dir / "ya-provider").read_bytes() == b"yagna binary"
+    assert os.path.samefile(bin_dir / "ya-provider", bin_dir / "yagna")
+
+
+def test_install_puts_provider_plugins_in_the_runtime_dir(mirror):
+    make_provider_tarball(mirror / "import" / "provider.tar.gz")
+    artifact_mirror.add_from_file("provider.tar.gz", "provider")
+
+    artifact_mirror.install(["provider.tar.gz"])
+
+    assert os.listdir(mirror / "plugins") == ["ya-runtime-vm.json"]
+    assert (mirror / "plugins" / "ya-runtime-vm.json").read_bytes() == b"[]"
+    assert not os.path.exists(mirror / "bin" / "plugins")
+
+
+def test_install_unpacks_runtime_tarballs_into_the_runtime_dir(mirror):
+    with tarfile.open(mirror / "import" / "runtime.tar.gz", "w:gz") as archive:
+        _add_file(archive, "ya-runtime-vm-linux-v0.4.2/ya-runtime-vm.json", b"[]")
+        _add_file(archive, "ya-runtime-vm-linux-v0.4.2/ya-runtime-vm/ya-runtime-vm", b"vm", 0o755)
+    artifact_mirror.add_from_file("runtime.tar.gz", "runtime")
+
+    artifact_mirror.install(["runtime.tar.gz"])
+
+    assert sorted(os.listdir(mirror / "plugins")) == ["ya-runtime-vm", "ya-runtime-vm.json"]
+    assert os.access(mirror / "plugins" / "ya-runtime-vm" / "ya-runtime-vm", os.X_OK)
+
+
+def test_install_refuses_a_corrupt_artifact(mirror):
+    make_provider_tarball(mirror / "import" / "provider.tar.gz")
+    artifact_mirror.add_from_file("provider.tar.gz", "provider")
+    with open(artifact_mirror.artifact_path("provider.tar.gz"), "ab") as f:
+        f.write(b"garbage")
+
+    with pytest.raises(artifact_mirror.MirrorError, match="corrupt"):
+        artifact_mirror.install(["provider.tar.gz"])
+    assert not os.path.exists(mirror / "bin" / "golemsp")
+
+
+def test_install_refuses_paths_escaping_the_target(mirror):
+    with tarfile.open(mirror / "import" / "evil.tar.gz", "w:gz") as archive:
+        _add_file(archive, "top/../../escaped", b"x")
+    artifact_mirror.add_from_file("evil.tar.gz", "runtime")
+
+    with pytest.raises(artifact_mirror.MirrorError, match="Unsafe path"):
+        artifact_mirror.install(["evil.tar.gz"])
+    assert not os.path.exists(mirror / "escaped")
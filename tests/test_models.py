@@ -0,0 +1,142 @@
+import json
+import subprocess
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from apis import main
+from apis import models
+
+
+@pytest.mark.parametrize("version, expected", [
+    ("0.129.0", (0, 129, 0)),
+    ("0.130.0", (0, 130, 0)),
+    ("0.130.0rc1", (0, 130, 0)),
+    ("1.0", (1, 0)),
+])
+def test_version_tuple(version, expected):
+    assert models.version_tuple(version) == expected
+
+
+@pytest.mark.skipif(models.orjson is None, reason="orjson not installed")
+def test_orjson_before_the_pydantic_json_fast_path():
+    response_class = models.default_response_class("0.129.0")
+
+    assert response_class.__name__ == "ORJSONResponse"
+    # The fallback renders the same JSON as the default class
+    error = {"status": "error", "message": "Could not get Golem status", "stdout": None}
+    assert json.loads(response_class(error).body) == json.loads(JSONResponse(error).body)
+
+
+@pytest.mark.parametrize("version", ["0.130.0", "0.143.1", "1.0.0"])
+def test_default_response_class_with_the_pydantic_json_fast_path(version):
+    assert models.default_response_class(version) is JSONResponse
+
+
+def test_default_response_class_without_orjson(monkeypatch):
+    monkeypatch.setattr(models, "orjson", None)
+
+    assert models.default_response_class("0.100.0") is JSONResponse
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def run_command(cmd, **kwargs):
+        if cmd[:2] == ["golemsp", "status"]:
+            return subprocess.CompletedProcess(cmd, 0, stdout="Service    is not running\n", stderr="")
+        raise subprocess.CalledProcessError(1, cmd, output="", stderr="golemsp: not found")
+    monkeypatch.setattr(main.executor, "run_command", run_command)
+    return TestClient(main.app)
+
+
+def test_error_responses_only_carry_the_fields_the_endpoint_set(client):
+    body = client.get("/golem-uptime").json()
+
+    assert body == {
+        "status": "error",
+        "message": "Golem provider is not running",
+        "note": "Start the provider first using /start-golem",
+    }
+
+
+def test_error_responses_keep_fields_set_to_null(client):
+    body = client.get("/golem-settings").json()
+
+    assert body["status"] == "error"
+    assert body["stdout"] == ""
+    assert body["stderr"] == "golemsp: not found"
+    assert "details" in body
+
+
+def test_success_responses_keep_parsed_nulls(client):
+    status = client.get("/golem-status").json()["golem_status"]
+
+    assert status["service_status"] == "is not running"
+    assert status["version"] is None
+    assert "earnings" not in status
+
+
+GOLEMSP_STATUS = """\
+Status
+
+Service    is running
+Version    0.15.2
+Commit     eae8f3b7
+Date       2024-06-27
+Build      473
+
+Node Name  lively-wind
+Subnet     public
+VM         valid
+
+Wallet
+0x8b5079bceddbe45ebac311712c5942d91c08edfd
+
+network               mainnet
+amount (total)        12.5 GLM
+    (on-chain)        2.25 GLM
+    (polygon)         10.25 GLM
+
+pending               0.75 GLM (3)
+issued                1.5 GLM (12)
+"""
+
+
+def test_golem_status_earnings_are_numbers(monkeypatch):
+    def run_command(cmd, **kwargs):
+        return subprocess.CompletedProcess(cmd, 0, stdout=GOLEMSP_STATUS, stderr="")
+    monkeypatch.setattr(main.executor, "run_command", run_command)
+
+    body = TestClient(main.app).get("/golem-status").json()
+
+    status = body["golem_status"]
+    assert body["status"] == "success"
+    assert status["service_status"] == "is running"
+    assert status["version"] == "0.15.2"
+    assert status["node_name"] == "lively-wind"
+    assert status["earnings"] == {
+        "network": "mainnet",
+        "amount_total": 12.5,
+        "amount_onchain": 2.25,
+        "amount_polygon": 10.25,
+        "pending": 0.75,
+        "pending_count": 3,
+        "issued": 1.5,
+        "issued_count": 12,
+    }
+    assert isinstance(status["earnings"]["pending_count"], int)
+    assert isinstance(status["earnings"]["issued"], float)
+
+
+def test_golem_status_leaves_out_earnings_fields_it_could_not_parse(monkeypatch):
+    output = "Service    is running\nVersion    0.15.2\nnetwork  polygon\npending  0.5 GLM (1)\n"
+    def run_command(cmd, **kwargs):
+        return subprocess.CompletedProcess(cmd, 0, stdout=output, stderr="")
+    monkeypatch.setattr(main.executor, "run_command", run_command)
+
+    status = TestClient(main.app).get("/golem-status").json()["golem_status"]
+
+    assert status["earnings"] == {"network": "polygon", "pending": 0.5, "pending_count": 1}
+    for unset in ("amount_total", "amount_onchain", "amount_polygon", "issued", "issued_count"):
+        assert unset not in status["earnings"]
@@ -0,0 +1,110 @@
+import io
+import os
+import tarfile
+
+import pytest
+
+from apis import artifact_mirror
+from apis import host_probe
+from apis import upgrade
+
+
+@pytest.fixture
+def node(tmp_path, monkeypatch):
+    """Mirror, staging, bin and plugins directories under tmp_path, with no golemsp on PATH"""
+    monkeypatch.setattr(artifact_mirror, "MIRROR_DIR", str(tmp_path / "mirror"))
+    monkeypatch.setattr(artifact_mirror, "IMPORT_DIR", str(tmp_path / "import"))
+    monkeypatch.setattr(artifact_mirror, "INSTALL_DIRS", {
+        "provider": str(tmp_path / "bin"),
+        "runtime": str(tmp_path / "lib" / "plugins"),
+    })
+    monkeypatch.setattr(upgrade, "STAGING_DIR", str(tmp_path / "staging"))
+    monkeypatch.setattr(upgrade, "HEALTH_POLL_INTERVAL", 0)
+    monkeypatch.setattr(upgrade, "_state", {"in_progress": False, "staged": {}, "last_result": None})
+    monkeypatch.setattr(host_probe, "find_golemsp", lambda: None)
+    os.makedirs(tmp_path / "import")
+    return tmp_path
+
+
+def _add_file(archive: tarfile.TarFile, name: str, data: bytes, mode: int = 0o755):
+    member = tarfile.TarInfo(name)
+    member.size = len(data)
+    member.mode = mode
+    archive.addfile(member, io.BytesIO(data))
+
+
+def add_release(node, version: str, extra_files: tuple = ()) -> str:
+    """Mirror a provider tarball whose golemsp reports version"""
+    name = f"golem-provider-linux-v{version}.tar.gz"
+    top = f"golem-provider-linux-v{version}"
+    with tarfile.open(node / "import" / name, "w:gz") as archive:
+        _add_file(archive, f"{top}/golemsp", f"#!/bin/sh\necho golemsp {version}\n".encode())
+        _add_file(archive, f"{top}/yagna", f"yagna {version}".encode())
+        for extra in extra_files:
+            _add_file(archive, f"{top}/{extra}", f"{extra} {version}".encode())
+        _add_file(archive, f"{top}/plugins/ya-runtime-vm.json", f'{{"version": "{version}"}}'.encode(), 0o644)
+    artifact_mirror.add_from_file(name, "provider")
+    return name
+
+
+def install_current(node, version: str):
+    os.makedirs(node / "bin")
+    (node / "bin" / "golemsp").write_text(f"#!/bin/sh\necho golemsp {version}\n")
+    (node / "bin" / "yagna").write_text(f"yagna {version}")
+    os.makedirs(node / "lib" / "plugins")
+    (node / "lib" / "plugins" / "ya-runtime-vm.json").write_text(f'{{"version": "{version}"}}')
+
+
+class FakeProvider:
+    """start/stop/fetch_status for upgrade(); the running version is read from the installed golemsp"""
+
+    def __init__(self, node, healthy: bool = True):
+        self.node = node
+        self.healthy = healthy
+        self.running = True
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def status(self) -> dict:
+        version = (self.node / "bin" / "golemsp").read_text().split()[-1]
+        running = self.running and (self.healthy or version == "0.15.0")
+        return {"service_status": "is running" if running else "is not running", "version": version}
+
+
+def test_staging_two_versions_keeps_each_ones_binaries(node):
+    install_current(node, "0.15.0")
+    artifact_a = add_release(node, "0.15.1")
+    artifact_b = add_release(node, "0.15.2")
+    provider = FakeProvider(node)
+
+    upgrade.stage("0.15.1", artifact_a)
+    upgrade.stage("0.15.2", artifact_b)
+    result = upgrade.upgrade("0.15.1", provider.start, provider.stop, provider.status, health_timeout=1)
+
+    assert result["status"] == "success"
+    assert (node / "bin" / "golemsp").read_text() == "#!/bin/sh\necho golemsp 0.15.1\n"
+    assert (node / "bin" / "yagna").read_text() == "yagna 0.15.1"
+    assert (node / "lib" / "plugins" / "ya-runtime-vm.json").read_text() == '{"version": "0.15.1"}'
+    # 0.15.2 is still staged and can be upgraded to next
+    assert list(upgrade.status()["staged"]) == ["0.15.2"]
+    result = upgrade.upgrade("0.15.2", provider.start, provider.stop, provider.status, health_timeout=1)
+    assert result["status"] == "success"
+    assert (node / "bin" / "yagna").read_text() == "yagna 0.15.2"
+
+
+def test_rollback_restores_old_binaries_and_removes_added_files(node):
+    install_current(node, "0.15.0")
+    artifact = add_release(node, "0.15.1", extra_files=("ya-provider",))
+    provider = FakeProvider(node, healthy=False)
+
+    result = upgrade.upgrade("0.15.1", provider.start, provider.stop, provider.status, artifact, health_timeout=0.1)
+
+    assert result["rolled_back"] is True
+    assert result["rollback_healthy"] is True
+    assert (node / "bin" / "yagna").read_text() == "yagna 0.15.0"
+    assert not os.path.exists(node / "bin" / "ya-provider")
+    assert (node / "lib" / "plugins" / "ya-runtime-vm.json").read_text() == '{"version": "0.15.0"}'
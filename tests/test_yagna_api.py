@@ -0,0 +1,154 @@
+import json
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from apis import executor
+from apis import yagna_api
+
+APP_KEY = "test-app-key"
+
+
+class StandInYagna(BaseHTTPRequestHandler):
+    """Serves canned JSON for the yagna REST paths the client uses; routes are set per test"""
+
+    routes = {}
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("Authorization")))
+        if self.headers.get("Authorization") != f"Bearer {APP_KEY}":
+            self.send_response(401)
+            self.end_headers()
+            return
+        if self.path not in self.routes:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps(self.routes[self.path]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def yagna(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInYagna)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    monkeypatch.setattr(StandInYagna, "routes", {})
+    monkeypatch.setattr(StandInYagna, "requests", [])
+    monkeypatch.setattr(yagna_api, "YAGNA_API_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(yagna_api, "YAGNA_APPKEY", APP_KEY)
+    monkeypatch.setattr(yagna_api, "_app_key", APP_KEY)
+    yield StandInYagna
+    server.shutdown()
+    server.server_close()
+
+
+def fake_cli(monkeypatch, stdout: str):
+    def run_command(cmd, **kwargs):
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+    monkeypatch.setattr(executor, "run_command", run_command)
+
+
+def test_get_identity(yagna):
+    yagna.routes["/me"] = {"identity": "0x8b5079bceddbe45ebac311712c5942d91c08edfd", "name": "node", "role": "manager"}
+
+    assert yagna_api.get_identity() == {
+        "nodeId": "0x8b5079bceddbe45ebac311712c5942d91c08edfd",
+        "alias": "node",
+        "role": "manager",
+    }
+    assert yagna.requests == [("/me", f"Bearer {APP_KEY}")]
+
+
+@pytest.mark.parametrize("body", [["0x8b50"], "0x8b50", None, {"name": "node"}])
+def test_get_identity_rejects_unexpected_json(yagna, body):
+    yagna.routes["/me"] = body
+
+    with pytest.raises(yagna_api.YagnaApiError):
+        yagna_api.get_identity()
+
+
+def test_unreachable_api_raises_yagna_api_error(monkeypatch):
+    monkeypatch.setattr(yagna_api, "YAGNA_API_URL", "http://127.0.0.1:1")
+    monkeypatch.setattr(yagna_api, "_app_key", APP_KEY)
+
+    with pytest.raises(yagna_api.YagnaApiError):
+        yagna_api.get_identity()
+
+
+def test_rejected_app_key_is_looked_up_again(yagna, monkeypatch):
+    monkeypatch.setattr(yagna_api, "YAGNA_APPKEY", None)
+    monkeypatch.setattr(yagna_api, "_app_key", "rotated-key")
+    yagna.routes["/me"] = {"identity": "0x8b50"}
+
+    with pytest.raises(yagna_api.YagnaApiError):
+        yagna_api.get_identity()
+
+    fake_cli(monkeypatch, json.dumps([{"name": "checker", "key": APP_KEY}]))
+    assert yagna_api.get_identity()["nodeId"] == "0x8b50"
+
+
+@pytest.mark.parametrize("stdout", [
+    json.dumps([{"name": "broken", "key": None}, {"name": "checker", "key": APP_KEY}]),
+    json.dumps({"headers": ["name", "key"], "values": [["broken", None], ["checker", APP_KEY]]}),
+])
+def test_app_key_skips_entries_without_a_key(monkeypatch, stdout):
+    monkeypatch.setattr(yagna_api, "_app_key", None)
+    fake_cli(monkeypatch, stdout)
+
+    assert yagna_api.get_app_key() == APP_KEY
+
+
+@pytest.mark.parametrize("stdout", ["[]", json.dumps([{"name": "broken", "key": None}]), json.dumps({"headers": []})])
+def test_app_key_missing_raises(monkeypatch, stdout):
+    monkeypatch.setattr(yagna_api, "_app_key", None)
+    fake_cli(monkeypatch, stdout)
+
+    with pytest.raises(yagna_api.YagnaApiError, match="No yagna app key"):
+        yagna_api.get_app_key()
+
+
+def test_get_payment_status(yagna):
+    invoice_path = f"/payment-api/v1/invoices?maxItems={yagna_api.MAX_INVOICES}"
+    yagna.routes[invoice_path] = [
+        {"invoiceId": "1", "status": "ISSUED", "amount": "0.1", "paymentPlatform": "erc20-polygon-glm"},
+        {"invoiceId": "2", "status": "RECEIVED", "amount": "0.1", "paymentPlatform": "erc20-polygon-glm"},
+        {"invoiceId": "3", "status": "ACCEPTED", "amount": "0.25", "paymentPlatform": "erc20-polygon-glm"},
+        {"invoiceId": "4", "status": "SETTLED", "amount": "1.5", "paymentPlatform": "erc20-mainnet-glm"},
+        {"invoiceId": "5", "status": "REJECTED", "amount": "9", "paymentPlatform": "erc20-polygon-glm"},
+    ]
+
+    status = yagna_api.get_payment_status()
+
+    assert status["issued"] == pytest.approx(0.2)
+    assert status["issued_count"] == 2
+    assert status["pending"] == pytest.approx(0.25)
+    assert status["pending_count"] == 1
+    assert status["settled"] == pytest.approx(1.5)
+    assert status["settled_count"] == 1
+    assert status["platforms"] == ["erc20-polygon-glm", "erc20-mainnet-glm"]
+    assert status["invoices"] == 5
+
+
+def test_get_activity_status(yagna):
+    yagna.routes["/activity-api/v1/activity"] = ["a1", "a2", "a3"]
+    yagna.routes["/activity-api/v1/activity/a1/state"] = {"state": ["Terminated", None], "reason": "done"}
+    yagna.routes["/activity-api/v1/activity/a2/state"] = {"state": ["Ready", None]}
+    yagna.routes["/activity-api/v1/activity/a3/state"] = {"state": ["Deployed", "Ready"]}
+
+    status = yagna_api.get_activity_status()
+
+    assert status["total"] == 3
+    assert status["by_state"] == {"Terminated": 1, "Ready": 1, "Deployed": 1}
+    assert status["in_progress"] == 2
+    assert status["recent"][0] == {"activity_id": "a1", "state": "Terminated", "reason": "done"}